@@ -0,0 +1,211 @@
+from array import array
+from typing import Tuple, List, Dict, Any, Optional
+import time
+
+import numpy as np
+
+from .base import CLOSED, SEEN
+from .astar import AStar, Heuristic
+
+# closed cell whose g improved during the current iteration; reopened by the next one
+INCONS = 8
+
+
+class ARAStar(AStar):
+    """Anytime Repairing A* (Likhachev et al. 2003).
+
+    Searches with weight ``weight`` first, then lowers it by ``weight_step`` per iteration down to 1,
+    reusing g values and OPEN across iterations: only cells whose g improved after they were
+    expanded (INCONS) are expanded again. Every iteration that improves the solution publishes it
+    with its suboptimality bound ``min(weight, cost / min(g + h over OPEN and INCONS))``; the bound
+    reaching 1 proves the solution optimal. The run also stops once it has spent ``time_limit_ms``
+    of search time or ``max_expansions`` expansions, keeping the best solution so far.
+    """
+
+    def __init__(self, grid, heuristic=Heuristic.octile, weight: float = 3.0, weight_step: float = 0.5,
+                 time_limit_ms: Optional[float] = None, max_expansions: Optional[int] = None,
+                 h_field: Optional[Any] = None, h_stats: Optional[Dict[str, Any]] = None):
+        super().__init__(grid, heuristic=heuristic, weight=max(1.0, weight), h_field=h_field, h_stats=h_stats)
+        self.weight_step = max(1e-3, weight_step)
+        self.time_limit = time_limit_ms / 1000 if time_limit_ms else None
+        self.max_expansions = max_expansions
+        self._incons = array("i")
+        self.iterations = 0
+        self.best_path: List[Tuple[int, int]] = []
+        self.best_cost: Optional[float] = None
+        self.bound: Optional[float] = None
+        # published solutions, oldest first: cost, bound, weight and the effort spent to reach them
+        self.solutions: List[Dict[str, Any]] = []
+        self.stop_reason: Optional[str] = None
+
+    def _expand(self) -> Optional[Tuple[int, Optional[List[int]]]]:
+        # one expansion of the current iteration; None once it is over, that is when the goal's
+        # g is no larger than the smallest key in OPEN (or OPEN ran dry)
+        goal = self._goal
+        state, gs, hs = self._state, self._g, self._h
+        i = self._peek_open()
+        if i < 0 or (state[goal] & SEEN and gs[goal] <= self._f[i]):
+            return None
+        self._pop_open()
+        self._close(i)
+        self.expanded += 1
+        grid = self.grid
+        size = grid.size
+        gx, gy = grid.goal
+        hv, hf, w = self._hv, self.hf, self.weight
+        cur_g = gs[i]
+        neighbors = []
+        for off, cost in grid._offsets_by_mask[grid._mask[i]]:
+            j = i + off
+            st = state[j]
+            tentative_g = cur_g + cost
+            if st & SEEN and tentative_g >= gs[j]:
+                neighbors.append(j)
+                continue
+            if st & CLOSED:
+                # expanded already in this iteration: fix g now, expand again next iteration
+                gs[j] = tentative_g
+                self._parent[j] = i
+                if not st & INCONS:
+                    state[j] = st | INCONS
+                    self._incons.append(j)
+            else:
+                if st & SEEN:
+                    h = hs[j]
+                elif hv is None:
+                    ny, nx = divmod(j, size)
+                    h = hf(gx - nx, gy - ny)
+                else:
+                    h = hv[j]
+                self._push_open(j, tentative_g, h, tentative_g + w * h, i)
+            neighbors.append(j)
+        return i, neighbors
+
+    def _end_iteration(self) -> Optional[Dict[str, Any]]:
+        # publish the iteration's solution if it improved on the last one, then start the next
+        # iteration with a smaller weight (or finish). Returns the published solution, if any.
+        self.iterations += 1
+        goal = self._goal
+        solution = None
+        if self._state[goal] & SEEN:
+            cost = self._g[goal]
+            live = np.array([i for _, _, i in self._live_entries()] + list(self._incons), dtype=np.int64)
+            lower = float((self._gs[live] + self._hs[live]).min()) if len(live) else cost
+            bound = 1.0 if cost == 0 or lower >= cost else min(self.weight, cost / lower)
+            if self.best_cost is None or cost < self.best_cost or bound < self.bound:
+                self.best_path = self.reconstruct(self.grid.goal)
+                self.best_cost, self.bound = cost, bound
+                solution = {"cost": cost, "bound": round(bound, 6), "weight": round(self.weight, 6),
+                            "path_len": len(self.best_path), "expanded": self.expanded,
+                            "elapsed_ms": round(self.expand_time * 1000, 3)}
+                self.solutions.append(solution)
+        if self.bound is None and self.open_count == 0:
+            self.stop_reason = "exhausted"
+            return solution
+        if self.bound is not None and self.bound <= 1.0:
+            self.stop_reason = "optimal"
+            return solution
+        # a weight above the bound already proven cannot tighten it; halve the gap to 1 instead
+        target = self.weight - self.weight_step
+        if self.bound is not None:
+            target = min(target, 1.0 + (self.bound - 1.0) / 2)
+        self.weight = max(1.0, target)
+        # INCONS rejoins OPEN, CLOSED is emptied and every OPEN key is recomputed for the new weight
+        state = self._state
+        for j in self._incons:
+            state[j] &= ~INCONS & 0xFF
+            self._push_open(j, self._g[j], self._h[j], 0.0, self._parent[j])
+        self._incons = array("i")
+        closed = np.frombuffer(self._closed_list, dtype=np.int32)
+        self._states[closed] &= ~CLOSED & 0xFF
+        self._closed_list = array("i")
+        live = np.array([i for _, _, i in self._live_entries()], dtype=np.int64)
+        self._fs[live] = self._gs[live] + self.weight * self._hs[live]
+        self._reheap()
+        return solution
+
+    def _out_of_budget(self) -> bool:
+        if self.max_expansions is not None and self.expanded >= self.max_expansions:
+            self.stop_reason = "budget"
+            return True
+        if self.time_limit is not None and self.expand_time >= self.time_limit:
+            self.stop_reason = "deadline"
+            return True
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        out = super().stats()
+        out.update(weight=round(self.weight, 6), bound=None if self.bound is None else round(self.bound, 6), iterations=self.iterations, solution_count=len(self.solutions))
+        if self.stop_reason:
+            out["stop_reason"] = self.stop_reason
+        return out
+
+    def _finished(self) -> Dict[str, Any]:
+        snap = self.snapshot(self.grid.goal, [], finished=True)
+        snap["path"] = self.best_path
+        if self.best_cost is not None:
+            snap["stats"]["cost"] = self.best_cost
+        return snap
+
+    def step(self) -> Dict[str, Any]:
+        # snapshots as usual; an iteration that improves the solution ends in a full snapshot
+        # (CLOSED was emptied) carrying "solution" and the new best "path"
+        if self.unreachable():
+            return {"finished": True, "path": [], "stats": {**self.stats(), "unreachable": True}}
+        if self.stop_reason or self._out_of_budget():
+            return self._finished()
+        t0 = time.perf_counter()
+        res = self._expand()
+        solution = self._end_iteration() if res is None else None
+        self.expand_time += time.perf_counter() - t0
+        if self.stop_reason:
+            snap = self._finished()
+            if solution:
+                snap["solution"] = solution
+            return snap
+        if res is None:
+            snap = self.resync(self.grid.goal)
+            snap["path"] = self.best_path
+            if solution:
+                snap["solution"] = solution
+            return snap
+        i, neighbors = res
+        return self.snapshot(self._xy(i), [self._xy(j) for j in neighbors])
+
+    def solve(self, max_expansions: Optional[int] = None) -> Dict[str, Any]:
+        # headless run to the optimum or the budget; "solutions" lists every published improvement
+        if self.unreachable():
+            return {"found": False, "path": [], "cost": None, **self.stats(), "elapsed_ms": 0.0, "unreachable": True}
+        if max_expansions is not None:
+            self.max_expansions = max_expansions if self.max_expansions is None else min(max_expansions, self.max_expansions)
+        limit = self.max_expansions
+        delta, self.delta = self.delta, False
+        clock = time.perf_counter
+        spent = self.expand_time
+        t0 = clock()
+        deadline = None if self.time_limit is None else t0 + self.time_limit - spent
+        expand = self._expand
+        try:
+            while not self.stop_reason:
+                if limit is not None and self.expanded >= limit:
+                    self.stop_reason = "budget"
+                    break
+                if deadline is not None and clock() >= deadline:
+                    self.stop_reason = "deadline"
+                    break
+                if expand() is None:
+                    # solutions record the search time they took
+                    self.expand_time = spent + clock() - t0
+                    self._end_iteration()
+        finally:
+            self.delta = delta
+        elapsed = clock() - t0
+        self.expand_time = spent + elapsed
+        return {
+            "found": self.best_cost is not None,
+            "path": self.best_path,
+            "cost": self.best_cost,
+            **self.stats(),
+            "solutions": self.solutions,
+            "elapsed_ms": round(elapsed * 1000, 3),
+        }
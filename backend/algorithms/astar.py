@@ -1,7 +1,9 @@
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Optional, Callable
 import math
-import heapq
-from .base import SearchBase, Node
+
+import numpy as np
+
+from .base import SearchBase, OPEN, CLOSED
 
 
 class Heuristic:
@@ -26,55 +28,112 @@ class Heuristic:
     def chebyshev(dx: int, dy: int) -> float:
         return max(abs(dx), abs(dy))
 
+    @staticmethod
+    def batch(h: Callable[[int, int], float], dx, dy) -> np.ndarray:
+        # h over whole arrays of offsets (broadcast), bit-identical to the scalar version;
+        # custom scalar heuristics fall back to np.vectorize, timed ones use what they wrap
+        dx = np.asarray(dx, dtype=np.int64)
+        dy = np.asarray(dy, dtype=np.int64)
+        v = _VECTORIZED.get(getattr(h, "__wrapped__", h))
+        if v is None:
+            return np.vectorize(h, otypes=[np.float64])(dx, dy)
+        return v(dx, dy)
+
+    @staticmethod
+    def field(h: Callable[[int, int], float], size: int, target: Tuple[int, int]) -> np.ndarray:
+        # h from every cell to target, as a (size, size) float64 array indexed [y, x]
+        xs = np.arange(size, dtype=np.int64)
+        return Heuristic.batch(h, target[0] - xs[None, :], target[1] - xs[:, None])
+
+
+def _zero_v(dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
+    return np.zeros(np.broadcast(dx, dy).shape)
+
+
+def _manhattan_v(dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
+    return (np.abs(dx) + np.abs(dy)).astype(np.float64)
+
+
+def _euclidean_v(dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
+    return np.sqrt((dx * dx + dy * dy).astype(np.float64))
+
+
+def _octile_v(dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
+    a, b = np.abs(dx), np.abs(dy)
+    return (a + b) + (math.sqrt(2) - 2.0) * np.minimum(a, b)
+
+
+def _chebyshev_v(dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
+    return np.maximum(np.abs(dx), np.abs(dy)).astype(np.float64)
+
+
+_VECTORIZED = {
+    Heuristic.zero: _zero_v,
+    Heuristic.manhattan: _manhattan_v,
+    Heuristic.euclidean: _euclidean_v,
+    Heuristic.octile: _octile_v,
+    Heuristic.chebyshev: _chebyshev_v,
+}
+
 
 class AStar(SearchBase):
-    def __init__(self, grid, heuristic=Heuristic.octile, weight: float = 1.0):
+    # h_field: optional precomputed (size, size) array of h to the goal, indexed [y, x]
+    # (e.g. Heuristic.field), or any lookup by flat cell index y * size + x (e.g. the ALT bounds of
+    # landmarks.AltHeuristic); it replaces the per-neighbor heuristic calls. h_stats describes how
+    # the heuristic was obtained (e.g. ALT preprocessing) and is reported with the search stats.
+    def __init__(self, grid, heuristic=Heuristic.octile, weight: float = 1.0, h_field: Optional[Any] = None,
+                 h_stats: Optional[Dict[str, Any]] = None):
         super().__init__(grid)
         self.hf = heuristic
         self.weight = weight
+        self.h_stats = h_stats or {}
+        self._hv = None
+        if isinstance(h_field, np.ndarray):
+            if h_field.shape != (grid.size, grid.size):
+                raise ValueError("h_field must have shape (size, size)")
+            self._hv = memoryview(np.ascontiguousarray(h_field, dtype=np.float64)).cast("B").cast("d")
+        elif h_field is not None:
+            self._hv = h_field
         gx, gy = grid.goal
+        self._goal = gy * grid.size + gx
         # initialize f of start
         sx, sy = grid.start
-        h0 = self.hf(gx - sx, gy - sy)
-        start = self.open[0]
-        start.h = h0
-        start.f = start.g + self.weight * h0
-        self.open_map[(sx, sy)] = start
-    
-    def step(self) -> Dict[str, Any]:
-        if not self.open:
-            return {"finished": True, "path": [], "stats": {"expanded": self.expanded}}
-        cur = heapq.heappop(self.open)
-        self.open_map.pop((cur.x, cur.y), None)
-        self.closed.add((cur.x, cur.y))
+        s = sy * grid.size + sx
+        h0 = self.hf(gx - sx, gy - sy) if self._hv is None else self._hv[s]
+        self._h[s] = h0
+        self._f[s] = self.weight * h0
+        self._reheap()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), **self.h_stats}
+
+    def _expand(self) -> Optional[Tuple[int, Optional[List[int]]]]:
+        i = self._pop_open()
+        if i < 0:
+            return None
+        self._close(i)
         self.expanded += 1
-        if (cur.x, cur.y) == self.grid.goal:
-            path = self.reconstruct((cur.x, cur.y))
-            snap = self.snapshot((cur.x, cur.y), [], finished=True)
-            snap["path"] = path
-            snap["stats"]["cost"] = cur.g
-            return snap
+        if i == self._goal:
+            return i, None
+        grid = self.grid
+        size = grid.size
+        gx, gy = grid.goal
+        hv, hf, w = self._hv, self.hf, self.weight
+        state, gs = self._state, self._g
+        cur_g = gs[i]
         neighbors = []
-        for nx, ny in self.grid.neighbors(cur.x, cur.y):
-            if (nx, ny) in self.closed:
+        for off, cost in grid._offsets_by_mask[grid._mask[i]]:
+            j = i + off
+            st = state[j]
+            if st & CLOSED:
                 continue
-            tentative_g = cur.g + self.grid.move_cost((cur.x, cur.y), (nx, ny))
-            node = self.open_map.get((nx, ny))
-            gx, gy = self.grid.goal
-            h = self.hf(gx - nx, gy - ny)
-            f = tentative_g + self.weight * h
-            if node is None:
-                node = Node(f=f, x=nx, y=ny, g=tentative_g, h=h, parent=(cur.x, cur.y))
-                heapq.heappush(self.open, node)
-                self.open_map[(nx, ny)] = node
-                self.parent_map[(nx, ny)] = (cur.x, cur.y)
-            elif tentative_g < node.g:
-                node.g = tentative_g
-                node.h = h
-                node.f = f
-                node.parent = (cur.x, cur.y)
-                heapq.heapify(self.open)
-                self.parent_map[(nx, ny)] = (cur.x, cur.y)
-            neighbors.append((nx, ny))
-        return self.snapshot((cur.x, cur.y), neighbors)
-
+            tentative_g = cur_g + cost
+            if not st & OPEN or tentative_g < gs[j]:
+                if hv is None:
+                    ny, nx = divmod(j, size)
+                    h = hf(gx - nx, gy - ny)
+                else:
+                    h = hv[j]
+                self._push_open(j, tentative_g, h, tentative_g + w * h, i)
+            neighbors.append(j)
+        return i, neighbors
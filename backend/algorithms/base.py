@@ -1,53 +1,457 @@
-from dataclasses import dataclass, field
+from array import array
 from typing import Tuple, Dict, Any, List, Optional, Set
 import heapq
+import mmap
+import threading
+import time
+import weakref
 
+import numpy as np
 
-@dataclass(order=True)
-class Node:
-    f: float
-    x: int = field(compare=False)
-    y: int = field(compare=False)
-    g: float = field(compare=False, default=0.0)
-    h: float = field(compare=False, default=0.0)
-    parent: Optional[Tuple[int, int]] = field(compare=False, default=None)
+# per-cell state bits
+OPEN, CLOSED, SEEN = 1, 2, 4
+# bytes of search state per cell: g, h, f, parent, seq and state
+CELL_BYTES = 33
+
+
+# bytes held in the mmaps of _lazy_zeros: live now and the peak since reset_mapped_peak(). tracemalloc
+# does not see them, so memory measurements add the peak to the traced one.
+_MAPPED = {"live": 0, "peak": 0}
+_MAPPED_LOCK = threading.Lock()
+
+
+def _unmapped(nbytes: int):
+    with _MAPPED_LOCK:
+        _MAPPED["live"] -= nbytes
+
+
+def mapped_peak() -> int:
+    with _MAPPED_LOCK:
+        return _MAPPED["peak"]
+
+
+def reset_mapped_peak():
+    with _MAPPED_LOCK:
+        _MAPPED["peak"] = _MAPPED["live"]
+
+
+def _lazy_zeros(n: int, dtype) -> np.ndarray:
+    # zero-filled array whose pages are committed on first touch. Large ones come from an anonymous
+    # mmap with transparent huge pages off: numpy would otherwise back them with 2 MB pages, and a
+    # search that touches a small part of a big map would still commit most of it.
+    nbytes = n * np.dtype(dtype).itemsize
+    if nbytes < 1 << 22 or not hasattr(mmap, "MADV_NOHUGEPAGE"):
+        return np.zeros(n, dtype=dtype)
+    mm = mmap.mmap(-1, nbytes)
+    mm.madvise(mmap.MADV_NOHUGEPAGE)
+    with _MAPPED_LOCK:
+        _MAPPED["live"] += nbytes
+        _MAPPED["peak"] = max(_MAPPED["peak"], _MAPPED["live"])
+    weakref.finalize(mm, _unmapped, nbytes)
+    return np.frombuffer(mm, dtype=dtype)
+
+
+def _committed(arrays: List[np.ndarray], seen: np.ndarray) -> int:
+    # bytes committed by flat per-cell arrays that are written only at cells where seen is nonzero:
+    # all of a plain array, and for a _lazy_zeros mmap the pages that hold such a cell
+    lazy = [a for a in arrays if isinstance(a.base, memoryview) and isinstance(a.base.obj, mmap.mmap)]
+    total = sum(a.nbytes for a in arrays) - sum(a.nbytes for a in lazy)
+    if not lazy:
+        return total
+    # seen per block of the cells on one page of a float64 array; wider pages group 2 or 8 blocks
+    per = mmap.PAGESIZE // 8
+    head = len(seen) - len(seen) % per
+    blocks = seen[:head].view(np.uint64).reshape(-1, per // 8).any(axis=1)
+    if head < len(seen):
+        blocks = np.append(blocks, seen[head:].any())
+    for a in lazy:
+        k = 8 // a.itemsize
+        grouped = np.append(blocks, np.zeros(-len(blocks) % k, dtype=bool)).reshape(-1, k).any(axis=1)
+        total += int(np.count_nonzero(grouped)) * mmap.PAGESIZE
+    return total
 
 
 class SearchBase:
-    def __init__(self, grid):
+    def __init__(self, grid, root: Optional[Tuple[int, int]] = None):
+        # root is where the search grows from; backward frontiers pass grid.goal
         self.grid = grid
-        self.open: List[Node] = []
-        self.open_map: Dict[Tuple[int, int], Node] = {}
-        self.closed: Set[Tuple[int, int]] = set()
-        self.parent_map: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {}
-        sx, sy = grid.start
-        n = Node(f=0.0, x=sx, y=sy, g=0.0, h=0.0, parent=None)
-        heapq.heappush(self.open, n)
-        self.open_map[(sx, sy)] = n
-        self.parent_map[(sx, sy)] = None
+        size = grid.size
+        self._size = size
+        # search state lives in flat arrays indexed y * size + x: g, h, f and parent are valid once
+        # the cell is SEEN. Pages are only committed when touched, so a search pays for the part of
+        # the map it reaches (CELL_BYTES a cell) rather than for the whole map.
+        n = size * size
+        self._gs = _lazy_zeros(n, np.float64)
+        self._hs = _lazy_zeros(n, np.float64)
+        self._fs = _lazy_zeros(n, np.float64)
+        self._parents = _lazy_zeros(n, np.int32)
+        self._seqs = _lazy_zeros(n, np.uint32)
+        self._states = _lazy_zeros(n, np.uint8)
+        # memoryviews give fast scalar reads and writes from Python
+        self._g = memoryview(self._gs)
+        self._h = memoryview(self._hs)
+        self._f = memoryview(self._fs)
+        self._parent = memoryview(self._parents)
+        self._seq_of = memoryview(self._seqs)
+        self._state = memoryview(self._states)
+        # OPEN is a binary heap of plain (key, seq, index) tuples with lazy deletion: an entry is live
+        # only while its cell is OPEN and still carries that seq, so decrease-key is a plain push and
+        # stale entries are skipped on pop. seq breaks key ties first-in-first-out, which keeps
+        # expansion deterministic.
+        self.open: List[Tuple[Any, int, int]] = []
+        self._seq = 0
+        self.open_count = 0
+        self._closed_list = array("i")
+        # delta mode: snapshots only carry OPEN/CLOSED changes since the previous snapshot
+        self.delta = False
+        self._open_before: Dict[int, bool] = {}
+        self._closed_added: List[Tuple[int, int]] = []
+        # instrumentation: counters are always kept; heuristic time only after time_heuristics()
+        self.generated = 0
+        self.reopened = 0
+        self.heap_pushes = 0
+        self.heap_pops = 0
+        self.peak_open = 0
+        self.expand_time = 0.0
+        self.heuristic_time = 0.0
+        self.snapshot_time = 0.0
+        sx, sy = root if root is not None else grid.start
+        self._push_open(sy * size + sx, 0.0, 0.0, 0.0, -1)
         self.expanded = 0
+        # start/goal connectivity from the grid's component labels; None until first asked
+        self._reachable: Optional[bool] = None
+
+    def state_bytes(self) -> int:
+        # search state committed so far; only SEEN cells are ever written. O(map size) to measure.
+        arrays = [self._gs, self._hs, self._fs, self._parents, self._seqs, self._states]
+        return _committed(arrays, self._states)
+
+    def unreachable(self) -> bool:
+        # True when start and goal lie in different components, so no search can succeed
+        if self._reachable is None:
+            self._reachable = self.grid.reachable(self.grid.start, self.grid.goal)
+        return not self._reachable
+
+    def _xy(self, i: int) -> Tuple[int, int]:
+        y, x = divmod(i, self._size)
+        return x, y
+
+    def _index(self, xy: Tuple[int, int]) -> int:
+        return xy[1] * self._size + xy[0]
+
+    def is_open(self, xy: Tuple[int, int]) -> bool:
+        return bool(self._state[self._index(xy)] & OPEN)
+
+    def is_closed(self, xy: Tuple[int, int]) -> bool:
+        return bool(self._state[self._index(xy)] & CLOSED)
+
+    def g_of(self, xy: Tuple[int, int]) -> Optional[float]:
+        # best g found so far, None for a cell the search has not reached
+        i = self._index(xy)
+        return self._g[i] if self._state[i] & SEEN else None
+
+    def parent_of(self, xy: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        i = self._index(xy)
+        if not self._state[i] & SEEN or self._parent[i] < 0:
+            return None
+        return self._xy(self._parent[i])
+
+    def open_cells(self) -> Dict[Tuple[int, int], Tuple[float, float, float]]:
+        # live OPEN as {xy: (g, h, f)}
+        g, h, f = self._g, self._h, self._f
+        return {self._xy(i): (g[i], h[i], f[i]) for _, _, i in self._live_entries()}
+
+    def closed_cells(self) -> Set[Tuple[int, int]]:
+        return {self._xy(i) for i in self._closed_list}
+
+    def _track_open(self, i: int):
+        # remember whether cell i was in OPEN at the last snapshot, before its first change
+        if self.delta and i not in self._open_before:
+            self._open_before[i] = bool(self._state[i] & OPEN)
+
+    def _push_open(self, i: int, g: float, h: float, f: float, parent: int, key: Any = None):
+        # inserts cell i, or replaces its live entry (decrease-key); the heap key defaults to f
+        state = self._state
+        self._track_open(i)
+        st = state[i]
+        if st & (OPEN | CLOSED):
+            self.reopened += 1
+        else:
+            self.generated += 1
+        if not st & OPEN:
+            self.open_count += 1
+            if self.open_count > self.peak_open:
+                self.peak_open = self.open_count
+        state[i] = st | OPEN | SEEN
+        self._g[i] = g
+        self._h[i] = h
+        self._f[i] = f
+        self._parent[i] = parent
+        self._seq += 1
+        self._seq_of[i] = self._seq
+        self.heap_pushes += 1
+        heapq.heappush(self.open, (f if key is None else key, self._seq, i))
+        if len(self.open) > 2 * self.open_count + 1024:
+            self._compact_open()
+
+    def _remove_open(self, i: int):
+        # take cell i out of OPEN without expanding it; its heap entry goes stale
+        if self._state[i] & OPEN:
+            self._track_open(i)
+            self._state[i] &= ~OPEN & 0xFF
+            self.open_count -= 1
+
+    def _pop_open(self) -> int:
+        # index of the live cell with the smallest key, taken out of OPEN; -1 when OPEN is empty
+        state, seq_of, heap = self._state, self._seq_of, self.open
+        while heap:
+            _, seq, i = heapq.heappop(heap)
+            self.heap_pops += 1
+            if state[i] & OPEN and seq_of[i] == seq:
+                self._track_open(i)
+                state[i] &= ~OPEN & 0xFF
+                self.open_count -= 1
+                return i
+        return -1
+
+    def _peek_open(self) -> int:
+        # live cell with the smallest key (-1 if none), dropping stale entries from the top
+        state, seq_of, heap = self._state, self._seq_of, self.open
+        while heap:
+            _, seq, i = heap[0]
+            if state[i] & OPEN and seq_of[i] == seq:
+                return i
+            heapq.heappop(heap)
+            self.heap_pops += 1
+        return -1
+
+    def _live_entries(self) -> List[Tuple[Any, int, int]]:
+        state, seq_of = self._state, self._seq_of
+        return [e for e in self.open if state[e[2]] & OPEN and seq_of[e[2]] == e[1]]
+
+    def _compact_open(self):
+        # drop stale entries; live entries keep their seq so tie order is unchanged
+        self.open = self._live_entries()
+        heapq.heapify(self.open)
+
+    def _reheap(self):
+        # re-key every live entry after f was changed in place
+        f = self._f
+        self.open = [(f[i], seq, i) for _, seq, i in self._live_entries()]
+        heapq.heapify(self.open)
+
+    def _close(self, i: int):
+        st = self._state[i]
+        if not st & CLOSED:
+            self._state[i] = st | CLOSED
+            self._closed_list.append(i)
+            if self.delta:
+                self._closed_added.append(self._xy(i))
 
     def reconstruct(self, xy: Tuple[int, int]) -> List[Tuple[int, int]]:
         path: List[Tuple[int, int]] = []
-        cur: Optional[Tuple[int, int]] = xy
-        visited: Set[Tuple[int, int]] = set()
-        while cur is not None and cur not in visited:
-            visited.add(cur)
-            path.append(cur)
-            cur = self.parent_map.get(cur)
+        state, parent = self._state, self._parent
+        i = self._index(xy)
+        visited: Set[int] = set()
+        while i >= 0 and i not in visited:
+            visited.add(i)
+            path.append(self._xy(i))
+            i = parent[i] if state[i] & SEEN else -1
         path.reverse()
         return path
 
+    def _expand(self) -> Optional[Tuple[int, Optional[List[int]]]]:
+        # pop and expand one cell: None when OPEN is empty, (goal index, None) on success,
+        # else (cell index, neighbor indices)
+        raise NotImplementedError
+
+    def _cost_of(self, i: int) -> float:
+        # path cost when _expand reports cell i as the goal
+        return self._g[i]
+
+    def time_heuristics(self):
+        # route heuristic calls through a timer so stats can split heuristic time out of expansion;
+        # costs two clock reads per call, so headless solves leave it off
+        hf = getattr(self, "hf", None)
+        if hf is None or hasattr(hf, "__wrapped__"):
+            return
+        clock = time.perf_counter
+
+        def timed(dx: int, dy: int) -> float:
+            t = clock()
+            h = hf(dx, dy)
+            self.heuristic_time += clock() - t
+            return h
+
+        timed.__wrapped__ = hf
+        self.hf = timed
+
+    def stats(self) -> Dict[str, Any]:
+        # counters and time split so far; expansion time excludes the timed heuristic calls
+        return {
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "reopened": self.reopened,
+            "heap_ops": self.heap_pushes + self.heap_pops,
+            "peak_open": self.peak_open,
+            "expand_ms": round((self.expand_time - self.heuristic_time) * 1000, 3),
+            "heuristic_ms": round(self.heuristic_time * 1000, 3),
+            "snapshot_ms": round(self.snapshot_time * 1000, 3),
+        }
+
+    def step(self) -> Dict[str, Any]:
+        if self.unreachable():
+            return {"finished": True, "path": [], "stats": {**self.stats(), "unreachable": True}}
+        t0 = time.perf_counter()
+        res = self._expand()
+        self.expand_time += time.perf_counter() - t0
+        if res is None:
+            return {"finished": True, "path": [], "stats": self.stats()}
+        i, neighbors = res
+        xy = self._xy(i)
+        if neighbors is None:
+            snap = self.snapshot(xy, [], finished=True)
+            snap["path"] = self.reconstruct(xy)
+            snap["stats"]["cost"] = self._cost_of(i)
+            return snap
+        return self.snapshot(xy, [self._xy(j) for j in neighbors])
+
+    def solve(self, max_expansions: Optional[int] = None) -> Dict[str, Any]:
+        # headless run: no snapshots, only the outcome and timing
+        if self.unreachable():
+            return {"found": False, "path": [], "cost": None, **self.stats(), "elapsed_ms": 0.0, "unreachable": True}
+        delta, self.delta = self.delta, False
+        expand = self._expand
+        goal = -1
+        t0 = time.perf_counter()
+        try:
+            while max_expansions is None or self.expanded < max_expansions:
+                res = expand()
+                if res is None:
+                    break
+                if res[1] is None:
+                    goal = res[0]
+                    break
+        finally:
+            self.delta = delta
+        elapsed = time.perf_counter() - t0
+        self.expand_time += elapsed
+        return {
+            "found": goal >= 0,
+            "path": self.reconstruct(self._xy(goal)) if goal >= 0 else [],
+            "cost": self._cost_of(goal) if goal >= 0 else None,
+            **self.stats(),
+            "elapsed_ms": round(elapsed * 1000, 3),
+        }
+
+    def _entry(self, i: int) -> Tuple[Tuple[int, int], float, float, float]:
+        return self._xy(i), self._g[i], self._h[i], self._f[i]
+
+    def take_delta(self) -> Dict[str, Any]:
+        added, updated, removed = [], [], []
+        state = self._state
+        for i, before in self._open_before.items():
+            if not state[i] & OPEN:
+                if before:
+                    removed.append(self._xy(i))
+            elif before:
+                updated.append(self._entry(i))
+            else:
+                added.append(self._entry(i))
+        delta = {
+            "open_add": added,
+            "open_update": updated,
+            "open_remove": removed,
+            "closed_add": self._closed_added,
+        }
+        self._open_before = {}
+        self._closed_added = []
+        return delta
+
+    def resync(self, current: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        # full, untruncated OPEN/CLOSED; restarts delta tracking from this state
+        self._open_before = {}
+        self._closed_added = []
+        return {
+            "current": current,
+            "neighbors": [],
+            "open": [self._entry(i) for _, _, i in self._live_entries()],
+            "closed": [self._xy(i) for i in self._closed_list],
+            "resync": True,
+            "stats": self.stats(),
+        }
+
     def snapshot(self, current: Tuple[int, int], neighbors: List[Tuple[int, int]], finished: bool = False) -> Dict[str, Any]:
-        open_list = [((n.x, n.y), n.g, n.h, n.f) for n in self.open]
-        closed_list = list(self.closed)
+        t0 = time.perf_counter()
         payload: Dict[str, Any] = {
             "current": current,
             "neighbors": neighbors,
-            "open": open_list[:500],
-            "closed": closed_list[:500],
-            "stats": {"expanded": self.expanded},
+            "stats": self.stats(),
         }
+        if self.delta:
+            payload["delta"] = self.take_delta()
+        else:
+            state, seq_of = self._state, self._seq_of
+            open_list = []
+            for _, seq, i in self.open:
+                if state[i] & OPEN and seq_of[i] == seq:
+                    open_list.append(self._entry(i))
+                    if len(open_list) == 500:
+                        break
+            payload["open"] = open_list
+            payload["closed"] = [self._xy(i) for i in self._closed_list[:500]]
         if finished:
             payload["finished"] = True
+        self.snapshot_time += time.perf_counter() - t0
         return payload
+
+
+def merge_deltas(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    # compose two consecutive deltas into one covering both intervals
+    state: Dict[Tuple[int, int], Tuple[str, Any]] = {}
+    for d in (a, b):
+        for e in d["open_add"]:
+            prev = state.get(e[0])
+            state[e[0]] = ("update", e) if prev and prev[0] == "remove" else ("add", e)
+        for e in d["open_update"]:
+            prev = state.get(e[0])
+            state[e[0]] = ("add", e) if prev and prev[0] == "add" else ("update", e)
+        for xy in d["open_remove"]:
+            prev = state.get(xy)
+            if prev and prev[0] == "add":
+                del state[xy]
+            else:
+                state[xy] = ("remove", xy)
+    merged: Dict[str, Any] = {"open_add": [], "open_update": [], "open_remove": []}
+    for kind, e in state.values():
+        merged["open_" + kind].append(e)
+    merged["closed_add"] = a["closed_add"] + b["closed_add"]
+    return merged
+
+
+def apply_delta(full: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    # a resync followed by a delta: the resync's full OPEN/CLOSED with the delta applied
+    open_cells = {e[0]: e for e in full["open"]}
+    for xy in delta["open_remove"]:
+        open_cells.pop(xy, None)
+    for e in delta["open_add"] + delta["open_update"]:
+        open_cells[e[0]] = e
+    return {"open": list(open_cells.values()), "closed": full["closed"] + delta["closed_add"]}
+
+
+def merge_snapshots(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    # full snapshots already describe the latest state; deltas have to be composed
+    if a.get("resync") and "delta" in b:
+        # stays a resync: keeps what only the resync carries (e.g. an anytime planner's path)
+        merged = {**a, **b, **apply_delta(a, b["delta"])}
+        del merged["delta"]
+        if "backward" in a:
+            merged["backward"] = merge_snapshots(a["backward"], b["backward"]) if "backward" in b else a["backward"]
+        return merged
+    if "delta" not in a or b.get("resync"):
+        return b
+    merged = dict(b)
+    merged["delta"] = merge_deltas(a["delta"], b["delta"]) if "delta" in b else a["delta"]
+    if "backward" in a:
+        merged["backward"] = merge_snapshots(a["backward"], b["backward"]) if "backward" in b else a["backward"]
+    return merged
@@ -0,0 +1,139 @@
+from typing import Tuple, List, Optional, Dict, Any
+from .base import SearchBase, OPEN, CLOSED, SEEN
+from .astar import Heuristic
+
+INF = float("inf")
+
+
+class BidirectionalAStar(SearchBase):
+    # Forward search from the start (this object's OPEN/CLOSED) and backward search from the
+    # goal (self.back) with average potentials (Ikeda et al.): p(v) = (h(v, goal) - h(start, v)) / 2
+    # keys the forward side as g + p and the backward side as g - p, which keeps both consistent.
+    # Every expansion goes to the side with the smaller OPEN. mu is the best start-goal cost seen
+    # where the frontiers touch, and the search stops once kF_min + kB_min >= mu (or either OPEN
+    # is empty). The h shown in snapshots is the side's potential.
+    def __init__(self, grid, heuristic=Heuristic.octile):
+        super().__init__(grid)
+        self.hf = heuristic
+        self.back = SearchBase(grid, root=grid.goal)
+        sx, sy = grid.start
+        gx, gy = grid.goal
+        s = self._index(grid.start)
+        self._h[s] = self._f[s] = self._potential(sx, sy)
+        self._reheap()
+        t = self._index(grid.goal)
+        self.back._h[t] = self.back._f[t] = -self._potential(gx, gy)
+        self.back._reheap()
+        # each side's g array keeps the best g seen per cell after the cell is closed
+        self.mu = 0.0 if s == t else INF
+        self.meet = s if self.mu == 0.0 else -1
+
+    def _potential(self, x: int, y: int) -> float:
+        sx, sy = self.grid.start
+        gx, gy = self.grid.goal
+        return (self.hf(gx - x, gy - y) - self.hf(x - sx, y - sy)) / 2
+
+    def _predecessors(self, x: int, y: int) -> List[Tuple[int, int, float]]:
+        # moves into (x, y): only a free cell can be entered; the start may itself be blocked
+        grid = self.grid
+        if not grid.is_free(x, y):
+            return []
+        preds = grid.neighbors_cost(x, y)
+        sx, sy = grid.start
+        if not grid.is_free(sx, sy) and max(abs(sx - x), abs(sy - y)) == 1 and (grid.diagonal or sx == x or sy == y):
+            preds.append((sx, sy, grid.move_cost((sx, sy), (x, y))))
+        return preds
+
+    def _done(self) -> bool:
+        fwd = self._peek_open()
+        bwd = self.back._peek_open()
+        if fwd < 0 or bwd < 0:
+            return True
+        return self._f[fwd] + self.back._f[bwd] >= self.mu
+
+    def _cost_of(self, i: int) -> float:
+        return self.mu
+
+    def _expand(self) -> Optional[Tuple[int, Optional[List[int]]]]:
+        back = self.back
+        back.delta = self.delta
+        if self._done():
+            if self.meet < 0:
+                return None
+            return self.meet, None
+        forward = self.open_count <= back.open_count
+        side, other = (self, back) if forward else (back, self)
+        i = side._pop_open()
+        side._close(i)
+        self.expanded += 1
+        back.expanded += not forward
+        sign = 1.0 if forward else -1.0
+        neighbors: List[int] = []
+        g_side, side_state = side._g, side._state
+        g_other, other_state = other._g, other._state
+        cur_g = g_side[i]
+        x, y = self._xy(i)
+        size = self._size
+        # no path through cur can beat mu, or the other side already relaxed everything past it
+        tx, ty = self.grid.goal if forward else self.grid.start
+        if cur_g + self.hf(tx - x, ty - y) >= self.mu or other_state[i] & CLOSED:
+            return i, neighbors
+        moves = self.grid.neighbors_cost(x, y) if forward else self._predecessors(x, y)
+        for nx, ny, cost in moves:
+            j = ny * size + nx
+            st = side_state[j]
+            if st & CLOSED:
+                continue
+            tentative_g = cur_g + cost
+            if not st & SEEN or tentative_g < g_side[j]:
+                h = sign * self._potential(nx, ny)
+                side._push_open(j, tentative_g, h, tentative_g + h, i)
+                total = tentative_g + g_other[j] if other_state[j] & SEEN else INF
+                if total < self.mu:
+                    self.mu = total
+                    self.meet = j
+            neighbors.append(j)
+        return i, neighbors
+
+    def reconstruct(self, xy: Tuple[int, int]) -> List[Tuple[int, int]]:
+        # forward half up to the meeting cell, then the backward parents down to the goal
+        path = super().reconstruct(xy)
+        cur = self.back.parent_of(xy)
+        while cur is not None:
+            path.append(cur)
+            cur = self.back.parent_of(cur)
+        return path
+
+    def _backward_payload(self, snap: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: snap[k] for k in ("open", "closed", "delta") if k in snap}
+
+    def stats(self) -> Dict[str, Any]:
+        # both frontiers together; expanded already counts both sides
+        res = super().stats()
+        back = self.back
+        res["generated"] += back.generated
+        res["reopened"] += back.reopened
+        res["heap_ops"] += back.heap_pushes + back.heap_pops
+        res["peak_open"] += back.peak_open
+        res["snapshot_ms"] = round((self.snapshot_time + back.snapshot_time) * 1000, 3)
+        return res
+
+    def state_bytes(self) -> int:
+        return super().state_bytes() + self.back.state_bytes()
+
+    def snapshot(self, current, neighbors, finished: bool = False) -> Dict[str, Any]:
+        self.back.delta = self.delta
+        payload = super().snapshot(current, neighbors, finished)
+        payload["backward"] = self._backward_payload(self.back.snapshot(current, []))
+        payload["stats"]["expanded_backward"] = self.back.expanded
+        return payload
+
+    def resync(self, current: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        payload = super().resync(current)
+        payload["backward"] = self._backward_payload(self.back.resync(current))
+        return payload
+
+    def solve(self, max_expansions: Optional[int] = None) -> Dict[str, Any]:
+        res = super().solve(max_expansions)
+        res["expanded_backward"] = self.back.expanded
+        return res
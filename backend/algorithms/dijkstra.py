@@ -1,8 +1,66 @@
-from typing import Dict, Any
+from typing import Iterator, Tuple
+
+import numpy as np
+
 from .astar import AStar, Heuristic
+from .grid import SQRT2, DIRS4, DIRS8
 
 
 class Dijkstra(AStar):
     def __init__(self, grid):
         super().__init__(grid, heuristic=Heuristic.zero, weight=0.0)
 
+
+def wavefront(grid, goal: Tuple[int, int], small: int = 32) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    # reverse Dijkstra from goal as a vectorized label-correcting wavefront: every round relaxes all
+    # moves out of the cells improved in the previous round at once. Yields (relaxed, improved, dist)
+    # per round, dist being the flat distance array so far; it is final once the generator ends.
+    # Moves are symmetric between free cells, so distances *from* goal are distances *to* it.
+    # Fronts narrower than small cells (maze corridors) are relaxed cell by cell instead, where the
+    # fixed cost of a dozen array operations per round would dominate.
+    size = grid.size
+    dist = np.full(size * size, np.inf)
+    if not grid.is_free(*goal):
+        return
+    mask = grid.mask.reshape(-1)
+    moves = [(np.uint8(1 << k), dy * size + dx, SQRT2 if dx and dy else 1.0)
+             for k, (dx, dy) in enumerate(DIRS8 if grid.diagonal else DIRS4)]
+    dv, mv, offsets = memoryview(dist), grid._mask, grid._offsets_by_mask
+    frontier = np.array([goal[1] * size + goal[0]], dtype=np.int64)
+    dist[frontier] = 0.0
+    while len(frontier):
+        if len(frontier) < small:
+            improved = set()
+            for u in frontier.tolist():
+                du = dv[u]
+                for off, c in offsets[mv[u]]:
+                    j = u + off
+                    if du + c < dv[j]:
+                        dv[j] = du + c
+                        improved.add(j)
+            nxt = np.array(sorted(improved), dtype=np.int64)
+        else:
+            m = mask[frontier]
+            d = dist[frontier]
+            targets, costs = [], []
+            for bit, off, c in moves:
+                sel = (m & bit) != 0
+                targets.append(frontier[sel] + off)
+                costs.append(d[sel] + c)
+            v = np.concatenate(targets)
+            nd = np.concatenate(costs)
+            better = nd < dist[v]
+            v, nd = v[better], nd[better]
+            np.minimum.at(dist, v, nd)
+            nxt = np.unique(v)
+        relaxed, frontier = frontier, nxt
+        yield relaxed, frontier, dist
+
+
+def distance_field(grid, source: Tuple[int, int]) -> np.ndarray:
+    # exact shortest distances from source to every cell as a (size, size) array, inf where
+    # unreachable: the wavefront run to the end. Flow fields and landmark tables use the same rounds.
+    dist = np.full(grid.size * grid.size, np.inf)
+    for _, _, dist in wavefront(grid, source):
+        pass
+    return dist.reshape(grid.size, grid.size)
@@ -0,0 +1,184 @@
+from typing import Tuple, List, Optional, Dict, Iterable, Any
+from .base import SearchBase
+from .astar import Heuristic
+from .grid import DIRS4, DIRS8, SQRT2
+
+INF = float("inf")
+
+
+class DStarLite(SearchBase):
+    # D* Lite (Koenig & Likhachev 2002) searching backwards from the goal, so g(s) is the cost
+    # from s to the goal and the start is the query. Moving into a blocked cell costs infinity.
+    # update_obstacles() edits the grid in place and only re-opens vertices whose edges changed;
+    # the next steps repair the search from there. OPEN is the inconsistent-vertex queue U,
+    # CLOSED is every vertex that has been expanded at least once.
+    def __init__(self, grid, heuristic=Heuristic.octile):
+        super().__init__(grid)
+        self.hf = heuristic
+        # U is keyed by (k1, k2) instead of f, so it replaces the start entry the base class pushed
+        self._remove_open(self._index(grid.start))
+        self.open = []
+        self.g: Dict[Tuple[int, int], float] = {}
+        self.rhs: Dict[Tuple[int, int], float] = {grid.goal: 0.0}
+        self._dirs = DIRS8 if grid.diagonal else DIRS4
+        self.replans = 0
+        self.replan_expanded = 0
+        self.replan_updated = 0
+        self._update_vertex(grid.goal)
+
+    def _heuristic(self, xy: Tuple[int, int]) -> float:
+        sx, sy = self.grid.start
+        return self.hf(xy[0] - sx, xy[1] - sy)
+
+    def _key(self, xy: Tuple[int, int]) -> Tuple[float, float]:
+        # k1 is rounded so that sums reached along different paths tie exactly; k2 then orders them
+        m = min(self.g.get(xy, INF), self.rhs.get(xy, INF))
+        return round(m + self._heuristic(xy), 9), m
+
+    @staticmethod
+    def _key_lt(a: Tuple[float, float], b: Tuple[float, float]) -> bool:
+        # also tolerates k1 values that rounded to neighbouring steps
+        if abs(a[0] - b[0]) <= 1e-9 * max(1.0, abs(b[0])):
+            return a[1] < b[1]
+        return a[0] < b[0]
+
+    def _update_vertex(self, xy: Tuple[int, int]):
+        g = self.g.get(xy, INF)
+        rhs = self.rhs.get(xy, INF)
+        if g != rhs:
+            key = self._key(xy)
+            self._push_open(self._index(xy), min(g, rhs), self._heuristic(xy), key[0], -1, key)
+        else:
+            self._remove_open(self._index(xy))
+
+    def _top(self) -> Optional[Tuple[Tuple[float, float], int, int]]:
+        return self.open[0] if self._peek_open() >= 0 else None
+
+    def _cost(self, u: Tuple[int, int], v: Tuple[int, int]) -> float:
+        if not self.grid.is_free(*v):
+            return INF
+        return SQRT2 if u[0] != v[0] and u[1] != v[1] else 1.0
+
+    def _adjacent(self, xy: Tuple[int, int]) -> List[Tuple[int, int]]:
+        # every in-bounds cell one move away; predecessors of xy when xy is free
+        x, y = xy
+        n = self.grid.size
+        return [(x - dx, y - dy) for dx, dy in self._dirs if 0 <= x - dx < n and 0 <= y - dy < n]
+
+    def _best_rhs(self, xy: Tuple[int, int]) -> float:
+        g = self.g
+        return min((c + g.get((nx, ny), INF) for nx, ny, c in self.grid.neighbors_cost(*xy)), default=INF)
+
+    def _cost_of(self, i: int) -> float:
+        return self.rhs.get(self.grid.start, INF)
+
+    def _expand(self) -> Optional[Tuple[int, Optional[List[int]]]]:
+        start = self.grid.start
+        top = self._top()
+        rhs_start = self.rhs.get(start, INF)
+        if top is None or (not self._key_lt(top[0], self._key(start)) and rhs_start <= self.g.get(start, INF)):
+            # the start may be left overconsistent; rhs(start) is then its exact cost
+            if rhs_start == INF:
+                return None
+            return self._index(start), None
+        k_old, _, i = top
+        u = self._xy(i)
+        k_new = self._key(u)
+        if k_old < k_new:
+            self._update_vertex(u)
+            return i, []
+        self._pop_open()
+        self._close(i)
+        self.expanded += 1
+        self.replan_expanded += 1
+        g_u = self.g.get(u, INF)
+        rhs_u = self.rhs.get(u, INF)
+        goal = self.grid.goal
+        touched: List[Tuple[int, int]] = []
+        if not self.grid.is_free(*u):
+            # nothing can move into a blocked cell, so it has no predecessors to relax
+            self.g[u] = rhs_u
+            self._update_vertex(u)
+            return i, []
+        if g_u > rhs_u:
+            self.g[u] = rhs_u
+            for s in self._adjacent(u):
+                if s == goal:
+                    continue
+                c = rhs_u + self._cost(s, u)
+                if c < self.rhs.get(s, INF):
+                    self.rhs[s] = c
+                    self._update_vertex(s)
+                    touched.append(s)
+        else:
+            self.g[u] = INF
+            for s in self._adjacent(u) + [u]:
+                if s == u or self.rhs.get(s, INF) == g_u + self._cost(s, u):
+                    if s != goal:
+                        self.rhs[s] = self._best_rhs(s)
+                    self._update_vertex(s)
+                    if s != u:
+                        touched.append(s)
+        return i, [self._index(s) for s in touched]
+
+    def update_obstacles(self, add: Iterable[Tuple[int, int]] = (), remove: Iterable[Tuple[int, int]] = ()) -> List[Tuple[int, int]]:
+        # edit the grid and re-open the vertices whose outgoing edges changed cost
+        changed = self.grid.set_obstacles([tuple(c) for c in add], True)
+        changed += self.grid.set_obstacles([tuple(c) for c in remove], False)
+        goal = self.grid.goal
+        updated = set()
+        for v in changed:
+            g_v = self.g.get(v, INF)
+            now_free = self.grid.is_free(*v)
+            for u in self._adjacent(v):
+                if u == goal:
+                    continue
+                move = SQRT2 if u[0] != v[0] and u[1] != v[1] else 1.0
+                if now_free:
+                    c = move + g_v
+                    if c < self.rhs.get(u, INF):
+                        self.rhs[u] = c
+                elif self.rhs.get(u, INF) == move + g_v:
+                    self.rhs[u] = self._best_rhs(u)
+                self._update_vertex(u)
+                updated.add(u)
+        if changed:
+            self._reachable = None
+            self.replans += 1
+            self.replan_expanded = 0
+            self.replan_updated = len(updated)
+        return changed
+
+    def reconstruct(self, xy: Tuple[int, int]) -> List[Tuple[int, int]]:
+        # follow the cheapest successor from the start until the goal
+        goal = self.grid.goal
+        g = self.g
+        path = [xy]
+        seen = {xy}
+        cur = xy
+        while cur != goal:
+            best = min(self.grid.neighbors_cost(*cur), key=lambda t: t[2] + g.get((t[0], t[1]), INF), default=None)
+            if best is None or (best[0], best[1]) in seen or g.get((best[0], best[1]), INF) == INF:
+                return []
+            cur = (best[0], best[1])
+            seen.add(cur)
+            path.append(cur)
+        return path
+
+    def replan_stats(self) -> Dict[str, Any]:
+        return {"replans": self.replans, "replan_expanded": self.replan_expanded, "replan_updated": self.replan_updated}
+
+    def snapshot(self, current, neighbors, finished: bool = False) -> Dict[str, Any]:
+        payload = super().snapshot(current, neighbors, finished)
+        payload["stats"].update(self.replan_stats())
+        return payload
+
+    def step(self) -> Dict[str, Any]:
+        res = super().step()
+        res["stats"].update(self.replan_stats())
+        return res
+
+    def solve(self, max_expansions: Optional[int] = None) -> Dict[str, Any]:
+        res = super().solve(max_expansions)
+        res.update(self.replan_stats())
+        return res
@@ -0,0 +1,176 @@
+from typing import Tuple, List, Dict, Any, Optional, Iterator
+import time
+
+import numpy as np
+
+from .base import SearchBase
+from .dijkstra import wavefront
+from .grid import Grid, SQRT2, DIRS4, DIRS8
+
+XY = Tuple[int, int]
+
+
+def direction_field(grid: Grid, dist: np.ndarray) -> np.ndarray:
+    # per cell, the index into DIRS8/DIRS4 of the move minimizing cost + dist of the next cell
+    # (lowest index on ties), -1 where no move leads closer: the goal and unreachable cells. Blocked
+    # cells next to reachable ones get a direction too, so an agent standing on one can step off.
+    size = grid.size
+    best = np.full((size, size), np.inf)
+    dirs = np.full((size, size), -1, dtype=np.int8)
+    for k, (dx, dy) in enumerate(DIRS8 if grid.diagonal else DIRS4):
+        # cell (y, x) moving to (y + dy, x + dx)
+        sy = slice(max(0, -dy), size - max(0, dy))
+        sx = slice(max(0, -dx), size - max(0, dx))
+        ty = slice(max(0, dy), size + min(0, dy))
+        tx = slice(max(0, dx), size + min(0, dx))
+        cand = np.where((grid.mask[sy, sx] >> k) & 1 == 1, dist[ty, tx] + (SQRT2 if dx and dy else 1.0), np.inf)
+        better = cand < best[sy, sx]
+        best[sy, sx] = np.where(better, cand, best[sy, sx])
+        dirs[sy, sx] = np.where(better, np.int8(k), dirs[sy, sx])
+    dirs[(dist == 0.0) | np.isinf(best)] = -1
+    return dirs
+
+
+class FlowField:
+    """Integration field (exact distance to ``goal``, inf where unreachable) and direction field of one map.
+
+    Built once by a vectorized wavefront; afterwards ``path(start)`` follows the directions, O(path
+    length) per agent. Both arrays are read-only, so one field can serve any number of threads.
+    """
+
+    def __init__(self, grid: Grid, goal: XY, dist: Optional[np.ndarray] = None, rounds: int = 0, relaxed: int = 0):
+        self.goal = tuple(goal)
+        self.size = grid.size
+        t0 = time.perf_counter()
+        if dist is None:
+            dist = np.full(grid.size * grid.size, np.inf)
+            for frontier, _, dist in wavefront(grid, self.goal):
+                rounds += 1
+                relaxed += len(frontier)
+        self.integration = dist.reshape(grid.size, grid.size)
+        self.directions = direction_field(grid, self.integration)
+        self.integration.flags.writeable = False
+        self.directions.flags.writeable = False
+        self.build_ms = (time.perf_counter() - t0) * 1000
+        # wavefront rounds and cell relaxations it took; reached counts cells with a finite distance
+        self.rounds = rounds
+        self.relaxed = relaxed
+        self.reached = int(np.count_nonzero(np.isfinite(self.integration)))
+        size = grid.size
+        dirs = DIRS8 if grid.diagonal else DIRS4
+        self._steps = [(dy * size + dx, SQRT2 if dx and dy else 1.0) for dx, dy in dirs]
+        self._dir = memoryview(self.directions).cast("b")
+
+    @property
+    def nbytes(self) -> int:
+        return self.integration.nbytes + self.directions.nbytes
+
+    def walk(self, start: XY) -> Tuple[List[XY], Optional[float]]:
+        # (path from start to goal, its cost), or ([], None) when start cannot reach the goal
+        x, y = start
+        size = self.size
+        if not (0 <= x < size and 0 <= y < size):
+            return [], None
+        i = y * size + x
+        goal = self.goal[1] * size + self.goal[0]
+        dirs, steps = self._dir, self._steps
+        path = [(x, y)]
+        cost = 0.0
+        while i != goal:
+            k = dirs[i]
+            if k < 0 or len(path) > size * size:
+                return [], None
+            off, c = steps[k]
+            i += off
+            cost += c
+            y, x = divmod(i, size)
+            path.append((x, y))
+        return path, cost
+
+    def path(self, start: XY) -> List[XY]:
+        return self.walk(start)[0]
+
+    def cost(self, start: XY) -> Optional[float]:
+        return self.walk(start)[1]
+
+
+class FlowFieldPlanner(SearchBase):
+    # many-to-one planning: one reverse wavefront from the goal yields a flow field that answers
+    # every start on the map. Stepping shows the wavefront a round at a time (OPEN is the cells
+    # improved in the last round, expanded counts cell relaxations); solve() builds it in one go.
+    # With a field cached for this map and goal, both finish at once. entry: the map's registry
+    # entry (backend.registry.MapEntry), which keeps the fields per goal; None builds uncached.
+    def __init__(self, grid, entry=None):
+        super().__init__(grid, root=grid.goal)
+        self.entry = entry
+        self.field = entry.cached_flow_field(grid.goal) if entry is not None else None
+        self.cache = "hit" if self.field is not None else "build"
+        self._waves: Optional[Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]] = None
+        self._dist: Optional[np.ndarray] = None
+        self._rounds = 0
+
+    def _finish(self) -> Optional[Tuple[int, Optional[List[int]]]]:
+        path, _ = self.field.walk(self.grid.start)
+        if not path:
+            return None
+        return self._index(self.grid.start), None
+
+    def _expand(self) -> Optional[Tuple[int, Optional[List[int]]]]:
+        if self.field is not None:
+            return self._finish()
+        if self._waves is None:
+            self._waves = wavefront(self.grid, self.grid.goal)
+        try:
+            relaxed, improved, dist = next(self._waves)
+        except StopIteration:
+            if self._dist is None:
+                self._dist = np.full(self._size * self._size, np.inf)
+            self.field = FlowField(self.grid, self.grid.goal, self._dist, self._rounds, self.expanded)
+            if self.entry is not None:
+                self.field = self.entry.store_flow_field(self.field)
+            return self._finish()
+        self._dist = dist
+        self._rounds += 1
+        for i in relaxed.tolist():
+            self._remove_open(i)
+            self._close(i)
+        self.expanded += len(relaxed)
+        for j, d in zip(improved.tolist(), dist[improved].tolist()):
+            self._push_open(j, d, 0.0, d, -1)
+        return int(relaxed[0]), improved.tolist()
+
+    def reconstruct(self, xy: Tuple[int, int]) -> List[Tuple[int, int]]:
+        return self.field.path(xy) if self.field is not None else []
+
+    def _cost_of(self, i: int) -> float:
+        return self.field.cost(self._xy(i))
+
+    def _field_stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"flow_field": self.cache}
+        if self.field is not None:
+            out.update(rounds=self.field.rounds, reached=self.field.reached, field_ms=round(self.field.build_ms, 3))
+        return out
+
+    def step(self) -> Dict[str, Any]:
+        snap = super().step()
+        if snap.get("finished"):
+            snap["stats"].update(self._field_stats())
+        return snap
+
+    def solve(self, max_expansions: Optional[int] = None) -> Dict[str, Any]:
+        # the wavefront is built whole, so max_expansions does not apply
+        if self.unreachable():
+            return {"found": False, "path": [], "cost": None, **self.stats(), "elapsed_ms": 0.0, "unreachable": True}
+        t0 = time.perf_counter()
+        if self.field is None:
+            if self.entry is not None:
+                self.field, self.cache = self.entry.flow_field(self.grid.goal)
+            else:
+                self.field = FlowField(self.grid, self.grid.goal)
+            if self.cache == "build":
+                self.expanded = self.field.relaxed
+        path, cost = self.field.walk(self.grid.start)
+        elapsed = time.perf_counter() - t0
+        self.expand_time += elapsed
+        return {"found": bool(path), "path": path, "cost": cost, **self.stats(),
+                "elapsed_ms": round(elapsed * 1000, 3), **self._field_stats()}
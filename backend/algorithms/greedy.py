@@ -1,6 +1,5 @@
-from typing import Dict, Any
-import heapq
-from .base import SearchBase, Node
+from typing import Tuple, List, Optional
+from .base import SearchBase, OPEN, CLOSED
 from .astar import Heuristic
 
 
@@ -10,30 +9,38 @@ class GreedyBestFirst(SearchBase):
         self.hf = heuristic
         sx, sy = grid.start
         gx, gy = grid.goal
-        start = self.open[0]
-        start.h = self.hf(gx - sx, gy - sy)
-        start.f = start.h
+        self._goal = gy * grid.size + gx
+        s = sy * grid.size + sx
+        self._h[s] = self._f[s] = self.hf(gx - sx, gy - sy)
+        self._reheap()
 
-    def step(self) -> Dict[str, Any]:
-        if not self.open:
-            return {"finished": True, "path": [], "stats": {"expanded": self.expanded}}
-        cur = heapq.heappop(self.open)
-        self.closed.add((cur.x, cur.y))
+    def _expand(self) -> Optional[Tuple[int, Optional[List[int]]]]:
+        i = self._pop_open()
+        if i < 0:
+            return None
+        self._close(i)
         self.expanded += 1
-        if (cur.x, cur.y) == self.grid.goal:
-            path = self.reconstruct((cur.x, cur.y))
-            snap = self.snapshot((cur.x, cur.y), [], finished=True)
-            snap["path"] = path
-            snap["stats"]["cost"] = cur.g
-            return snap
+        if i == self._goal:
+            return i, None
+        grid = self.grid
+        gx, gy = grid.goal
+        state, gs = self._state, self._g
+        cur_g = gs[i]
         neighbors = []
-        for nx, ny in self.grid.neighbors(cur.x, cur.y):
-            if (nx, ny) in self.closed:
+        for off, cost in grid._offsets_by_mask[grid._mask[i]]:
+            j = i + off
+            st = state[j]
+            if st & CLOSED:
                 continue
-            gx, gy = self.grid.goal
-            h = self.hf(gx - nx, gy - ny)
-            node = Node(f=h, x=nx, y=ny, g=cur.g + self.grid.move_cost((cur.x, cur.y), (nx, ny)), h=h, parent=(cur.x, cur.y))
-            heapq.heappush(self.open, node)
-            self.parent_map[(nx, ny)] = (cur.x, cur.y)
-            neighbors.append((nx, ny))
-        return self.snapshot((cur.x, cur.y), neighbors)
+            g = cur_g + cost
+            if not st & OPEN:
+                ny, nx = divmod(j, grid.size)
+                h = self.hf(gx - nx, gy - ny)
+                self._push_open(j, g, h, h, i)
+            elif g < gs[j]:
+                # priority is h alone, so a cheaper route only changes g and the parent
+                self._track_open(j)
+                gs[j] = g
+                self._parent[j] = i
+            neighbors.append(j)
+        return i, neighbors
@@ -1,35 +1,334 @@
-from typing import Set, Tuple, List
+from collections import deque
+from typing import Dict, Iterable, Set, Tuple, List, Optional
+import copy
+import hashlib
 import math
 
+import numpy as np
+
+SQRT2 = math.sqrt(2)
+
+# bit k of a cell's neighbor mask refers to DIRS8[k]; 4-neighborhood first keeps the historical order
+DIRS4 = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIRS8 = DIRS4 + ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+def _neighbor_masks(occ: np.ndarray, diagonal: bool) -> np.ndarray:
+    # bit k set when the move DIRS8[k] stays in bounds and lands on a free cell
+    free = occ == 0
+    h, w = occ.shape
+    mask = np.zeros((h, w), dtype=np.uint8)
+    for k, (dx, dy) in enumerate(DIRS8 if diagonal else DIRS4):
+        ys = slice(max(0, -dy), h - max(0, dy))
+        xs = slice(max(0, -dx), w - max(0, dx))
+        ts = slice(max(0, dy), h + min(0, dy))
+        tx = slice(max(0, dx), w + min(0, dx))
+        mask[ys, xs] |= free[ts, tx].astype(np.uint8) << k
+    return mask
+
+
+def occupancy(size: int, obstacles: Iterable[Tuple[int, int]]) -> np.ndarray:
+    # (size, size) uint8 array with the in-bounds obstacle cells set
+    occ = np.zeros((size, size), dtype=np.uint8)
+    pts = np.array(list(obstacles), dtype=np.int64).reshape(-1, 2)
+    if len(pts):
+        keep = (pts[:, 0] >= 0) & (pts[:, 0] < size) & (pts[:, 1] >= 0) & (pts[:, 1] < size)
+        pts = pts[keep]
+        occ[pts[:, 1], pts[:, 0]] = 1
+    return occ
+
+
+def occupancy_fingerprint(occ: np.ndarray, diagonal: bool) -> str:
+    # content hash of a map (size, connectivity, occupancy); same value as Grid.fingerprint()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{occ.shape[0]}:{int(diagonal)}:".encode())
+    h.update(np.ascontiguousarray(occ, dtype=np.uint8).data)
+    return h.hexdigest()
+
+
+def label_components(occ: np.ndarray, diagonal: bool) -> np.ndarray:
+    """Connected components of the free cells: each gets the smallest flat index in its component, -1 if blocked.
+
+    Horizontal runs are linked up front (every cell points at its run's first cell), then the
+    remaining vertical/diagonal edges are hooked larger root -> smaller root in vectorized rounds,
+    with pointer jumping over the run heads in between, until no edge joins two different roots.
+    """
+    h, w = occ.shape
+    n = h * w
+    free = occ == 0
+    idx = np.arange(n, dtype=np.int32 if n < (1 << 31) else np.int64).reshape(h, w)
+    starts = free.copy()
+    starts[:, 1:] &= ~free[:, :-1]
+    parent = np.maximum.accumulate(np.where(starts, idx, 0), axis=1).ravel()
+    us, vs = [], []
+    for dx, dy in (((0, 1), (1, 1), (-1, 1)) if diagonal else ((0, 1),)):
+        sy, sx = slice(0, h - dy), slice(max(0, -dx), w - max(0, dx))
+        ty, tx = slice(dy, h), slice(max(0, dx), w + min(0, dx))
+        ok = free[sy, sx] & free[ty, tx]
+        u = parent[idx[sy, sx][ok]]
+        v = parent[idx[ty, tx][ok]]
+        diff = u != v
+        us.append(u[diff])
+        vs.append(v[diff])
+    u = np.concatenate(us)
+    v = np.concatenate(vs)
+    heads = np.flatnonzero(starts)
+    while len(u):
+        parent[np.maximum(u, v)] = np.minimum(u, v)
+        while True:
+            p = parent[heads]
+            pp = parent[p]
+            if np.array_equal(pp, p):
+                break
+            parent[heads] = pp
+        u = parent[u]
+        v = parent[v]
+        diff = u != v
+        u = u[diff]
+        v = v[diff]
+    return np.where(free.ravel(), parent[parent], -1).reshape(h, w)
+
 
 class Grid:
-    def __init__(self, size: int, obstacles: Set[Tuple[int, int]], start: Tuple[int, int], goal: Tuple[int, int], diagonal: bool = True):
-        self.size = size
-        self.obstacles = obstacles
-        self.start = start
-        self.goal = goal
+    """Square grid backed by a uint8 occupancy array (``occ[y, x] == 1`` is an obstacle).
+
+    Cells also have a flat index ``y * size + x``; ``neighbor_offsets(i)`` returns the
+    precomputed ``(offset, cost)`` moves for that index.
+    """
+
+    def __init__(self, size: int, obstacles: Iterable[Tuple[int, int]], start: Tuple[int, int], goal: Tuple[int, int], diagonal: bool = True):
+        self._init(occupancy(size, obstacles), start, goal, diagonal)
+
+    @classmethod
+    def from_array(cls, occ: np.ndarray, start: Tuple[int, int], goal: Tuple[int, int], diagonal: bool = True) -> "Grid":
+        occ = np.ascontiguousarray(occ, dtype=np.uint8)
+        if occ.ndim != 2 or occ.shape[0] != occ.shape[1]:
+            raise ValueError("occupancy must be a square 2D array")
+        grid = cls.__new__(cls)
+        grid._init(occ, start, goal, diagonal)
+        return grid
+
+    def with_endpoints(self, start: Tuple[int, int], goal: Tuple[int, int]) -> "Grid":
+        # same map with other endpoints; occupancy, masks and move tables are shared, not copied
+        grid = copy.copy(self)
+        grid.start = tuple(start)
+        grid.goal = tuple(goal)
+        return grid
+
+    def copy(self) -> "Grid":
+        # private, editable copy; occupancy, masks and component labels are copied instead of rebuilt
+        grid = copy.copy(self)
+        grid.occ = self.occ.copy()
+        grid.mask = self.mask.copy()
+        grid._occ = memoryview(grid.occ).cast("B")
+        grid._mask = memoryview(grid.mask).cast("B")
+        grid._obstacles = None
+        grid._labels = None if self._labels is None else self._labels.copy()
+        return grid
+
+    def freeze(self) -> "Grid":
+        # make occupancy and masks read-only so the grid can be shared; set_obstacles then raises
+        self.occ.flags.writeable = False
+        self.mask.flags.writeable = False
+        self._occ = memoryview(self.occ).cast("B")
+        self._mask = memoryview(self.mask).cast("B")
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        return not self.occ.flags.writeable
+
+    def _init(self, occ: np.ndarray, start: Tuple[int, int], goal: Tuple[int, int], diagonal: bool):
+        self.size = occ.shape[0]
+        self.start = tuple(start)
+        self.goal = tuple(goal)
         self.diagonal = diagonal
+        self.occ = occ
+        self.mask = _neighbor_masks(occ, diagonal)
+        # memoryviews give fast scalar reads of the numpy buffers
+        self._occ = memoryview(occ).cast("B")
+        self._mask = memoryview(self.mask).cast("B")
+        self._obstacles: Optional[Set[Tuple[int, int]]] = None
+        self._fingerprint: Optional[str] = None
+        self._labels: Optional[np.ndarray] = None
+        size = self.size
+        dirs = DIRS8 if diagonal else DIRS4
+        self._dxy_by_mask: List[Tuple[Tuple[int, int], ...]] = []
+        self._cost_by_mask: List[Tuple[Tuple[int, int, float], ...]] = []
+        self._offsets_by_mask: List[Tuple[Tuple[int, float], ...]] = []
+        for m in range(256):
+            moves = [(dx, dy, SQRT2 if dx and dy else 1.0) for k, (dx, dy) in enumerate(dirs) if m >> k & 1]
+            self._dxy_by_mask.append(tuple((dx, dy) for dx, dy, _ in moves))
+            self._cost_by_mask.append(tuple(moves))
+            self._offsets_by_mask.append(tuple((dy * size + dx, c) for dx, dy, c in moves))
+
+    @property
+    def obstacles(self) -> Set[Tuple[int, int]]:
+        if self._obstacles is None:
+            ys, xs = np.nonzero(self.occ)
+            self._obstacles = set(zip(xs.tolist(), ys.tolist()))
+        return self._obstacles
+
+    def fingerprint(self) -> str:
+        # content hash of the map (size, connectivity, occupancy); start/goal are not part of it
+        if self._fingerprint is None:
+            self._fingerprint = occupancy_fingerprint(self.occ, self.diagonal)
+        return self._fingerprint
+
+    def components(self) -> np.ndarray:
+        # component label per cell, computed on first use (see label_components)
+        if self._labels is None:
+            self._labels = label_components(self.occ, self.diagonal)
+        return self._labels
+
+    def reachable(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        # whether some path leads from a to b; a blocked a may still step onto a free neighbour
+        if a == b:
+            return True
+        if not (self.in_bounds(*a) and self.is_free(*b)):
+            return False
+        labels = self.components()
+        target = labels[b[1], b[0]]
+        if self.is_free(*a):
+            return bool(labels[a[1], a[0]] == target)
+        return any(labels[ny, nx] == target for nx, ny in self.neighbors(*a))
+
+    def set_obstacles(self, cells: Iterable[Tuple[int, int]], blocked: bool = True) -> List[Tuple[int, int]]:
+        # toggles cells in place and patches the neighbor masks around them; returns the cells that changed
+        if self.frozen:
+            raise ValueError("grid is frozen; edit a copy()")
+        size = self.size
+        cells = list(cells)
+        # component labels are patched per cell; large edits just drop them for a lazy recompute
+        if len(cells) > 64:
+            self._labels = None
+        changed: List[Tuple[int, int]] = []
+        for x, y in cells:
+            if not self.in_bounds(x, y) or bool(self._occ[y * size + x]) == blocked:
+                continue
+            self._occ[y * size + x] = 1 if blocked else 0
+            changed.append((x, y))
+            for k, (dx, dy) in enumerate(DIRS8 if self.diagonal else DIRS4):
+                sx, sy = x - dx, y - dy
+                if self.in_bounds(sx, sy):
+                    i = sy * size + sx
+                    self._mask[i] = self._mask[i] & ~(1 << k) & 0xFF if blocked else self._mask[i] | (1 << k)
+            if self._labels is not None:
+                self._patch_labels(x, y, blocked)
+        if changed:
+            self._obstacles = None
+            self._fingerprint = None
+        return changed
+
+    def _patch_labels(self, x: int, y: int, blocked: bool):
+        # keep component labels valid after one cell changed. Labels stay "flat index of some cell
+        # in the component": a freed cell merges the components around it; a blocked cell can only
+        # split its component when its free neighbours are not connected inside the 3x3 around it;
+        # then small cut-off pockets are relabeled by local search, or else that component is
+        # relabeled within its bounding box.
+        labels = self._labels
+        size = self.size
+        dirs = DIRS8 if self.diagonal else DIRS4
+        around = [(x + dx, y + dy) for dx, dy in dirs if self.in_bounds(x + dx, y + dy) and labels[y + dy, x + dx] >= 0]
+        if not blocked:
+            found = {int(labels[ny, nx]) for nx, ny in around}
+            new = min(found) if found else y * size + x
+            labels[y, x] = new
+            others = list(found - {new})
+            if others:
+                labels[np.isin(labels, others)] = new
+            return
+        old = int(labels[y, x])
+        labels[y, x] = -1
+        if not around:
+            return
+        if old != y * size + x:
+            x0, y0 = max(0, x - 1), max(0, y - 1)
+            local = label_components(self.occ[y0:y + 2, x0:x + 2], self.diagonal)
+            seeds = {int(local[ny - y0, nx - x0]): (nx, ny) for nx, ny in around}
+            if len(seeds) == 1 or self._split_pockets(list(seeds.values()), old):
+                return
+        ys, xs = np.nonzero(labels == old)
+        y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+        region = labels[y0:y1, x0:x1]
+        inside = region == old
+        local = label_components((~inside).astype(np.uint8), self.diagonal)
+        ly, lx = np.divmod(local[inside], x1 - x0)
+        region[inside] = (ly + y0) * size + lx + x0
+
+    def _split_pockets(self, seeds: List[Tuple[int, int]], old: int, budget: int = 4096) -> bool:
+        # breadth-first searches from each seed, one cell per turn; searches that meet are merged,
+        # and one that runs dry is a pocket cut off from the rest and is relabeled on its own.
+        # Gives up (False) once budget cells are visited, or when a pocket holds the old label's cell.
+        labels = self._labels
+        size = self.size
+        occ, mask, offsets = self._occ, self._mask, self._offsets_by_mask
+        owner: Dict[int, int] = {}
+        groups: Dict[int, Tuple[deque, List[int]]] = {}
+        for g, (sx, sy) in enumerate(seeds):
+            i = sy * size + sx
+            owner[i] = g
+            groups[g] = (deque([i]), [i])
+        pockets: List[List[int]] = []
+        while len(groups) > 1:
+            if len(owner) > budget:
+                return False
+            for g in list(groups):
+                if g not in groups or len(groups) == 1:
+                    continue
+                queue, cells = groups[g]
+                if not queue:
+                    del groups[g]
+                    pockets.append(cells)
+                    continue
+                i = queue.popleft()
+                for off, _ in offsets[mask[i]]:
+                    j = i + off
+                    if occ[j]:
+                        continue
+                    h = owner.get(j)
+                    if h is None:
+                        owner[j] = g
+                        queue.append(j)
+                        cells.append(j)
+                        continue
+                    if h != g:
+                        # same piece after all: fold the other search into this one
+                        other_queue, other_cells = groups.pop(h)
+                        queue.extend(other_queue)
+                        cells.extend(other_cells)
+                        for k in other_cells:
+                            owner[k] = g
+        if any(old in cells for cells in pockets):
+            return False
+        flat = labels.reshape(-1)
+        for cells in pockets:
+            flat[cells] = min(cells)
+        return True
 
     def in_bounds(self, x: int, y: int) -> bool:
         return 0 <= x < self.size and 0 <= y < self.size
 
     def is_free(self, x: int, y: int) -> bool:
-        return (x, y) not in self.obstacles
+        return self.in_bounds(x, y) and not self._occ[y * self.size + x]
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.size + x
+
+    def coord(self, i: int) -> Tuple[int, int]:
+        y, x = divmod(i, self.size)
+        return x, y
 
     def neighbors(self, x: int, y: int) -> List[Tuple[int, int]]:
-        dirs4 = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        dirs8 = dirs4 + [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        dirs = dirs8 if self.diagonal else dirs4
-        res = []
-        for dx, dy in dirs:
-            nx, ny = x + dx, y + dy
-            if self.in_bounds(nx, ny) and self.is_free(nx, ny):
-                res.append((nx, ny))
-        return res
+        return [(x + dx, y + dy) for dx, dy in self._dxy_by_mask[self._mask[y * self.size + x]]]
+
+    def neighbors_cost(self, x: int, y: int) -> List[Tuple[int, int, float]]:
+        return [(x + dx, y + dy, c) for dx, dy, c in self._cost_by_mask[self._mask[y * self.size + x]]]
+
+    def neighbor_offsets(self, i: int) -> Tuple[Tuple[int, float], ...]:
+        return self._offsets_by_mask[self._mask[i]]
 
     def move_cost(self, from_xy: Tuple[int, int], to_xy: Tuple[int, int]) -> float:
         fx, fy = from_xy
         tx, ty = to_xy
-        diag = abs(tx - fx) == 1 and abs(ty - fy) == 1
-        return math.sqrt(2) if diag else 1.0
-
+        return SQRT2 if fx != tx and fy != ty else 1.0
@@ -0,0 +1,450 @@
+from collections import OrderedDict
+from typing import Tuple, List, Dict, Any, Optional, Iterable
+import heapq
+import threading
+import time
+
+import numpy as np
+
+from .base import SearchBase, OPEN, CLOSED
+from .astar import Heuristic
+from .grid import Grid, SQRT2, DIRS4, DIRS8
+
+XY = Tuple[int, int]
+Cluster = Tuple[int, int]
+
+# border keys pair a cluster with its right, lower, lower-right and upper-right neighbour
+_BORDER_DIRS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+def _local_search(grid: Grid, bounds: Tuple[int, int, int, int], src: XY, stop: Optional[XY] = None) -> Tuple[Dict[XY, float], Dict[XY, Optional[XY]]]:
+    # Dijkstra from src confined to bounds = (x0, y0, x1, y1), max exclusive; A* towards stop if given
+    x0, y0, x1, y1 = bounds
+    hf = Heuristic.octile
+    dist: Dict[XY, float] = {src: 0.0}
+    parent: Dict[XY, Optional[XY]] = {src: None}
+    done = set()
+    seq = 0
+    heap = [(hf(stop[0] - src[0], stop[1] - src[1]) if stop else 0.0, 0, src)]
+    while heap:
+        _, _, xy = heapq.heappop(heap)
+        if xy in done:
+            continue
+        done.add(xy)
+        if xy == stop:
+            break
+        d = dist[xy]
+        for nx, ny, c in grid.neighbors_cost(xy[0], xy[1]):
+            if not (x0 <= nx < x1 and y0 <= ny < y1):
+                continue
+            nd = d + c
+            if nd < dist.get((nx, ny), float("inf")):
+                dist[(nx, ny)] = nd
+                parent[(nx, ny)] = xy
+                seq += 1
+                h = hf(stop[0] - nx, stop[1] - ny) if stop else 0.0
+                heapq.heappush(heap, (nd + h, seq, (nx, ny)))
+    return dist, parent
+
+
+def _relax_blocks(dist: np.ndarray, free: np.ndarray, diagonal: bool):
+    # vectorized Bellman-Ford wavefront over a stack of independent blocks, in place. dist is
+    # (C, C, B, K) and free (C, C, B): cell axes first so every shifted slice is one long contiguous
+    # run over blocks and sources. Moves out of a blocked cell cost inf, so they never relay distances.
+    c = dist.shape[0]
+    step = np.where(free, 0.0, np.inf)[:, :, :, None]
+    moves = []
+    for dx, dy in (DIRS8 if diagonal else DIRS4):
+        # cell (y + dy, x + dx) reached from (y, x)
+        ty = slice(max(0, dy), c + min(0, dy))
+        tx = slice(max(0, dx), c + min(0, dx))
+        sy = slice(max(0, -dy), c - max(0, dy))
+        sx = slice(max(0, -dx), c - max(0, dx))
+        moves.append(((ty, tx), (sy, sx), step[sy, sx] + (SQRT2 if dx and dy else 1.0)))
+    before = np.empty_like(dist)
+    while True:
+        np.copyto(before, dist)
+        for t, src, cost in moves:
+            np.minimum(dist[t], dist[src] + cost, out=dist[t])
+        if np.array_equal(before, dist):
+            return
+
+
+class Abstraction:
+    # HPA* abstract graph of one map: clusters of cluster_size^2 cells, transition cells on
+    # cluster borders (inter edges) and exact in-cluster distances between them (intra edges)
+    def __init__(self, occ: np.ndarray, diagonal: bool, cluster_size: int = 16):
+        t0 = time.perf_counter()
+        self.cluster_size = cluster_size
+        self.diagonal = diagonal
+        self._set_occ(occ)
+        self.transitions: Dict[Tuple[Cluster, Cluster], List[Tuple[XY, XY, float]]] = {}
+        self.intra: Dict[Cluster, Dict[XY, Dict[XY, float]]] = {}
+        clusters = [(cx, cy) for cy in range(self.nclusters) for cx in range(self.nclusters)]
+        for c in clusters:
+            for d in _BORDER_DIRS:
+                other = (c[0] + d[0], c[1] + d[1])
+                if self._valid(other):
+                    self._build_border((c, other))
+        self._rebuild_inter()
+        self.adj: Dict[XY, Dict[XY, float]] = {}
+        self._build_intra(clusters)
+        self.edges = sum(len(r) for r in self.adj.values())
+        self.build_ms = (time.perf_counter() - t0) * 1000
+
+    def _set_occ(self, occ: np.ndarray):
+        self.grid = Grid.from_array(occ.copy(), (0, 0), (0, 0), self.diagonal)
+        self.size = self.grid.size
+        self.nclusters = -(-self.size // self.cluster_size)
+        self.fingerprint = self.grid.fingerprint()
+
+    def _valid(self, c: Cluster) -> bool:
+        return 0 <= c[0] < self.nclusters and 0 <= c[1] < self.nclusters
+
+    def cluster_of(self, x: int, y: int) -> Cluster:
+        return x // self.cluster_size, y // self.cluster_size
+
+    def bounds(self, c: Cluster) -> Tuple[int, int, int, int]:
+        cs = self.cluster_size
+        return c[0] * cs, c[1] * cs, min(self.size, c[0] * cs + cs), min(self.size, c[1] * cs + cs)
+
+    def _border_keys_of(self, c: Cluster) -> List[Tuple[Cluster, Cluster]]:
+        keys = []
+        for dx, dy in _BORDER_DIRS:
+            for a, b in ((c, (c[0] + dx, c[1] + dy)), ((c[0] - dx, c[1] - dy), c)):
+                if self._valid(a) and self._valid(b):
+                    keys.append((a, b))
+        return keys
+
+    def _build_border(self, key: Tuple[Cluster, Cluster]):
+        (cx, cy), (ox, oy) = key
+        cs, n = self.cluster_size, self.size
+        free = self.grid.is_free
+        res: List[Tuple[XY, XY, float]] = []
+        if oy == cy or ox == cx:
+            # pairs of facing cells along the shared edge: (c1 side, c2 side)
+            if ox != cx:
+                b = ox * cs
+                line = [((b - 1, t), (b, t)) for t in range(cy * cs, min(n, cy * cs + cs))]
+            else:
+                b = oy * cs
+                line = [((t, b - 1), (t, b)) for t in range(cx * cs, min(n, cx * cs + cs))]
+            orth = [free(*a) and free(*o) for a, o in line]
+            i = 0
+            while i < len(line):
+                if not orth[i]:
+                    i += 1
+                    continue
+                j = i
+                while j + 1 < len(line) and orth[j + 1]:
+                    j += 1
+                # one transition in the middle of a short entrance, one at each end of a long one
+                for k in ([(i + j) // 2] if j - i < 5 else [i, j]):
+                    res.append((line[k][0], line[k][1], 1.0))
+                i = j + 1
+            if self.diagonal:
+                # diagonal crossings only matter where no straight crossing is adjacent
+                for k in range(len(line) - 1):
+                    if orth[k] or orth[k + 1]:
+                        continue
+                    (a0, b0), (a1, b1) = line[k], line[k + 1]
+                    if free(*a0) and free(*b1):
+                        res.append((a0, b1, SQRT2))
+                    if free(*a1) and free(*b0):
+                        res.append((a1, b0, SQRT2))
+        elif self.diagonal:
+            # corner crossing between diagonal neighbours
+            if oy > cy:
+                a, o = (ox * cs - 1, oy * cs - 1), (ox * cs, oy * cs)
+            else:
+                a, o = (ox * cs - 1, cy * cs), (ox * cs, cy * cs - 1)
+            if free(*a) and free(*o):
+                res.append((a, o, SQRT2))
+        if res:
+            self.transitions[key] = res
+        else:
+            self.transitions.pop(key, None)
+
+    def _rebuild_inter(self):
+        self.inter: Dict[XY, Dict[XY, float]] = {}
+        self.nodes_of: Dict[Cluster, set] = {}
+        for trs in self.transitions.values():
+            for a, b, cost in trs:
+                for u, v in ((a, b), (b, a)):
+                    row = self.inter.setdefault(u, {})
+                    row[v] = min(cost, row.get(v, cost))
+                    self.nodes_of.setdefault(self.cluster_of(*u), set()).add(u)
+
+    def _build_intra(self, clusters: Iterable[Cluster], chunk: int = 256):
+        cs = self.cluster_size
+        # batching clusters with similar node counts keeps the padded source axis small
+        clusters = sorted(clusters, key=lambda c: len(self.nodes_of.get(c, ())))
+        for lo in range(0, len(clusters), chunk):
+            batch = clusters[lo:lo + chunk]
+            nodes = [sorted(self.nodes_of.get(c, ())) for c in batch]
+            k_max = max((len(ns) for ns in nodes), default=0)
+            if k_max == 0:
+                for c in batch:
+                    self.intra[c] = {}
+                continue
+            free = np.zeros((cs, cs, len(batch)), dtype=bool)
+            dist = np.full((cs, cs, len(batch), k_max), np.inf)
+            for bi, ((cx, cy), ns) in enumerate(zip(batch, nodes)):
+                block = self.grid.occ[cy * cs:cy * cs + cs, cx * cs:cx * cs + cs]
+                free[:block.shape[0], :block.shape[1], bi] = block == 0
+                for k, (x, y) in enumerate(ns):
+                    dist[y - cy * cs, x - cx * cs, bi, k] = 0.0
+            _relax_blocks(dist, free, self.diagonal)
+            for bi, ((cx, cy), ns) in enumerate(zip(batch, nodes)):
+                if not ns:
+                    self.intra[(cx, cy)] = {}
+                    continue
+                ly = np.array([y - cy * cs for _, y in ns])
+                lx = np.array([x - cx * cs for x, _ in ns])
+                # table[k, j]: distance from node k to node j
+                table = dist[ly, lx, bi, :len(ns)].T.tolist()
+                intra = {u: {v: d for v, d in zip(ns, row) if v != u and d != float("inf")}
+                         for u, row in zip(ns, table)}
+                self.intra[(cx, cy)] = intra
+                # merged adjacency used by the abstract search
+                for u, row in intra.items():
+                    merged = dict(row)
+                    for v, d in self.inter[u].items():
+                        if d < merged.get(v, float("inf")):
+                            merged[v] = d
+                    self.adj[u] = merged
+
+    def copy(self) -> "Abstraction":
+        other = Abstraction.__new__(Abstraction)
+        other.__dict__.update(self.__dict__)
+        other.transitions = dict(self.transitions)
+        other.intra = dict(self.intra)
+        other.adj = dict(self.adj)
+        return other
+
+    def update(self, occ: np.ndarray, changed: Iterable[XY]):
+        # rebuild only the borders and clusters touched by the changed cells
+        t0 = time.perf_counter()
+        self._set_occ(occ)
+        dirty = {self.cluster_of(x, y) for x, y in changed}
+        keys = {k for c in dirty for k in self._border_keys_of(c)}
+        for key in keys:
+            self._build_border(key)
+        touched = dirty | {c for key in keys for c in key}
+        for c in touched:
+            for u in self.nodes_of.get(c, ()):
+                self.adj.pop(u, None)
+        self._rebuild_inter()
+        self._build_intra(touched)
+        self.edges = sum(len(r) for r in self.adj.values())
+        self.build_ms = (time.perf_counter() - t0) * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clusters": self.nclusters * self.nclusters,
+            "abstract_nodes": len(self.inter),
+            "abstract_edges": self.edges,
+            "build_ms": round(self.build_ms, 3),
+        }
+
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Optional[Tuple[Abstraction, str]] = None
+        self.error: Optional[BaseException] = None
+
+
+_CACHE: "OrderedDict[Tuple[str, int], Abstraction]" = OrderedDict()
+_FLIGHTS: Dict[Tuple[str, int], _Flight] = {}
+_CACHE_LOCK = threading.Lock()
+CACHE_SIZE = 8
+
+
+def _derive(grid: Grid, cluster_size: int, base: Optional[Abstraction]) -> Tuple[Abstraction, str]:
+    # patch a lightly edited version of base, else build from scratch
+    if base is not None:
+        ys, xs = np.nonzero(base.grid.occ != grid.occ)
+        dirty = {(x // cluster_size, y // cluster_size) for x, y in zip(xs.tolist(), ys.tolist())}
+        if len(dirty) * 4 <= base.nclusters * base.nclusters:
+            abstraction = base.copy()
+            abstraction.update(grid.occ, zip(xs.tolist(), ys.tolist()))
+            return abstraction, "update"
+    return Abstraction(grid.occ, grid.diagonal, cluster_size), "build"
+
+
+def get_abstraction(grid: Grid, cluster_size: int = 16) -> Tuple[Abstraction, str]:
+    # cached by map fingerprint; a miss on a lightly edited version of a cached map is patched
+    # incrementally from it. The build runs outside the cache lock, once per key: concurrent
+    # queries for the same map wait for it, others go ahead. Returns (abstraction, "hit" |
+    # "shared" | "update" | "build"), "shared" for a query that waited on another's build.
+    key = (grid.fingerprint(), cluster_size)
+    with _CACHE_LOCK:
+        found = _CACHE.get(key)
+        if found is not None:
+            _CACHE.move_to_end(key)
+            return found, "hit"
+        flight = _FLIGHTS.get(key)
+        leader = flight is None
+        if leader:
+            flight = _FLIGHTS[key] = _Flight()
+            base = None
+            for ab in reversed(_CACHE.values()):
+                if ab.cluster_size == cluster_size and ab.size == grid.size and ab.diagonal == grid.diagonal:
+                    base = ab
+                    break
+    if not leader:
+        flight.event.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value[0], "shared"
+    try:
+        flight.value = _derive(grid, cluster_size, base)
+        with _CACHE_LOCK:
+            _CACHE[key] = flight.value[0]
+            while len(_CACHE) > CACHE_SIZE:
+                _CACHE.popitem(last=False)
+        return flight.value
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _CACHE_LOCK:
+            del _FLIGHTS[key]
+        flight.event.set()
+
+
+class HPAStar(SearchBase):
+    # Hierarchical Path-Finding A* (Botea et al. 2004): searches the cached abstract graph with
+    # start/goal linked into their clusters, then refines each abstract edge with a local search.
+    # OPEN/CLOSED hold abstract nodes; paths are near-optimal, not optimal. weight > 1 inflates
+    # the heuristic of the abstract search, at most that factor over the abstract optimum.
+    def __init__(self, grid, heuristic=Heuristic.octile, cluster_size: int = 16, weight: float = 1.0):
+        super().__init__(grid)
+        self.hf = heuristic
+        self.weight = max(1.0, weight)
+        t0 = time.perf_counter()
+        self.abstraction, self.cache = get_abstraction(grid, cluster_size)
+        self.preprocess_ms = (time.perf_counter() - t0) * 1000
+        ab = self.abstraction
+        start, goal = grid.start, grid.goal
+        sc, gc = ab.cluster_of(*start), ab.cluster_of(*goal)
+        # the start links to the abstract nodes of its cluster; a blocked start steps onto a free
+        # neighbour first (as in Grid), which may lie in another cluster. _start_via keeps, per
+        # edge, the first cell and the cluster bounds its refinement searches in.
+        if grid.is_free(*start):
+            seeds = [(start, 0.0)]
+        else:
+            seeds = [((nx, ny), c) for nx, ny, c in grid.neighbors_cost(*start)]
+        self.start_edges: Dict[XY, float] = {}
+        self._start_via: Dict[XY, Tuple[XY, Tuple[int, int, int, int]]] = {}
+        for cell, c0 in seeds:
+            cc = ab.cluster_of(*cell)
+            bounds = ab.bounds(cc)
+            dist, _ = _local_search(grid, bounds, cell)
+            for v in ab.nodes_of.get(cc, ()):
+                if v in dist and v != start and c0 + dist[v] < self.start_edges.get(v, float("inf")):
+                    self.start_edges[v] = c0 + dist[v]
+                    self._start_via[v] = (cell, bounds)
+        self._direct_bounds: Optional[Tuple[int, int, int, int]] = None
+        if abs(sc[0] - gc[0]) <= 1 and abs(sc[1] - gc[1]) <= 1:
+            # nearby endpoints: also offer a direct edge found inside the two clusters
+            b1, b2 = ab.bounds(sc), ab.bounds(gc)
+            self._direct_bounds = (min(b1[0], b2[0]), min(b1[1], b2[1]), max(b1[2], b2[2]), max(b1[3], b2[3]))
+            direct, _ = _local_search(grid, self._direct_bounds, start, stop=goal)
+            if goal in direct and direct[goal] < self.start_edges.get(goal, float("inf")):
+                self.start_edges[goal] = direct[goal]
+                self._start_via.pop(goal, None)
+        self.goal_edges: Dict[XY, float] = {}
+        if grid.is_free(*goal):
+            gdist, _ = _local_search(grid, ab.bounds(gc), goal)
+            self.goal_edges = {v: gdist[v] for v in ab.nodes_of.get(gc, ()) if v in gdist and v != goal}
+        s = self._index(start)
+        self._h[s] = self.hf(goal[0] - start[0], goal[1] - start[1])
+        self._f[s] = self.weight * self._h[s]
+        self._reheap()
+        self._goal = self._index(goal)
+
+    def _edges(self, u: XY) -> Dict[XY, float]:
+        edges = self.abstraction.adj.get(u)
+        extra_goal = u in self.goal_edges
+        if u != self.grid.start and not extra_goal:
+            return edges or {}
+        edges = dict(edges or {})
+        if u == self.grid.start:
+            for v, c in self.start_edges.items():
+                if c < edges.get(v, float("inf")):
+                    edges[v] = c
+        if extra_goal and self.goal_edges[u] < edges.get(self.grid.goal, float("inf")):
+            edges[self.grid.goal] = self.goal_edges[u]
+        return edges
+
+    def _expand(self) -> Optional[Tuple[int, Optional[List[int]]]]:
+        i = self._pop_open()
+        if i < 0:
+            return None
+        self._close(i)
+        self.expanded += 1
+        if i == self._goal:
+            return i, None
+        gx, gy = self.grid.goal
+        size = self.grid.size
+        state, gs = self._state, self._g
+        hf, w = self.hf, self.weight
+        cur_g = gs[i]
+        neighbors: List[int] = []
+        for (nx, ny), cost in self._edges(self._xy(i)).items():
+            j = ny * size + nx
+            st = state[j]
+            if st & CLOSED:
+                continue
+            tentative_g = cur_g + cost
+            if not st & OPEN or tentative_g < gs[j]:
+                h = hf(gx - nx, gy - ny)
+                self._push_open(j, tentative_g, h, tentative_g + w * h, i)
+            neighbors.append(j)
+        return i, neighbors
+
+    def reconstruct(self, xy: Tuple[int, int]) -> List[Tuple[int, int]]:
+        abstract = super().reconstruct(xy)
+        if not abstract:
+            return abstract
+        ab = self.abstraction
+        path = [abstract[0]]
+        for u, v in zip(abstract, abstract[1:]):
+            cu = ab.cluster_of(*u)
+            if u == self.grid.start and v in self._start_via:
+                cell, bounds = self._start_via[v]
+                if cell != u:
+                    path.append(cell)
+                    u = cell
+            elif (u, v) == (self.grid.start, self.grid.goal) and self._direct_bounds is not None:
+                bounds = self._direct_bounds
+            elif cu != ab.cluster_of(*v):
+                # inter edge: the two cells are adjacent
+                path.append(v)
+                continue
+            else:
+                bounds = ab.bounds(cu)
+            _, parent = _local_search(self.grid, bounds, u, stop=v)
+            seg = []
+            cur: Optional[XY] = v
+            while cur != u:
+                seg.append(cur)
+                cur = parent[cur]
+            path.extend(reversed(seg))
+        return path
+
+    def _abstraction_stats(self) -> Dict[str, Any]:
+        return {"preprocess_ms": round(self.preprocess_ms, 3), "abstraction": self.cache, **self.abstraction.stats()}
+
+    def step(self) -> Dict[str, Any]:
+        snap = super().step()
+        if snap.get("finished"):
+            snap["stats"].update(self._abstraction_stats())
+        return snap
+
+    def solve(self, max_expansions: Optional[int] = None) -> Dict[str, Any]:
+        res = super().solve(max_expansions)
+        res.update(self._abstraction_stats())
+        return res
@@ -0,0 +1,128 @@
+from typing import Tuple, List, Optional
+from .base import SearchBase, OPEN, CLOSED
+from .astar import Heuristic
+from .grid import SQRT2
+
+
+class JumpPointSearch(SearchBase):
+    # Jump Point Search (Harabor & Grastien 2011) for uniform-cost 8-connected grids.
+    # OPEN/CLOSED hold jump points only; reconstruct() fills in the straight runs between them.
+    # Without diagonal moves every free neighbor is a successor, i.e. plain A*.
+    def __init__(self, grid, heuristic=Heuristic.octile):
+        super().__init__(grid)
+        self.hf = heuristic
+        self._n = grid.size
+        self._occ = grid._occ
+        sx, sy = grid.start
+        gx, gy = grid.goal
+        self._goal = gy * grid.size + gx
+        s = sy * grid.size + sx
+        self._h[s] = self._f[s] = self.hf(gx - sx, gy - sy)
+        self._reheap()
+
+    def _free(self, x: int, y: int) -> bool:
+        n = self._n
+        return 0 <= x < n and 0 <= y < n and not self._occ[y * n + x]
+
+    def _directions(self, x: int, y: int, parent: Optional[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        # pruned set of directions to jump in from (x, y), given how it was reached
+        if parent is None:
+            return [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+        px, py = parent
+        dx = (x > px) - (x < px)
+        dy = (y > py) - (y < py)
+        free = self._free
+        dirs: List[Tuple[int, int]] = []
+        if dx and dy:
+            dirs += [(dx, 0), (0, dy), (dx, dy)]
+            if not free(x - dx, y):
+                dirs.append((-dx, dy))
+            if not free(x, y - dy):
+                dirs.append((dx, -dy))
+        elif dx:
+            dirs.append((dx, 0))
+            if not free(x, y + 1):
+                dirs.append((dx, 1))
+            if not free(x, y - 1):
+                dirs.append((dx, -1))
+        else:
+            dirs.append((0, dy))
+            if not free(x + 1, y):
+                dirs.append((1, dy))
+            if not free(x - 1, y):
+                dirs.append((-1, dy))
+        return dirs
+
+    def _jump(self, x: int, y: int, dx: int, dy: int) -> Optional[Tuple[int, int]]:
+        free = self._free
+        goal = self.grid.goal
+        while True:
+            x += dx
+            y += dy
+            if not free(x, y):
+                return None
+            if (x, y) == goal:
+                return x, y
+            if dx and dy:
+                if (free(x - dx, y + dy) and not free(x - dx, y)) or (free(x + dx, y - dy) and not free(x, y - dy)):
+                    return x, y
+                if self._jump(x, y, dx, 0) is not None or self._jump(x, y, 0, dy) is not None:
+                    return x, y
+            elif dx:
+                if (free(x + dx, y + 1) and not free(x, y + 1)) or (free(x + dx, y - 1) and not free(x, y - 1)):
+                    return x, y
+            else:
+                if (free(x + 1, y + dy) and not free(x + 1, y)) or (free(x - 1, y + dy) and not free(x - 1, y)):
+                    return x, y
+
+    def _successors(self, i: int) -> List[Tuple[int, int, float]]:
+        x, y = self._xy(i)
+        if not self.grid.diagonal:
+            return self.grid.neighbors_cost(x, y)
+        res = []
+        for dx, dy in self._directions(x, y, self.parent_of((x, y))):
+            jp = self._jump(x, y, dx, dy)
+            if jp is not None:
+                steps = max(abs(jp[0] - x), abs(jp[1] - y))
+                res.append((jp[0], jp[1], steps * SQRT2 if dx and dy else float(steps)))
+        return res
+
+    def _expand(self) -> Optional[Tuple[int, Optional[List[int]]]]:
+        i = self._pop_open()
+        if i < 0:
+            return None
+        self._close(i)
+        self.expanded += 1
+        if i == self._goal:
+            return i, None
+        gx, gy = self.grid.goal
+        n = self._n
+        state, gs = self._state, self._g
+        cur_g = gs[i]
+        jump_points: List[int] = []
+        for nx, ny, cost in self._successors(i):
+            j = ny * n + nx
+            st = state[j]
+            if st & CLOSED:
+                continue
+            tentative_g = cur_g + cost
+            if not st & OPEN or tentative_g < gs[j]:
+                h = self.hf(gx - nx, gy - ny)
+                self._push_open(j, tentative_g, h, tentative_g + h, i)
+            jump_points.append(j)
+        return i, jump_points
+
+    def reconstruct(self, xy: Tuple[int, int]) -> List[Tuple[int, int]]:
+        jump_path = super().reconstruct(xy)
+        if not jump_path:
+            return jump_path
+        path = [jump_path[0]]
+        for tx, ty in jump_path[1:]:
+            x, y = path[-1]
+            dx = (tx > x) - (tx < x)
+            dy = (ty > y) - (ty < y)
+            while (x, y) != (tx, ty):
+                x += dx
+                y += dy
+                path.append((x, y))
+        return path
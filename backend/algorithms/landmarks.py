@@ -0,0 +1,112 @@
+from typing import Tuple, List, Dict, Any
+import time
+
+import numpy as np
+
+from .astar import Heuristic
+from .dijkstra import distance_field
+from .grid import Grid
+
+XY = Tuple[int, int]
+_INF = float("inf")
+
+
+class Landmarks:
+    """ALT preprocessing of one map (Goldberg & Harrelson 2005): ``k`` landmarks and the exact
+    distance from each of them to every cell, as a (size * size, k) float32 table, one row per cell.
+
+    By the triangle inequality ``|d(L, goal) - d(L, v)|`` never exceeds d(v, goal), for every
+    landmark L; ``heuristic(goal)`` takes the largest of these bounds and the octile (manhattan on
+    4-connected maps) distance, which sees the walls and stays admissible (consistent up to the
+    float32 rounding of the table). Landmarks are placed by farthest-point selection in the largest
+    component, starting from the free cell nearest the top-left corner; cells they cannot reach
+    (other components) fall back to the plain distance.
+    """
+
+    def __init__(self, grid: Grid, k: int = 8):
+        t0 = time.perf_counter()
+        self.size = size = grid.size
+        self.diagonal = grid.diagonal
+        labels = grid.components().reshape(-1)
+        roots, counts = np.unique(labels[labels >= 0], return_counts=True)
+        cells: List[XY] = []
+        rows: List[np.ndarray] = []
+        if len(roots):
+            inside = labels == roots[np.argmax(counts)]
+            ys, xs = np.divmod(np.flatnonzero(inside), size)
+            first = int(np.argmin(xs + ys))
+            nxt = int(ys[first]) * size + int(xs[first])
+            nearest = np.full(size * size, np.inf)
+            for _ in range(min(k, int(counts.max()))):
+                y, x = divmod(nxt, size)
+                dist = distance_field(grid, (x, y)).reshape(-1)
+                cells.append((x, y))
+                rows.append(dist.astype(np.float32))
+                # the next landmark is the cell farthest from all the chosen ones
+                nearest = np.minimum(nearest, dist)
+                far = np.where(inside, nearest, -1.0)
+                nxt = int(np.argmax(far))
+                if far[nxt] <= 0:
+                    break
+        self.cells = cells
+        self.table = np.stack(rows, axis=1) if rows else np.zeros((size * size, 0), dtype=np.float32)
+        self.table.flags.writeable = False
+        # float32 rounds each distance by at most half an ulp of the largest one; the bounds give
+        # up twice that so rounding can never make them overestimate
+        finite = np.where(np.isfinite(self.table), self.table, 0.0)
+        self.slack = (finite.max(axis=0) if len(cells) else np.zeros(0)).astype(np.float64) * 2.0 ** -23
+        self.build_ms = (time.perf_counter() - t0) * 1000
+
+    @property
+    def k(self) -> int:
+        return len(self.cells)
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    def heuristic(self, goal: XY) -> "AltHeuristic":
+        return AltHeuristic(self, goal)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"landmarks": self.k, "landmark_ms": round(self.build_ms, 3), "landmark_bytes": self.nbytes}
+
+
+class AltHeuristic:
+    """ALT bound to one goal, looked up by flat cell index (``h[y * size + x]``) as A* generates
+    cells: O(k) per lookup straight from the table rows, nothing derived per goal up front."""
+
+    def __init__(self, landmarks: Landmarks, goal: XY):
+        self.size = size = landmarks.size
+        self.goal = goal
+        self.base = Heuristic.octile if landmarks.diagonal else Heuristic.manhattan
+        self.k = landmarks.k
+        self._table = memoryview(landmarks.table).cast("B").cast("f")
+        g = goal[1] * size + goal[0]
+        # landmarks that reach the goal, as (column, d(L, goal), slack)
+        self._goal_d = [(col, d, slack) for col, (d, slack) in enumerate(zip(landmarks.table[g].tolist(), landmarks.slack.tolist()))
+                        if d != _INF]
+
+    def __getitem__(self, i: int) -> float:
+        y, x = divmod(i, self.size)
+        h = self.base(self.goal[0] - x, self.goal[1] - y)
+        table, row = self._table, i * self.k
+        for col, d_goal, slack in self._goal_d:
+            d = table[row + col]
+            # cells this landmark cannot reach are in another component than the goal
+            if d == _INF:
+                continue
+            bound = abs(d_goal - d) - slack
+            if bound > h:
+                h = bound
+        return h
+
+
+def alt_heuristic(grid: Grid, entry=None, k: int = 8) -> Tuple[AltHeuristic, Dict[str, Any]]:
+    # ALT heuristic to grid.goal plus the stats reported with the search. entry: the map's registry
+    # entry (backend.registry.MapEntry), which keeps the tables; None preprocesses the map uncached.
+    if entry is not None:
+        landmarks, cache = entry.landmarks(k)
+    else:
+        landmarks, cache = Landmarks(grid, k), "build"
+    return landmarks.heuristic(grid.goal), {**landmarks.stats(), "landmark_cache": cache}
@@ -1,14 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, List, Dict, Any, Optional
-import math
+import asyncio
 import heapq
+import http.client
+import math
 import os
 import json
 import re
-import urllib.request
-import urllib.error
+import socket
+import threading
+import urllib.parse
+
+from .base import SearchBase, OPEN, CLOSED
+import numpy as np
 
-from .base import SearchBase, Node
 from .astar import Heuristic
+from .llm_cache import WaypointCache, default_cache, waypoint_key
 try:
     from dotenv import load_dotenv
 except Exception:
@@ -19,49 +26,68 @@ _ENV_PATH = os.path.join(os.path.dirname(__file__), ".env")
 if load_dotenv and os.path.exists(_ENV_PATH):
     load_dotenv(_ENV_PATH)
 
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _llm_executor() -> ThreadPoolExecutor:
+    # dedicated threads for chat requests, LLM_WORKERS (8) at a time; more requests queue here
+    # instead of taking the event loop's default executor
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=max(1, int(os.getenv("LLM_WORKERS", "8"))),
+                                           thread_name_prefix="llm")
+        return _EXECUTOR
+
+
+class _Call:
+    # one chat request; abort() from another thread wakes a blocked read and releases the socket
+    def __init__(self):
+        self.conn: Optional[http.client.HTTPConnection] = None
+        self.aborted = threading.Event()
+
+    def abort(self):
+        self.aborted.set()
+        sock = self.conn.sock if self.conn is not None else None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
 
 class LLMWaypointProvider:
-    def __init__(self, model: str = "deepseek"):
+    def __init__(self, model: str = "deepseek", cache: Optional[WaypointCache] = None):
         self.model = model
+        self.model_id = os.getenv("LLM_MODEL_ID", os.getenv("DEEPSEEK_MODEL", "deepseek-chat"))
+        self.cache = cache or default_cache()
+        # where the last waypoints came from: memory/disk/shared/miss, None when no call was made
+        self.last_cache: Optional[str] = None
         # Prefer user-requested names, fallback to previous ones
         self.api_key = os.getenv("LLM_API_KEY", os.getenv("DEEPSEEK_API_KEY", ""))
         self.base_url = os.getenv("LLM_BASE_URL", os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com"))
         self.chat_url = f"{self.base_url}/v1/chat/completions"
+        self.connect_timeout = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+        self.read_timeout = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+
+    @staticmethod
+    def _runs(cells: List[Tuple[int, int]]) -> List[List[int]]:
+        # [line, first, last] for each maximal run of consecutive cells, cells sorted by (line, pos)
+        runs: List[List[int]] = []
+        for line, pos in cells:
+            if runs and runs[-1][0] == line and runs[-1][2] == pos - 1:
+                runs[-1][2] = pos
+            else:
+                runs.append([line, pos, pos])
+        return runs
 
     @staticmethod
     def _compress_barriers(obstacles: set, size: int) -> Tuple[List[List[int]], List[List[int]]]:
-        horizontal: List[List[int]] = []
-        vertical: List[List[int]] = []
-        # rows
-        for y in range(size):
-            xs = sorted([x for (x, yy) in obstacles if yy == y])
-            if not xs:
-                continue
-            start = xs[0]
-            prev = xs[0]
-            for x in xs[1:]:
-                if x == prev + 1:
-                    prev = x
-                else:
-                    horizontal.append([y, start, prev])
-                    start = x
-                    prev = x
-            horizontal.append([y, start, prev])
-        # cols
-        for x in range(size):
-            ys = sorted([y for (xx, y) in obstacles if xx == x])
-            if not ys:
-                continue
-            start = ys[0]
-            prev = ys[0]
-            for y in ys[1:]:
-                if y == prev + 1:
-                    prev = y
-                else:
-                    vertical.append([x, start, prev])
-                    start = y
-                    prev = y
-            vertical.append([x, start, prev])
+        # one sort per axis instead of a scan of every obstacle for each row and column
+        inside = [(x, y) for x, y in obstacles if 0 <= x < size and 0 <= y < size]
+        horizontal = LLMWaypointProvider._runs(sorted((y, x) for x, y in inside))
+        vertical = LLMWaypointProvider._runs(sorted(inside))
         return horizontal[:200], vertical[:200]
 
     @staticmethod
@@ -100,11 +126,9 @@ class LLMWaypointProvider:
                     continue
         return res
 
-    def _ask(self, prompt: str, max_tokens: int = 600) -> str:
-        if not self.api_key:
-            return ""
+    def _request(self, prompt: str, max_tokens: int) -> Tuple[bytes, Dict[str, str]]:
         payload = {
-            "model": os.getenv("LLM_MODEL_ID", os.getenv("DEEPSEEK_MODEL", "deepseek-chat")),
+            "model": self.model_id,
             "messages": [
                 {"role": "system", "content": (
                     "You are a path planning assistant. Return only the path as a list of coordinate pairs at the end, prefixed with 'Generated Path:'."
@@ -114,35 +138,105 @@ class LLMWaypointProvider:
             "temperature": 0,
             "max_tokens": max_tokens,
         }
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            self.chat_url,
-            data=data,
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            },
-            method="POST",
-        )
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        return json.dumps(payload).encode("utf-8"), headers
+
+    @staticmethod
+    def _content(body: bytes) -> str:
+        j = json.loads(body.decode("utf-8"))
+        return j.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+    def _post(self, prompt: str, max_tokens: int, call: Optional[_Call] = None) -> str:
+        # connect within connect_timeout, then wait up to read_timeout for each read
+        data, headers = self._request(prompt, max_tokens)
+        url = urllib.parse.urlsplit(self.chat_url)
+        cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        conn = cls(url.hostname, url.port, timeout=self.connect_timeout)
+        call = call or _Call()
+        call.conn = conn
         try:
-            with urllib.request.urlopen(req, timeout=60) as resp:
-                body = resp.read().decode("utf-8")
-                j = json.loads(body)
-                return j.get("choices", [{}])[0].get("message", {}).get("content", "")
+            conn.connect()
+            conn.sock.settimeout(self.read_timeout)
+            if call.aborted.is_set():
+                raise ConnectionAbortedError("request cancelled")
+            path = url.path + ("?" + url.query if url.query else "")
+            conn.request("POST", path, body=data, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+            if resp.status >= 400:
+                raise OSError(f"chat endpoint returned HTTP {resp.status}")
+            return self._content(body)
+        finally:
+            conn.close()
+
+    def _ask(self, prompt: str, max_tokens: int = 600) -> str:
+        if not self.api_key:
+            return ""
+        try:
+            return self._post(prompt, max_tokens)
         except Exception:
             return ""
 
+    async def _aask(self, prompt: str, max_tokens: int = 600) -> str:
+        # blocking request on the dedicated LLM threads; cancelling aborts it, so the thread and
+        # its socket are released right away rather than after the timeouts
+        if not self.api_key:
+            return ""
+        call = _Call()
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(_llm_executor(), self._post, prompt, max_tokens, call),
+                                          self.connect_timeout + self.read_timeout)
+        except asyncio.CancelledError:
+            call.abort()
+            raise
+        except Exception:
+            call.abort()
+            return ""
+
+    def _fetch(self, start: Tuple[int, int], goal: Tuple[int, int], hbars: List[List[int]], vbars: List[List[int]]) -> List[Tuple[int, int]]:
+        out = self._ask(self._build_prompt(start, goal, hbars, vbars))
+        return self._parse_path(out) if out else []
+
+    async def _afetch(self, start: Tuple[int, int], goal: Tuple[int, int], hbars: List[List[int]], vbars: List[List[int]]) -> List[Tuple[int, int]]:
+        out = await self._aask(self._build_prompt(start, goal, hbars, vbars))
+        return self._parse_path(out) if out else []
+
     def get_waypoints(self, grid) -> List[Tuple[int, int]]:
         start = grid.start
         goal = grid.goal
         hbars, vbars = self._compress_barriers(grid.obstacles, grid.size)
-        prompt = self._build_prompt(start, goal, hbars, vbars)
-        out = self._ask(prompt) if (self.model == "deepseek") else ""
-        pts = self._parse_path(out) if out else []
+        pts: List[Tuple[int, int]] = []
+        self.last_cache = None
+        if self.model == "deepseek" and self.api_key:
+            # identical prompts share one cached (or in-flight) answer; filtering below stays per grid
+            key = waypoint_key(self.model_id, start, goal, hbars, vbars)
+            pts, self.last_cache = self.cache.get_or_compute(key, lambda: self._fetch(start, goal, hbars, vbars))
+        return self._finish_waypoints(grid, pts)
+
+    async def aget_waypoints(self, grid) -> List[Tuple[int, int]]:
+        # same result as get_waypoints without blocking the event loop
+        start = grid.start
+        goal = grid.goal
+        hbars, vbars = await asyncio.to_thread(self._compress_barriers, grid.obstacles, grid.size)
+        pts: List[Tuple[int, int]] = []
+        self.last_cache = None
+        if self.model == "deepseek" and self.api_key:
+            key = waypoint_key(self.model_id, start, goal, hbars, vbars)
+            pts, self.last_cache = await self.cache.aget_or_compute(key, lambda: self._afetch(start, goal, hbars, vbars))
+        return self._finish_waypoints(grid, pts)
+
+    @staticmethod
+    def _finish_waypoints(grid, pts: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        start = grid.start
+        goal = grid.goal
         # filter & enforce bounds
         filtered: List[Tuple[int, int]] = []
         for (x, y) in pts:
-            if 0 <= x < grid.size and 0 <= y < grid.size and (x, y) not in grid.obstacles:
+            if grid.is_free(x, y):
                 filtered.append((x, y))
         if not filtered or filtered[0] != start:
             filtered.insert(0, start)
@@ -152,12 +246,16 @@ class LLMWaypointProvider:
 
 
 class LLMAStar(SearchBase):
-    def __init__(self, grid, heuristic=Heuristic.octile, weight: float = 1.0, provider: Optional[LLMWaypointProvider] = None):
+    # waypoints=None asks the provider synchronously; pass [start, goal] to start expanding
+    # right away and call set_waypoints() once the LLM answer is in
+    def __init__(self, grid, heuristic=Heuristic.octile, weight: float = 1.0, provider: Optional[LLMWaypointProvider] = None,
+                 waypoints: Optional[List[Tuple[int, int]]] = None):
         super().__init__(grid)
         self.hf = heuristic
         self.weight = weight
         self.provider = provider or LLMWaypointProvider()
-        self.targets: List[Tuple[int, int]] = self.provider.get_waypoints(grid)
+        self.targets: List[Tuple[int, int]] = self.provider.get_waypoints(grid) if waypoints is None else list(waypoints)
+        self.llm_cache = getattr(self.provider, "last_cache", None)
         # target index
         self.ti = 1 if len(self.targets) > 1 else 0
         self.s_target = self.targets[self.ti]
@@ -166,10 +264,11 @@ class LLMAStar(SearchBase):
         gx, gy = grid.goal
         h_goal = self.hf(gx - sx, gy - sy)
         h_target = self.hf(self.s_target[0] - sx, self.s_target[1] - sy)
-        start = self.open[0]
-        start.h = h_goal + h_target
-        start.f = start.g + self.weight * start.h
-        self.open_map[(sx, sy)] = start
+        self._goal = gy * grid.size + gx
+        s = sy * grid.size + sx
+        self._h[s] = h_goal + h_target
+        self._f[s] = self.weight * self._h[s]
+        self._reheap()
 
     def _heuristic_two(self, x: int, y: int) -> float:
         gx, gy = self.grid.goal
@@ -181,51 +280,74 @@ class LLMAStar(SearchBase):
             self.ti += 1
             self.s_target = self.targets[self.ti]
 
+    def set_waypoints(self, targets: List[Tuple[int, int]]):
+        # switch guidance mid-search, skipping waypoints that are already expanded
+        self.targets = list(targets)
+        self.ti = 1 if len(self.targets) > 1 else 0
+        while self.ti + 1 < len(self.targets) and self.is_closed(self.targets[self.ti]):
+            self.ti += 1
+        self.s_target = self.targets[self.ti]
+        self._reheap_open()
+
     def _reheap_open(self):
-        for n in self.open:
-            x, y = n.x, n.y
-            n.h = self._heuristic_two(x, y)
-            n.f = n.g + self.weight * n.h
+        # re-score the whole OPEN set in one vectorized pass after the target changed; the heap
+        # is rebuilt straight from the new f array, keeping each live entry's seq for tie order
+        live = self._live_entries()
+        idx = np.fromiter((e[2] for e in live), np.int64, len(live))
+        ys, xs = np.divmod(idx, self.grid.size)
+        gx, gy = self.grid.goal
+        tx, ty = self.s_target
+        h = Heuristic.batch(self.hf, gx - xs, gy - ys) + Heuristic.batch(self.hf, tx - xs, ty - ys)
+        f = self._gs[idx] + self.weight * h
+        self._hs[idx] = h
+        self._fs[idx] = f
+        order = idx.tolist()
+        if self.delta:
+            for i in order:
+                self._track_open(i)
+        self.open = list(zip(f.tolist(), self._seqs[idx].tolist(), order))
         heapq.heapify(self.open)
 
-    def step(self) -> Dict[str, Any]:
-        if not self.open:
-            return {"finished": True, "path": [], "stats": {"expanded": self.expanded}}
-        cur = heapq.heappop(self.open)
-        self.open_map.pop((cur.x, cur.y), None)
-        self.closed.add((cur.x, cur.y))
+    def _expand(self) -> Optional[Tuple[int, Optional[List[int]]]]:
+        i = self._pop_open()
+        if i < 0:
+            return None
+        self._close(i)
         self.expanded += 1
-        if (cur.x, cur.y) == self.grid.goal:
-            path = self.reconstruct((cur.x, cur.y))
-            snap = self.snapshot((cur.x, cur.y), [], finished=True)
-            snap["path"] = path
-            snap["stats"]["cost"] = cur.g
-            snap["llm_targets"] = self.targets
-            return snap
-        neighbors: List[Tuple[int, int]] = []
-        for nx, ny in self.grid.neighbors(cur.x, cur.y):
-            if (nx, ny) in self.closed:
+        if i == self._goal:
+            return i, None
+        grid = self.grid
+        size = grid.size
+        state, gs = self._state, self._g
+        cur_g = gs[i]
+        neighbors: List[int] = []
+        for off, cost in grid._offsets_by_mask[grid._mask[i]]:
+            j = i + off
+            st = state[j]
+            if st & CLOSED:
                 continue
-            tentative_g = cur.g + self.grid.move_cost((cur.x, cur.y), (nx, ny))
-            node = self.open_map.get((nx, ny))
-            h = self._heuristic_two(nx, ny)
-            f = tentative_g + self.weight * h
-            if node is None:
-                node = Node(f=f, x=nx, y=ny, g=tentative_g, h=h, parent=(cur.x, cur.y))
-                heapq.heappush(self.open, node)
-                self.open_map[(nx, ny)] = node
-                self.parent_map[(nx, ny)] = (cur.x, cur.y)
-            elif tentative_g < node.g:
-                node.g = tentative_g
-                node.h = h
-                node.f = f
-                node.parent = (cur.x, cur.y)
-                heapq.heapify(self.open)
-                self.parent_map[(nx, ny)] = (cur.x, cur.y)
-            neighbors.append((nx, ny))
-            if (nx, ny) == self.s_target and self.s_target != self.grid.goal:
+            tentative_g = cur_g + cost
+            ny, nx = divmod(j, size)
+            if not st & OPEN or tentative_g < gs[j]:
+                h = self._heuristic_two(nx, ny)
+                self._push_open(j, tentative_g, h, tentative_g + self.weight * h, i)
+            neighbors.append(j)
+            if (nx, ny) == self.s_target and self.s_target != grid.goal:
                 self._update_target()
                 self._reheap_open()
-        snap = self.snapshot((cur.x, cur.y), neighbors)
-        snap["llm_target"] = self.s_target
+        return i, neighbors
+
+    def step(self) -> Dict[str, Any]:
+        snap = super().step()
+        if snap.get("finished"):
+            snap["llm_targets"] = self.targets
+            snap["stats"]["llm_cache"] = self.llm_cache
+        else:
+            snap["llm_target"] = self.s_target
         return snap
+
+    def solve(self, max_expansions: Optional[int] = None) -> Dict[str, Any]:
+        res = super().solve(max_expansions)
+        res["llm_targets"] = self.targets
+        res["llm_cache"] = self.llm_cache
+        return res
@@ -0,0 +1,219 @@
+from collections import OrderedDict
+from typing import Tuple, List, Dict, Optional, Callable, Awaitable
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def waypoint_key(model_id: str, start: Tuple[int, int], goal: Tuple[int, int], hbars: List[List[int]], vbars: List[List[int]]) -> str:
+    # everything that goes into the prompt, so equal keys mean equal requests
+    h = hashlib.sha256()
+    h.update(json.dumps([model_id, list(start), list(goal), hbars, vbars], separators=(",", ":")).encode())
+    return h.hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Optional[List[Tuple[int, int]]] = None
+        self.error: Optional[BaseException] = None
+
+
+class _AsyncFlight:
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class WaypointCache:
+    """LLM waypoint cache: in-memory LRU, optional on-disk tier, TTL and single-flight.
+
+    ``get_or_compute`` returns ``(waypoints, source)`` where source is ``"memory"``, ``"disk"``,
+    ``"shared"`` (waited on an identical in-flight call) or ``"miss"``. Empty results are not
+    stored, so a failed or keyless call is retried next time. ``aget_or_compute`` is the asyncio
+    counterpart; its shared call is cancelled once every waiter has been cancelled.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600.0, directory: Optional[str] = None, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self.clock = clock
+        self._mem: "OrderedDict[str, Tuple[float, List[Tuple[int, int]]]]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[Tuple[int, str], _AsyncFlight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _get_memory(self, key: str) -> Optional[List[Tuple[int, int]]]:
+        entry = self._mem.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self.clock():
+            del self._mem[key]
+            return None
+        self._mem.move_to_end(key)
+        return entry[1]
+
+    def _put_memory(self, key: str, value: List[Tuple[int, int]], expires: float):
+        self._mem[key] = (expires, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _get_disk(self, key: str) -> Optional[Tuple[float, List[Tuple[int, int]]]]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            expires = float(data["expires"])
+            value = [(int(x), int(y)) for x, y in data["waypoints"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if expires <= self.clock():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return expires, value
+
+    def _put_disk(self, key: str, value: List[Tuple[int, int]], expires: float):
+        if not self.directory:
+            return
+        # write-then-rename so concurrent readers never see a partial file
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"expires": expires, "waypoints": value}, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def get_or_compute(self, key: str, compute: Callable[[], List[Tuple[int, int]]]) -> Tuple[List[Tuple[int, int]], str]:
+        with self._lock:
+            value = self._get_memory(key)
+            if value is not None:
+                self.hits += 1
+                return value, "memory"
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                self.hits += 1
+            return flight.value, "shared"
+        source = "disk"
+        try:
+            stored = self._get_disk(key)
+            if stored is not None:
+                expires, value = stored
+            else:
+                source = "miss"
+                value = compute()
+                expires = self.clock() + self.ttl
+                if value:
+                    self._put_disk(key, value, expires)
+            with self._lock:
+                if value:
+                    self._put_memory(key, value, expires)
+                if source == "disk":
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            flight.value = value
+            return value, source
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[List[Tuple[int, int]]]]) -> Tuple[List[Tuple[int, int]], str]:
+        with self._lock:
+            value = self._get_memory(key)
+            if value is not None:
+                self.hits += 1
+                return value, "memory"
+        stored = self._get_disk(key)
+        if stored is not None:
+            with self._lock:
+                self._put_memory(key, stored[1], stored[0])
+                self.hits += 1
+            return stored[1], "disk"
+        loop = asyncio.get_running_loop()
+        fk = (id(loop), key)
+        flight = self._async_flights.get(fk)
+        source = "shared"
+        if flight is None:
+            source = "miss"
+            flight = self._async_flights[fk] = _AsyncFlight(loop.create_task(self._acompute(key, compute)))
+
+            def forget(_, f=flight):
+                if self._async_flights.get(fk) is f:
+                    del self._async_flights[fk]
+
+            flight.task.add_done_callback(forget)
+        flight.waiters += 1
+        try:
+            value = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                if self._async_flights.get(fk) is flight:
+                    del self._async_flights[fk]
+                flight.task.cancel()
+        with self._lock:
+            if source == "miss":
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value, source
+
+    async def _acompute(self, key: str, compute: Callable[[], Awaitable[List[Tuple[int, int]]]]) -> List[Tuple[int, int]]:
+        value = await compute()
+        if value:
+            expires = self.clock() + self.ttl
+            self._put_disk(key, value, expires)
+            with self._lock:
+                self._put_memory(key, value, expires)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+
+
+_DEFAULT: Optional[WaypointCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_cache() -> WaypointCache:
+    # server-wide cache configured from LLM_CACHE_SIZE / LLM_CACHE_TTL / LLM_CACHE_DIR
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = WaypointCache(
+                max_entries=int(os.getenv("LLM_CACHE_SIZE", "256")),
+                ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+                directory=os.getenv("LLM_CACHE_DIR") or None,
+            )
+        return _DEFAULT
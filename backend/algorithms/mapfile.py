@@ -0,0 +1,146 @@
+"""Map files: MovingAI ``.map``/``.scen`` and raw PBM (P4) bitmaps, loaded through mmap.
+
+Loaders return ``uint8`` occupancy arrays (1 = blocked) that ``Grid.from_array`` takes as is.
+Non-square maps are padded with obstacles on the right/bottom up to a square.
+"""
+from dataclasses import dataclass
+from typing import List, Tuple
+import mmap
+import os
+
+import numpy as np
+
+# MovingAI terrain: '.' and 'G' are ground, 'S' is swamp (passable); '@', 'O', 'T', 'W' are not
+_BLOCKED = np.ones(256, dtype=np.uint8)
+_BLOCKED[[ord("."), ord("G"), ord("S")]] = 0
+
+
+@dataclass
+class Scenario:
+    bucket: int
+    map: str
+    width: int
+    height: int
+    start: Tuple[int, int]
+    goal: Tuple[int, int]
+    # reference length from the benchmark; MovingAI forbids corner cutting, so it can exceed ours
+    optimal: float
+
+
+def pad_square(occ: np.ndarray) -> np.ndarray:
+    h, w = occ.shape
+    if h == w:
+        return occ
+    n = max(h, w)
+    out = np.ones((n, n), dtype=np.uint8)
+    out[:h, :w] = occ
+    return out
+
+
+def _mapped(path: str) -> mmap.mmap:
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def load_movingai_map(path: str) -> np.ndarray:
+    mm = _mapped(path)
+    try:
+        width = height = None
+        pos = 0
+        while True:
+            end = mm.find(b"\n", pos)
+            if end < 0:
+                raise ValueError(f"{path}: missing 'map' line")
+            line = mm[pos:end].strip().split()
+            pos = end + 1
+            if not line:
+                continue
+            if line[0] == b"height":
+                height = int(line[1])
+            elif line[0] == b"width":
+                width = int(line[1])
+            elif line[0] == b"map":
+                break
+        if not width or not height:
+            raise ValueError(f"{path}: missing width/height")
+        # rows are fixed width, so the body is a (height, stride) byte matrix viewed in place
+        first = mm.find(b"\n", pos)
+        stride = (first - pos + 1) if first >= 0 else width
+        if stride < width or len(mm) - pos < stride * (height - 1) + width:
+            raise ValueError(f"{path}: map body shorter than {height}x{width}")
+        count = min(len(mm) - pos, stride * height)
+        body = np.frombuffer(mm, dtype=np.uint8, count=count, offset=pos)
+        if count < stride * height:
+            body = np.concatenate([body, np.zeros(stride * height - count, dtype=np.uint8)])
+        occ = _BLOCKED[body.reshape(height, stride)[:, :width]]
+        del body
+    finally:
+        mm.close()
+    return pad_square(occ)
+
+
+def load_scenarios(path: str) -> List[Scenario]:
+    out: List[Scenario] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 9 or parts[0] == "version":
+                continue
+            b, m, w, h, sx, sy, gx, gy = parts[:8]
+            out.append(Scenario(int(b), m, int(w), int(h), (int(sx), int(sy)), (int(gx), int(gy)), float(parts[8])))
+    return out
+
+
+def load_pbm(path: str) -> np.ndarray:
+    # raw PBM: "P4", width, height (whitespace/comments in between), then rows packed MSB first, 1 = black = blocked
+    mm = _mapped(path)
+    try:
+        fields: List[int] = []
+        pos = 2
+        if mm[:2] != b"P4":
+            raise ValueError(f"{path}: not a raw PBM (P4) file")
+        while len(fields) < 2:
+            c = mm[pos:pos + 1]
+            if not c:
+                raise ValueError(f"{path}: truncated header")
+            if c == b"#":
+                pos = mm.find(b"\n", pos) + 1 or len(mm)
+            elif c.isspace():
+                pos += 1
+            else:
+                end = pos
+                while mm[end:end + 1].isdigit():
+                    end += 1
+                fields.append(int(mm[pos:end]))
+                pos = end
+        pos += 1
+        width, height = fields
+        row = (width + 7) // 8
+        if len(mm) - pos < row * height:
+            raise ValueError(f"{path}: bitmap shorter than {height}x{width}")
+        packed = np.frombuffer(mm, dtype=np.uint8, count=row * height, offset=pos).reshape(height, row)
+        occ = np.unpackbits(packed, axis=1, count=width)
+        del packed
+    finally:
+        mm.close()
+    return pad_square(occ)
+
+
+def save_pbm(path: str, occ: np.ndarray):
+    occ = np.asarray(occ, dtype=np.uint8)
+    h, w = occ.shape
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(f"P4\n{w} {h}\n".encode())
+        f.write(np.packbits(occ != 0, axis=1).tobytes())
+    os.replace(tmp, path)
+
+
+def load_map(path: str) -> np.ndarray:
+    # dispatch on the extension: .map (MovingAI) or .pbm (raw bitmap)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".map":
+        return load_movingai_map(path)
+    if ext == ".pbm":
+        return load_pbm(path)
+    raise ValueError(f"unsupported map file: {path}")
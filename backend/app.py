@@ -1,15 +1,27 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import List, Optional, Tuple, Dict, Any
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from dataclasses import asdict
+from typing import List, Optional, Tuple, Dict, Any, Callable, Deque, Union
+from collections import deque
+from contextlib import nullcontext
+import asyncio
+import json
+import os
+import threading
 import time
 
-from .algorithms.grid import Grid
-from .algorithms.astar import AStar, Heuristic
-from .algorithms.dijkstra import Dijkstra
-from .algorithms.greedy import GreedyBestFirst
+from .algorithms.base import merge_snapshots
+from .algorithms.grid import Grid, occupancy
 from .algorithms.llm_astar import LLMAStar as LLMAStarAlgo
+from .batch import plan_batch
+from .maps import default_store
+from .metrics import RunProfiler, default_metrics, peak_rss_kb
+from .registry import MapEntry, default_registry
+from .planners import make_algorithm, planner_name
+from .scheduler import PoolLimitError, SearchPool, default_pool
+from .wire import encode_frame
 
 app = FastAPI()
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
@@ -20,9 +32,21 @@ def index():
     return FileResponse("frontend/index.html")
 
 
-class StartPayload(BaseModel):
-    size: int
-    obstacles: List[Tuple[int, int]]
+class MapPayload(BaseModel):
+    # map_id picks a preloaded map (size comes from the map, obstacles are added on top);
+    # without it the map is size x size with the given obstacles
+    size: int = 0
+    obstacles: List[Tuple[int, int]] = []
+    map_id: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _has_map(self):
+        if not self.map_id and self.size < 1:
+            raise ValueError("size must be at least 1 unless map_id is given")
+        return self
+
+
+class StartPayload(MapPayload):
     start: Tuple[int, int]
     goal: Tuple[int, int]
     diagonal: bool = True
@@ -31,76 +55,647 @@ class StartPayload(BaseModel):
     weight: float = 1.0
     llm_model: str = "deepseek"
     llm_enabled: bool = False
+    delta: bool = False
+    binary: bool = False
+    cluster_size: int = 16
+    # per-run cProfile / tracemalloc; results arrive with the finished stats
+    profile: bool = False
+    trace_memory: bool = False
+    # search-time budget of the anytime planner ("arastar"); max_expansions caps the expansions of
+    # every planner in /solve, and of "arastar" in sessions too
+    time_limit_ms: Optional[float] = None
+    max_expansions: Optional[int] = None
+
+
+def map_entry(payload) -> MapEntry:
+    # shared, frozen map for a payload (preloaded map_id plus obstacles, or size plus obstacles);
+    # identical maps from any session resolve to the same entry. KeyError for an unknown map_id.
+    registry = default_registry()
+    if not payload.map_id:
+        return registry.entry(occupancy(payload.size, payload.obstacles), payload.diagonal)
+    map_id = payload.map_id
+    entry = registry.named(map_id, payload.diagonal, lambda: default_store().get(map_id))
+    if not payload.obstacles:
+        return entry
+    occ = entry.grid.occ
+    return registry.entry(occ | occupancy(occ.shape[0], payload.obstacles), payload.diagonal)
+
+
+def check_endpoints(entry: MapEntry, payload: StartPayload):
+    # ValueError when start or goal lies outside the map, before any search state is built
+    grid = entry.grid
+    if not (grid.in_bounds(*payload.start) and grid.in_bounds(*payload.goal)):
+        raise ValueError("start or goal out of bounds")
+
+
+def build_grid(payload: StartPayload, editable: bool = True) -> Grid:
+    entry = map_entry(payload)
+    check_endpoints(entry, payload)
+    grid = entry.query_grid(tuple(payload.start), tuple(payload.goal))
+    return grid.copy() if editable else grid
+
+
+def wants_exact(payload: StartPayload) -> bool:
+    return payload.heuristic == "exact" and payload.algorithm == "astar"
+
+
+def uses_map_caches(payload: StartPayload) -> bool:
+    # planners that draw on the entry's per-map caches: distance fields, landmarks, flow fields
+    return wants_exact(payload) or payload.heuristic == "alt" or payload.algorithm == "flowfield"
+
+
+def build_algorithm(grid: Grid, payload: StartPayload, defer_llm: bool = False, entry: Optional[MapEntry] = None):
+    # entry: the grid's map in the registry; heuristic "exact" takes its cached distance field to
+    # this goal, ALT and flow fields their cached tables and fields, all shared across sessions
+    h_field = entry.distance_field(grid.goal) if entry is not None and wants_exact(payload) else None
+    return make_algorithm(grid, payload.algorithm, payload.heuristic, payload.weight,
+                          payload.cluster_size, payload.llm_enabled, defer_llm, h_field,
+                          payload.time_limit_ms, payload.max_expansions, entry)
 
 
 class Runner:
     def __init__(self):
         self.grid: Optional[Grid] = None
         self.algo: Optional[Any] = None
+        self.payload: Optional[StartPayload] = None
+        # set while an LLM-guided search still waits for its waypoints
+        self.llm_pending: bool = False
         self.started_at: float = 0.0
         self.finished: bool = False
+        self.unreachable: bool = False
         self.last_snapshot: Optional[Dict[str, Any]] = None
+        self.profiler: Optional[RunProfiler] = None
+        # time spent encoding this run's updates, and the stats last folded into /metrics
+        self.serialize_time: float = 0.0
+        self._reported: Dict[str, Any] = {}
+        # (generated, bytes) at the last footprint measurement
+        self._measured: Optional[Tuple[int, int]] = None
 
-    def start(self, payload: StartPayload):
-        self.grid = Grid(payload.size, set(map(tuple, payload.obstacles)), tuple(payload.start), tuple(payload.goal), payload.diagonal)
-        import os
-        llm_flag = payload.llm_enabled or os.getenv("LLM_GUIDE", "0") in ("1", "true", "True")
-        if payload.algorithm == "astar":
-            h = getattr(Heuristic, payload.heuristic, Heuristic.octile)
-            if llm_flag:
-                self.algo = LLMAStarAlgo(self.grid, heuristic=h, weight=payload.weight)
-            else:
-                self.algo = AStar(self.grid, heuristic=h, weight=payload.weight)
-        elif payload.algorithm == "dijkstra":
-            self.algo = Dijkstra(self.grid)
-        elif payload.algorithm == "greedy":
-            h = getattr(Heuristic, payload.heuristic, Heuristic.octile)
-            self.algo = GreedyBestFirst(self.grid, heuristic=h)
-        elif payload.algorithm == "llm_astar":
-            h = getattr(Heuristic, payload.heuristic, Heuristic.octile)
-            self.algo = LLMAStarAlgo(self.grid, heuristic=h, weight=payload.weight)
-        else:
-            self.algo = AStar(self.grid, heuristic=Heuristic.octile)
+    def footprint(self) -> int:
+        # memory the session holds: its copy of the grid (occupancy, masks, labels) plus the search
+        # state committed so far. The state is only measured again once the search has generated
+        # another 1/256 of the map since the last measurement, which keeps the O(map) scan cheap.
+        if self.algo is None:
+            return 0
+        generated = self.algo.generated + getattr(getattr(self.algo, "back", None), "generated", 0)
+        n = self.grid.size ** 2
+        if self._measured is None or generated - self._measured[0] >= max(1024, n >> 8):
+            self._measured = (generated, n * 6 + self.algo.state_bytes())
+        return self._measured[1]
+
+    def start(self, payload: StartPayload, entry: Optional[MapEntry] = None):
+        # entry: the payload's map when the caller resolved it already
+        entry = entry or map_entry(payload)
+        check_endpoints(entry, payload)
+        self.close()
+        self.payload = payload
+        self.grid = entry.query_grid(tuple(payload.start), tuple(payload.goal)).copy()
+        self._use(build_algorithm(self.grid, payload, defer_llm=True, entry=entry))
+        self.algo.delta = payload.delta
+        self.profiler = RunProfiler(payload.profile, payload.trace_memory)
+        # start and goal in different components: finish at once, without asking the LLM
+        self.unreachable = self.algo.unreachable()
+        self.llm_pending = isinstance(self.algo, LLMAStarAlgo) and not self.unreachable
         self.finished = False
         self.started_at = time.time()
         self.last_snapshot = None
 
-    def step(self) -> Dict[str, Any]:
+    def _use(self, algo):
+        # a new search on this runner: heuristic calls are timed for the stats split
+        self.report()
+        algo.time_heuristics()
+        self.algo = algo
+        self.serialize_time = 0.0
+        self._reported = {}
+        self._measured = None
+
+    def run_stats(self) -> Dict[str, Any]:
+        stats = self.algo.stats()
+        stats["serialize_ms"] = round(self.serialize_time * 1000, 3)
+        if self.algo.unreachable():
+            stats["unreachable"] = True
+        return stats
+
+    def report(self):
+        # fold this search's progress since the last report into the server-wide metrics
+        if self.algo is None:
+            return
+        stats = self.run_stats()
+        prev = self._reported
+        delta = {k: v - prev.get(k, 0) for k, v in stats.items() if type(v) in (int, float)}
+        delta["peak_open"] = stats["peak_open"]
+        delta["unreachable"] = stats.get("unreachable") and not prev
+        default_metrics().record_run("ws", planner_name(self.payload.algorithm), delta, count_run=not prev)
+        self._reported = stats
+
+    def close(self):
+        self.report()
+        if self.profiler is not None:
+            self.profiler.close()
+            self.profiler = None
+
+    def step(self, n: int = 1, deadline: Optional[float] = None) -> Dict[str, Any]:
+        # expand up to n nodes (or until the perf_counter deadline) and merge them into one update
         if not self.algo:
             return {"type": "error", "message": "not started"}
-        snap = self.algo.step()
+        snap: Optional[Dict[str, Any]] = None
+        steps = 0
+        with self.profiler or nullcontext():
+            while True:
+                s = self.algo.step()
+                steps += 1
+                snap = s if snap is None else merge_snapshots(snap, s)
+                # an improved anytime solution goes out at once
+                if s.get("finished") or "solution" in s or steps >= n:
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+        snap["steps"] = steps
+        snap["stats"]["serialize_ms"] = round(self.serialize_time * 1000, 3)
         if snap.get("finished"):
             self.finished = True
-            snap["stats"]["elapsed_ms"] = int((time.time() - self.started_at) * 1000)
+            # elapsed_ms is search time only; wall_ms also counts pauses and the socket
+            stats = snap["stats"]
+            stats["elapsed_ms"] = round(self.algo.expand_time * 1000, 3)
+            stats["wall_ms"] = int((time.time() - self.started_at) * 1000)
+            stats["peak_rss_kb"] = peak_rss_kb()
+            if self.profiler is not None:
+                stats.update(self.profiler.report())
+            self.report()
+            self.last_snapshot = snap
             return {"type": "finished", **snap}
         self.last_snapshot = snap
         return {"type": "snapshot", **snap}
 
+    def edit_obstacles(self, add: List[Tuple[int, int]], remove: List[Tuple[int, int]]) -> Dict[str, Any]:
+        # incremental planners repair their state; the others restart on the edited grid
+        if not self.algo:
+            return {"type": "error", "message": "not started"}
+        restarted = False
+        if hasattr(self.algo, "update_obstacles"):
+            changed = self.algo.update_obstacles(add, remove)
+        else:
+            changed = self.grid.set_obstacles(add, True) + self.grid.set_obstacles(remove, False)
+            if changed:
+                delta = self.algo.delta
+                entry = None
+                if uses_map_caches(self.payload):
+                    # the edited map's own fields and tables, cached in the registry like any other map's
+                    entry = default_registry().entry(self.grid.occ.copy(), self.grid.diagonal)
+                self._use(build_algorithm(self.grid, self.payload, defer_llm=True, entry=entry))
+                self.algo.delta = delta
+                self.llm_pending = isinstance(self.algo, LLMAStarAlgo)
+                self.started_at = time.time()
+                self.last_snapshot = None
+                restarted = True
+        if changed:
+            self.finished = False
+        stats = self.algo.stats()
+        if hasattr(self.algo, "update_obstacles"):
+            stats.update(self.algo.replan_stats())
+        return {"type": "obstacles", "changed": changed, "restarted": restarted, "stats": stats}
+
+    def resync(self) -> Dict[str, Any]:
+        if not self.algo:
+            return {"type": "error", "message": "not started"}
+        current = self.last_snapshot.get("current") if self.last_snapshot else self.grid.start
+        return {"type": "snapshot", **self.algo.resync(current)}
+
+
+@app.post("/solve")
+def solve(payload: StartPayload, max_expansions: Optional[int] = None):
+    # headless search: path, cost, expansions and timing without per-step snapshots. The query
+    # parameter max_expansions is the older spelling of the payload field; both must agree.
+    if max_expansions is not None and payload.max_expansions not in (None, max_expansions):
+        raise HTTPException(422, "max_expansions differs between query and body")
+    if payload.max_expansions is None:
+        payload.max_expansions = max_expansions
+    t0 = time.perf_counter()
+    try:
+        entry = map_entry(payload)
+    except KeyError:
+        raise HTTPException(404, f"unknown map {payload.map_id}")
+    try:
+        check_endpoints(entry, payload)
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+    grid = entry.query_grid(tuple(payload.start), tuple(payload.goal))
+    if not grid.reachable(grid.start, grid.goal):
+        # different components: nothing to search
+        res = {"found": False, "path": [], "cost": None, "expanded": 0, "elapsed_ms": 0.0,
+               "unreachable": True, "setup_ms": round((time.perf_counter() - t0) * 1000, 3)}
+        default_metrics().record_run("solve", planner_name(payload.algorithm), res)
+        return res
+    algo = build_algorithm(grid, payload, entry=entry)
+    setup_ms = (time.perf_counter() - t0) * 1000
+    profiler = RunProfiler(payload.profile, payload.trace_memory)
+    try:
+        with profiler:
+            res = algo.solve(payload.max_expansions)
+        res.update(profiler.report())
+    finally:
+        profiler.close()
+    res["setup_ms"] = round(setup_ms, 3)
+    default_metrics().record_run("solve", planner_name(payload.algorithm), res)
+    return res
+
+
+@app.get("/metrics")
+def metrics():
+    # Prometheus text format, aggregated over every session and request since startup
+    maps = default_registry().stats()
+    extra = {"pathfinder_map_cache_" + k: v for k, v in maps.items()}
+    extra.update({"pathfinder_pool_" + k: v for k, v in default_pool().stats().items()})
+    return PlainTextResponse(default_metrics().render(extra), media_type="text/plain; version=0.0.4")
+
+
+class BatchPayload(MapPayload):
+    queries: List[Tuple[Tuple[int, int], Tuple[int, int]]]
+    diagonal: bool = True
+    algorithm: str = "astar"
+    heuristic: str = "octile"
+    weight: float = 1.0
+    cluster_size: int = 16
+    include_path: bool = False
+    # parallel chunks of this request on the shared pool, at most one per CPU
+    workers: Optional[int] = Field(None, ge=1, le=os.cpu_count() or 1)
+    max_expansions: Optional[int] = None
+
+
+@app.post("/batch")
+def batch(payload: BatchPayload):
+    # NDJSON, one line per query in completion order; match lines to queries by "index"
+    try:
+        grid = map_entry(payload).grid
+    except KeyError:
+        raise HTTPException(404, f"unknown map {payload.map_id}")
+    results = plan_batch(grid, payload.queries, payload.algorithm, payload.heuristic, payload.weight,
+                         payload.cluster_size, workers=payload.workers, include_path=payload.include_path,
+                         max_expansions=payload.max_expansions)
+    return StreamingResponse((json.dumps(r) + "\n" for r in results), media_type="application/x-ndjson")
+
+
+class FlowPayload(MapPayload):
+    goal: Tuple[int, int]
+    starts: List[Tuple[int, int]]
+    diagonal: bool = True
+    include_path: bool = True
+
+
+@app.post("/flowfield")
+def flow_field(payload: FlowPayload):
+    # many starts, one goal: a single flow field (cached per map and goal) answers every start
+    t0 = time.perf_counter()
+    try:
+        entry = map_entry(payload)
+    except KeyError:
+        raise HTTPException(404, f"unknown map {payload.map_id}")
+    if not entry.grid.in_bounds(*payload.goal):
+        raise HTTPException(422, "goal out of bounds")
+    field, cache = entry.flow_field(tuple(payload.goal))
+    t1 = time.perf_counter()
+    results = []
+    for index, start in enumerate(payload.starts):
+        path, cost = field.walk(tuple(start))
+        item: Dict[str, Any] = {"index": index, "start": start, "found": bool(path), "cost": cost, "path_len": len(path)}
+        if payload.include_path:
+            item["path"] = path
+        results.append(item)
+    t2 = time.perf_counter()
+    stats = {"flow_field": cache, "rounds": field.rounds, "reached": field.reached,
+             "field_ms": round((t1 - t0) * 1000, 3), "build_ms": round(field.build_ms, 3),
+             "extract_ms": round((t2 - t1) * 1000, 3)}
+    default_metrics().record_run("flowfield", "flowfield", {"expanded": field.relaxed if cache == "build" else 0})
+    return {"goal": payload.goal, "stats": stats, "results": results}
+
+
+@app.get("/maps")
+def list_maps():
+    return {"maps": default_store().ids()}
+
+
+@app.get("/maps/{map_id}")
+def map_info(map_id: str):
+    try:
+        return default_store().info(map_id)
+    except KeyError:
+        raise HTTPException(404, f"unknown map {map_id}")
+
+
+@app.get("/maps/{map_id}/scenarios")
+def map_scenarios(map_id: str, offset: int = 0, limit: int = 100):
+    try:
+        scen = default_store().scenarios(map_id)
+    except KeyError:
+        raise HTTPException(404, f"unknown map {map_id}")
+    return {"total": len(scen), "scenarios": [asdict(s) for s in scen[offset:offset + max(0, limit)]]}
+
+
+def encode_update(runner: Runner, msg: Dict[str, Any]) -> Union[bytes, str]:
+    # snapshots become packed binary frames when the client asked for them at start, the rest JSON;
+    # encoding time is charged to the run (stats["serialize_ms"] of the following updates)
+    t0 = time.perf_counter()
+    if runner.payload is not None and runner.payload.binary and msg.get("type") in ("snapshot", "finished"):
+        data: Union[bytes, str] = encode_frame(msg)
+    else:
+        data = json.dumps(msg, separators=(",", ":"), ensure_ascii=False)
+    runner.serialize_time += time.perf_counter() - t0
+    return data
+
+
+async def send_update(ws: WebSocket, runner: Runner, msg: Dict[str, Any]):
+    await send_encoded(ws, encode_update(runner, msg))
+
+
+async def send_encoded(ws: WebSocket, data: Union[bytes, str]):
+    if isinstance(data, bytes):
+        await ws.send_bytes(data)
+    else:
+        await ws.send_text(data)
+
+
+_STEPS = ("step", "step_n")
+
+
+def _step_count(cmd: Dict[str, Any]) -> int:
+    return max(1, int(cmd.get("n", 1))) if cmd.get("type") == "step_n" else 1
+
+
+class Session:
+    """One WebSocket connection: its Runner and the commands waiting for the search pool.
+
+    Commands run one at a time and in arrival order on the pool, then the pump sends their
+    replies; nothing else writes to the socket. A step request that arrives while another one
+    still waits is merged into it (one reply covering both), and the socket is not read while
+    ``max_pending`` other commands wait, so a client cannot queue unbounded work.
+    """
+
+    def __init__(self, ws: WebSocket, pool: SearchPool, max_pending: int = 8):
+        self.ws = ws
+        self.pool = pool
+        self.max_pending = max_pending
+        self.runner = Runner()
+        # worker-side guard: a job still running when the connection drops finishes before close
+        self.lock = threading.Lock()
+        self.pending: Deque[Dict[str, Any]] = deque()
+        self.wakeup = asyncio.Event()
+        self.room = asyncio.Event()
+        self.room.set()
+        # (frame interval, steps per frame) while a "run" streams frames
+        self.run_mode: Optional[Tuple[float, int]] = None
+        self.llm_task: Optional[asyncio.Task] = None
+        self.failed = False
+
+    async def put(self, cmd: Dict[str, Any]):
+        t = cmd.get("type")
+        if t in ("start", "reset", "pause"):
+            # take effect at once, not after the queue: streaming stops, and steps queued for the
+            # old search are dropped when a new one starts
+            self.run_mode = None
+            if t != "pause":
+                self.pending = deque(c for c in self.pending if c.get("type") not in _STEPS)
+        if t in _STEPS and self.pending and self.pending[-1].get("type") in _STEPS:
+            last = self.pending[-1]
+            last["n"] = _step_count(last) + _step_count(cmd)
+            last["type"] = "step_n"
+            self.pool.note_coalesced()
+            return
+        while len(self.pending) >= self.max_pending and not self.failed:
+            self.room.clear()
+            await self.room.wait()
+        self.pending.append(cmd)
+        self.wakeup.set()
+
+    async def call(self, fn: Callable[[], Any]) -> Any:
+        def locked():
+            with self.lock:
+                return fn()
+        return await self.pool.call(locked)
+
+    async def send(self, data: Union[bytes, str]):
+        await send_encoded(self.ws, data)
+
+    def _encoded(self, msg: Dict[str, Any]) -> Union[bytes, str]:
+        return encode_update(self.runner, msg)
+
+    async def pump(self):
+        try:
+            while True:
+                if self.pending:
+                    cmd = self.pending.popleft()
+                    self.room.set()
+                    await self.handle(cmd)
+                elif self.run_mode is not None:
+                    await self.frame()
+                else:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            # the client went away mid-send; the reader sees the disconnect and cleans up
+            self.failed = True
+            self.room.set()
+        except Exception:
+            self.failed = True
+            self.room.set()
+            try:
+                await self.ws.close(code=1011)
+            except Exception:
+                pass
+            raise
+
+    def _steps(self, n: int, acc: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], Optional[Union[bytes, str]]]:
+        # up to n steps in slices, yielding the worker when other sessions wait; returns the
+        # merged update and, once it is complete, its encoding
+        runner = self.runner
+        done = acc["steps"] if acc else 0
+        while True:
+            res = self._grown(runner.step(n - done, deadline=time.perf_counter() + self.pool.slice))
+            if res["type"] not in ("snapshot", "finished"):
+                return res, self._encoded(res)
+            done += res["steps"]
+            acc = res if acc is None else merge_snapshots(acc, res)
+            acc["steps"] = done
+            if res["type"] != "snapshot" or done >= n or "solution" in res:
+                return acc, self._encoded(acc)
+            if self.pool.queued:
+                return acc, None
+
+    async def step(self, n: int):
+        acc = None
+        while True:
+            acc, data = await self.call(lambda: self._steps(n, acc))
+            if data is not None:
+                await self.send(data)
+                return
+
+    def _frame(self, interval: float, limit: int) -> Tuple[str, Union[bytes, str]]:
+        # a frame's budget is the frame interval, cut to one slice while other sessions wait
+        budget = min(interval, self.pool.slice) if self.pool.queued else interval
+        res = self._grown(self.runner.step(limit, deadline=time.perf_counter() + budget))
+        return res["type"], self._encoded(res)
+
+    async def frame(self):
+        # stream coalesced updates at roughly the requested frame rate until the search finishes
+        interval, limit = self.run_mode
+        t0 = time.perf_counter()
+        kind, data = await self.call(lambda: self._frame(interval, limit))
+        await self.send(data)
+        if kind != "snapshot":
+            self.run_mode = None
+            return
+        remaining = t0 + interval - time.perf_counter()
+        if remaining > 0 and not self.pending:
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def _start(self, payload: StartPayload) -> List[Union[bytes, str]]:
+        runner = self.runner
+        try:
+            runner.start(payload, map_entry(payload))
+            self.pool.reserve(id(self), runner.footprint())
+        except (KeyError, ValueError, PoolLimitError) as e:
+            runner.close()
+            self.runner = Runner()
+            self.pool.release(id(self))
+            message = f"unknown map {payload.map_id}" if isinstance(e, KeyError) else str(e)
+            return [self._encoded({"type": "error", "message": message})]
+        if runner.unreachable:
+            # start and goal in different components: finished right away
+            return [self._encoded({"type": "ok", "unreachable": True}), self._encoded(runner.step())]
+        out = [self._encoded({"type": "ok"})]
+        try:
+            if payload.delta:
+                out.append(self._encoded(runner.resync()))
+            else:
+                init_snap = runner.algo.snapshot(tuple(payload.start), [], finished=False)
+                out.append(self._encoded({"type": "snapshot", **init_snap}))
+        except Exception:
+            pass
+        return out
+
+    def _grown(self, res: Dict[str, Any]) -> Dict[str, Any]:
+        # the search commits memory as it spreads: extend the reservation, or stop the search with
+        # an error once it no longer fits
+        if self.runner.algo is None:
+            return res
+        try:
+            self.pool.reserve(id(self), self.runner.footprint())
+        except PoolLimitError as e:
+            self._reset()
+            return {"type": "error", "message": str(e)}
+        return res
+
+    def _edit(self, add: List[Tuple[int, int]], remove: List[Tuple[int, int]]) -> Tuple[bool, List[Union[bytes, str]]]:
+        res = self._grown(self.runner.edit_obstacles(add, remove))
+        out = [self._encoded(res)]
+        if res.get("restarted"):
+            out.append(self._encoded(self.runner.resync()))
+        return bool(res.get("restarted")), out
+
+    def _reset(self):
+        self.runner.close()
+        self.runner = Runner()
+        self.pool.release(id(self))
+
+    async def handle(self, cmd: Dict[str, Any]):
+        t = cmd.get("type")
+        if t == "start":
+            self.stop_llm()
+            try:
+                payload = StartPayload(**cmd.get("payload", {}))
+            except ValidationError as e:
+                await self.ws.send_json({"type": "error", "message": "; ".join(err["msg"] for err in e.errors())})
+                return
+            for data in await self.call(lambda: self._start(payload)):
+                await self.send(data)
+            self.fetch_llm()
+        elif t in _STEPS:
+            await self.step(_step_count(cmd))
+        elif t == "run":
+            steps = cmd.get("steps_per_frame")
+            self.run_mode = (1.0 / max(1.0, min(float(cmd.get("fps", 30)), 120.0)),
+                             steps if steps and steps > 0 else 1 << 30)
+        elif t == "pause":
+            await self.ws.send_json({"type": "paused"})
+        elif t in ("add_obstacles", "remove_obstacles"):
+            cells = [tuple(c) for c in cmd.get("cells", [])]
+            add, remove = (cells, []) if t == "add_obstacles" else ([], cells)
+            restarted, out = await self.call(lambda: self._edit(add, remove))
+            for data in out:
+                await self.send(data)
+            if restarted:
+                self.fetch_llm()
+        elif t == "resync":
+            await self.send(await self.call(lambda: self._encoded(self.runner.resync())))
+        elif t == "reset":
+            self.stop_llm()
+            await self.call(self._reset)
+            await self.ws.send_json({"type": "ok"})
+        elif t == "llm_waypoints":
+            # internal: waypoints fetched for cmd["algo"], applied unless the search was replaced
+            algo = cmd["algo"]
+            if self.runner.algo is algo:
+                await self.call(lambda: algo.set_waypoints(cmd["targets"]))
+                algo.llm_cache = algo.provider.last_cache
+                await self.ws.send_json({"type": "llm_waypoints", "targets": cmd["targets"], "llm_cache": algo.llm_cache})
+        else:
+            await self.ws.send_json({"type": "error", "message": "unknown command"})
+
+    def fetch_llm(self):
+        if self.runner.llm_pending:
+            self.stop_llm()
+            self.runner.llm_pending = False
+            self.llm_task = asyncio.create_task(self._fetch_waypoints(self.runner.algo, self.runner.grid))
+
+    async def _fetch_waypoints(self, algo, grid):
+        # the search is already expanding; LLM guidance is switched in when the answer arrives
+        try:
+            targets = await algo.provider.aget_waypoints(grid)
+        except (WebSocketDisconnect, RuntimeError):
+            return
+        await self.put({"type": "llm_waypoints", "algo": algo, "targets": targets})
+
+    def stop_llm(self):
+        if self.llm_task is not None:
+            self.llm_task.cancel()
+            self.llm_task = None
+
 
 @app.websocket("/ws")
 async def ws_endpoint(ws: WebSocket):
+    # the socket is read here; the session's pump runs the search work on the shared pool
+    pool = default_pool()
     await ws.accept()
-    runner = Runner()
+    if not pool.open_session():
+        await ws.send_json({"type": "error", "message": "too many sessions, try again later"})
+        await ws.close(code=1013)
+        return
+    default_metrics().session_opened()
+    session = Session(ws, pool)
+    pump = asyncio.create_task(session.pump())
     try:
-        while True:
+        while not session.failed:
             data = await ws.receive_json()
-            t = data.get("type")
-            if t == "start":
-                payload = StartPayload(**data.get("payload", {}))
-                runner.start(payload)
-                await ws.send_json({"type": "ok"})
-                try:
-                    init_snap = runner.algo.snapshot(tuple(payload.start), [], finished=False)
-                    await ws.send_json({"type": "snapshot", **init_snap})
-                except Exception:
-                    pass
-            elif t == "step":
-                res = runner.step()
-                await ws.send_json(res)
-            elif t == "reset":
-                runner = Runner()
-                await ws.send_json({"type": "ok"})
-            else:
-                await ws.send_json({"type": "error", "message": "unknown command"})
-    except WebSocketDisconnect:
-        return
+            if session.failed:
+                break
+            if data.get("type") == "llm_waypoints":
+                # internal command name, not for clients
+                data = {"type": "unknown"}
+            await session.put(data)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        session.stop_llm()
+        pump.cancel()
+        try:
+            await session.call(lambda: session.runner.close())
+        finally:
+            pool.close_session(id(session))
+            default_metrics().session_closed()
+        try:
+            await pump
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context, shared_memory
+from typing import Iterator, List, Tuple, Dict, Any, Optional, Sequence
+import os
+import threading
+import time
+
+import numpy as np
+
+from .algorithms.grid import Grid
+from .planners import make_algorithm
+from .registry import MapEntry, default_registry
+
+Query = Tuple[Tuple[int, int], Tuple[int, int]]
+
+# per-process registry entries of the maps this worker saw last, by shared-memory name; the
+# worker's own registry keeps their landmark tables and flow fields between chunks and requests
+_GRIDS: "OrderedDict[str, Tuple[shared_memory.SharedMemory, MapEntry]]" = OrderedDict()
+_WORKER_MAPS = 2
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # the parent owns and unlinks the segment; spawned workers share its resource tracker
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_entry(shm_name: str, size: int, diagonal: bool) -> MapEntry:
+    found = _GRIDS.get(shm_name)
+    if found is not None:
+        _GRIDS.move_to_end(shm_name)
+        return found[1]
+    shm = _attach(shm_name)
+    occ = np.ndarray((size, size), dtype=np.uint8, buffer=shm.buf)
+    occ.flags.writeable = False
+    entry = default_registry().entry(occ, diagonal)
+    # labels once per worker and map, so every query's endpoints share them for the unreachable check
+    entry.grid.components()
+    _GRIDS[shm_name] = (shm, entry)
+    while len(_GRIDS) > _WORKER_MAPS:
+        old, dropped = _GRIDS.popitem(last=False)[1]
+        if all(e is not dropped for _, e in _GRIDS.values()):
+            default_registry().discard(dropped.key)
+        try:
+            old.close()
+        except BufferError:
+            pass
+    return entry
+
+
+def _run_chunk(map_key: Tuple[str, int, bool], options: Dict[str, Any], chunk: List[Tuple[int, Tuple[int, int], Tuple[int, int]]],
+               include_path: bool, max_expansions: Optional[int]) -> List[Dict[str, Any]]:
+    entry = _worker_entry(*map_key)
+    grid = entry.grid
+    out = []
+    for index, start, goal in chunk:
+        item: Dict[str, Any] = {"index": index, "start": start, "goal": goal}
+        if not (grid.in_bounds(*start) and grid.in_bounds(*goal)):
+            item["error"] = "start or goal out of bounds"
+            out.append(item)
+            continue
+        t0 = time.perf_counter()
+        try:
+            res = make_algorithm(entry.query_grid(start, goal), **options, entry=entry).solve(max_expansions)
+        except Exception as e:
+            item["error"] = str(e)
+            out.append(item)
+            continue
+        path = res.pop("path")
+        item.update(res)
+        item["path_len"] = len(path)
+        item["total_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        item["worker"] = os.getpid()
+        if include_path:
+            item["path"] = path
+        out.append(item)
+    return out
+
+
+class BatchPool:
+    """Long-lived process pool shared by every batch request.
+
+    Workers are spawned rather than forked (safe from inside a threaded server), on demand up to
+    ``workers``, and stay alive between requests, so a request does not pay interpreter startup.
+    Each request's map travels as a shared-memory name; a worker attaches it on first use and keeps
+    the last few maps it saw, with their landmark tables and flow fields, in its own registry.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+_DEFAULT: Optional[BatchPool] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_batch_pool() -> BatchPool:
+    # server-wide pool of BATCH_WORKERS processes (default: the CPU count, also the most allowed)
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            cpus = os.cpu_count() or 1
+            _DEFAULT = BatchPool(min(int(os.getenv("BATCH_WORKERS", "0")) or cpus, cpus))
+        return _DEFAULT
+
+
+def plan_batch(grid: Grid, queries: Sequence[Query], algorithm: str = "astar", heuristic: str = "octile", weight: float = 1.0,
+               cluster_size: int = 16, workers: Optional[int] = None, chunk_size: Optional[int] = None,
+               include_path: bool = False, max_expansions: Optional[int] = None,
+               pool: Optional[BatchPool] = None) -> Iterator[Dict[str, Any]]:
+    """Solve many start/goal pairs on one map across the shared process pool.
+
+    The occupancy array is copied once into shared memory and every worker builds its Grid from
+    it once, so tasks only carry the queries. ``workers`` bounds how many chunks of this request
+    run at the same time (at most the pool size). Results are yielded in completion order (chunk
+    by chunk), each tagged with the query's ``index``.
+    """
+    items = [(i, tuple(s), tuple(g)) for i, (s, g) in enumerate(queries)]
+    if not items:
+        return
+    pool = pool or default_batch_pool()
+    workers = max(1, min(workers or pool.workers, pool.workers, len(items)))
+    chunk = chunk_size or max(1, min(64, len(items) // (workers * 8)))
+    options = {"algorithm": algorithm, "heuristic": heuristic, "weight": weight, "cluster_size": cluster_size}
+    shm = shared_memory.SharedMemory(create=True, size=max(1, grid.occ.nbytes))
+    running = set()
+    try:
+        np.ndarray(grid.occ.shape, dtype=np.uint8, buffer=shm.buf)[:] = grid.occ
+        map_key = (shm.name, grid.size, grid.diagonal)
+        chunks = (items[k:k + chunk] for k in range(0, len(items), chunk))
+        for part in chunks:
+            running.add(pool.executor.submit(_run_chunk, map_key, options, part, include_path, max_expansions))
+            if len(running) < workers:
+                continue
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield from fut.result()
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield from fut.result()
+    finally:
+        for fut in running:
+            fut.cancel()
+        shm.close()
+        shm.unlink()
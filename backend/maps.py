@@ -0,0 +1,70 @@
+from typing import Dict, List, Optional, Any
+import os
+import re
+
+import numpy as np
+
+from .algorithms.mapfile import Scenario, load_map, load_scenarios
+
+_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+_EXTS = (".map", ".pbm")
+
+
+class MapStore:
+    """Maps preloaded from a directory, referenced by ID (the file name without extension).
+
+    ``foo.map`` or ``foo.pbm`` becomes map ``foo``; a MovingAI ``foo.map.scen`` next to it provides
+    its scenarios. ``get`` reads the file on every call and keeps nothing; the web app loads maps
+    through the map registry, which holds them (read-only) under its memory budget.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, map_id: str) -> Optional[str]:
+        if not _ID.match(map_id):
+            return None
+        for ext in _EXTS:
+            path = os.path.join(self.directory, map_id + ext)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def ids(self) -> List[str]:
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return []
+        found = [n[: -len(ext)] for n in names for ext in _EXTS if n.endswith(ext)]
+        return list(dict.fromkeys(i for i in found if _ID.match(i)))
+
+    def get(self, map_id: str) -> np.ndarray:
+        path = self._path(map_id)
+        if path is None:
+            raise KeyError(map_id)
+        occ = load_map(path)
+        occ.flags.writeable = False
+        return occ
+
+    def scenarios(self, map_id: str) -> List[Scenario]:
+        path = self._path(map_id)
+        if path is None:
+            raise KeyError(map_id)
+        scen = path + ".scen"
+        return load_scenarios(scen) if os.path.isfile(scen) else []
+
+    def info(self, map_id: str) -> Dict[str, Any]:
+        occ = self.get(map_id)
+        return {"id": map_id, "size": int(occ.shape[0]), "obstacles": int(np.count_nonzero(occ)),
+                "scenarios": len(self.scenarios(map_id))}
+
+
+_DEFAULT: Optional[MapStore] = None
+
+
+def default_store() -> MapStore:
+    # server-wide store over MAP_DIR (default "maps")
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = MapStore(os.getenv("MAP_DIR", "maps"))
+    return _DEFAULT
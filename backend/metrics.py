@@ -0,0 +1,173 @@
+"""Search instrumentation shared by the web app: server-wide aggregates for ``GET /metrics``
+(Prometheus text format) and optional per-run cProfile/tracemalloc."""
+from collections import defaultdict
+from typing import Dict, Any, Optional, Tuple
+import cProfile
+import pstats
+import threading
+import tracemalloc
+
+from .algorithms.base import mapped_peak, reset_mapped_peak
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+# per-run counters from SearchBase.stats() that are summed into Prometheus counters
+_COUNTERS = (
+    ("expanded", "pathfinder_expanded_total", "Nodes expanded."),
+    ("generated", "pathfinder_generated_total", "Nodes generated (first push of a cell)."),
+    ("reopened", "pathfinder_reopened_total", "Pushes of a cell already in OPEN or CLOSED."),
+    ("heap_ops", "pathfinder_heap_ops_total", "OPEN heap pushes and pops."),
+)
+# per-run times in ms, exported in seconds by phase
+_PHASES = (("expand_ms", "expand"), ("heuristic_ms", "heuristic"), ("snapshot_ms", "snapshot"), ("serialize_ms", "serialize"))
+
+
+def peak_rss_kb() -> Optional[int]:
+    # high-water mark of the whole process (kB on Linux)
+    if resource is None:
+        return None
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _escape(value: str) -> str:
+    # label values in the text format escape backslash, double quote and line feed
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**kv: str) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in kv.items()) + "}"
+
+
+class SearchMetrics:
+    """Totals over every session and request since the server started."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sessions = 0
+        self.runs: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.unreachable: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.peak_open = 0
+
+    def session_opened(self):
+        with self._lock:
+            self.sessions += 1
+
+    def session_closed(self):
+        with self._lock:
+            self.sessions -= 1
+
+    def record_run(self, mode: str, algorithm: str, stats: Dict[str, Any], count_run: bool = True):
+        # mode is the entry point ("ws" or "solve"); stats as in a finished snapshot. A search that
+        # is reported in parts (paused, replanned) passes the increments with count_run only once.
+        with self._lock:
+            if count_run:
+                self.runs[(mode, algorithm)] += 1
+            if stats.get("unreachable"):
+                self.unreachable[algorithm] += 1
+            for key, _, _ in _COUNTERS:
+                self.counters[(key, algorithm)] += stats.get(key, 0)
+            for key, phase in _PHASES:
+                self.seconds[(phase, algorithm)] += stats.get(key, 0.0) / 1000.0
+            self.peak_open = max(self.peak_open, stats.get("peak_open", 0))
+
+    def render(self, extra: Optional[Dict[str, Any]] = None) -> str:
+        # Prometheus text exposition format 0.0.4; extra adds untyped gauges by name
+        lines = []
+
+        def family(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family("pathfinder_sessions", "gauge", "Open WebSocket sessions.")
+            lines.append(f"pathfinder_sessions {self.sessions}")
+            family("pathfinder_runs_total", "counter", "Searches run, by entry point and algorithm.")
+            for (mode, algo), n in sorted(self.runs.items()):
+                lines.append(f"pathfinder_runs_total{_labels(mode=mode, algorithm=algo)} {n}")
+            family("pathfinder_unreachable_total", "counter", "Searches answered as unreachable.")
+            for algo, n in sorted(self.unreachable.items()):
+                lines.append(f"pathfinder_unreachable_total{_labels(algorithm=algo)} {n}")
+            for key, name, help_text in _COUNTERS:
+                family(name, "counter", help_text)
+                for (k, algo), v in sorted(self.counters.items()):
+                    if k == key:
+                        lines.append(f"{name}{_labels(algorithm=algo)} {int(v)}")
+            family("pathfinder_search_seconds_total", "counter", "Search time by phase.")
+            for (phase, algo), v in sorted(self.seconds.items()):
+                lines.append(f"pathfinder_search_seconds_total{_labels(phase=phase, algorithm=algo)} {v:.6f}")
+            family("pathfinder_peak_open", "gauge", "Largest OPEN list seen in any run.")
+            lines.append(f"pathfinder_peak_open {self.peak_open}")
+        rss = peak_rss_kb()
+        if rss is not None:
+            family("pathfinder_process_peak_rss_bytes", "gauge", "Peak resident memory of the server process.")
+            lines.append(f"pathfinder_process_peak_rss_bytes {rss * 1024}")
+        for name, value in (extra or {}).items():
+            family(name, "gauge", name.replace("_", " ") + ".")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class RunProfiler:
+    """Optional cProfile and tracemalloc for one run, enabled only while the search itself works.
+
+    tracemalloc is process-wide, so its peak also covers whatever other sessions allocate meanwhile.
+    Only one cProfile can be active per thread; a run that cannot get it reports ``profile_error``.
+    """
+
+    def __init__(self, profile: bool = False, trace_memory: bool = False):
+        self.profiler = cProfile.Profile() if profile else None
+        self.error: Optional[str] = None
+        self.trace_memory = trace_memory
+        self._owns_tracing = False
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+            tracemalloc.reset_peak()
+            reset_mapped_peak()
+
+    def __enter__(self):
+        if self.profiler is not None:
+            try:
+                self.profiler.enable()
+            except ValueError as e:
+                self.error = str(e)
+                self.profiler = None
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def report(self, top: int = 15) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        if self.profiler is not None:
+            st = pstats.Stats(self.profiler).stats
+            rows = sorted(st.items(), key=lambda kv: kv[1][2], reverse=True)[:top]
+            out["profile"] = [
+                {"func": f"{fn}:{line}({name})", "calls": nc, "tottime_ms": round(tt * 1000, 3), "cumtime_ms": round(ct * 1000, 3)}
+                for (fn, line, name), (_, nc, tt, ct, _) in rows
+            ]
+        elif self.error:
+            out["profile_error"] = self.error
+        if self.trace_memory and tracemalloc.is_tracing():
+            # plus the mmap-backed search arrays, which tracemalloc does not see
+            out["traced_peak_kb"] = (tracemalloc.get_traced_memory()[1] + mapped_peak()) // 1024
+        return out
+
+    def close(self):
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+
+_DEFAULT = SearchMetrics()
+
+
+def default_metrics() -> SearchMetrics:
+    return _DEFAULT
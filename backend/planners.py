@@ -0,0 +1,73 @@
+from typing import Optional
+import os
+
+import numpy as np
+
+from .algorithms.grid import Grid
+from .algorithms.astar import AStar, Heuristic
+from .algorithms.dijkstra import Dijkstra
+from .algorithms.greedy import GreedyBestFirst
+from .algorithms.jps import JumpPointSearch
+from .algorithms.hpa import HPAStar
+from .algorithms.dstar_lite import DStarLite
+from .algorithms.bidirectional import BidirectionalAStar
+from .algorithms.flowfield import FlowFieldPlanner
+from .algorithms.arastar import ARAStar
+from .algorithms.landmarks import alt_heuristic
+from .algorithms.llm_astar import LLMAStar
+
+ALGORITHMS = ("astar", "dijkstra", "greedy", "jps", "hpa", "bidirectional", "dstar", "flowfield", "arastar", "llm_astar")
+
+
+def planner_name(algorithm: str) -> str:
+    # the planner make_algorithm actually runs: unknown names fall back to A*
+    return algorithm if algorithm in ALGORITHMS else "astar"
+
+
+def make_algorithm(grid: Grid, algorithm: str = "astar", heuristic: str = "octile", weight: float = 1.0,
+                   cluster_size: int = 16, llm_enabled: bool = False, defer_llm: bool = False,
+                   h_field: Optional[np.ndarray] = None, time_limit_ms: Optional[float] = None,
+                   max_expansions: Optional[int] = None, entry=None):
+    # algorithm dispatch shared by the web app and the batch workers
+    # defer_llm: LLM-guided searches start with [start, goal] and get their waypoints later
+    # h_field: exact distances to the goal for A*; a hair of extra weight breaks the f-ties along
+    # optimal paths toward the goal (cost gaps on the grid are far larger than the 1e-9 inflation)
+    # time_limit_ms / max_expansions: budget of the anytime planner, whose weight is the initial one
+    # HPA* weighs its abstract search by 1.1 unless a larger weight is given
+    # heuristic "alt": landmark bounds for A* and ARA*; the others use octile
+    # entry: the grid's map in the registry (backend.registry.MapEntry), which keeps landmark tables
+    # and flow fields under its memory budget; without it they are built for this search alone
+    llm_flag = llm_enabled or os.getenv("LLM_GUIDE", "0") in ("1", "true", "True")
+    waypoints = [grid.start, grid.goal] if defer_llm else None
+    h = getattr(Heuristic, heuristic, Heuristic.octile)
+    h_stats = None
+    if heuristic == "alt" and algorithm in ("astar", "arastar") and not (algorithm == "astar" and llm_flag):
+        h_field, h_stats = alt_heuristic(grid, entry)
+    if algorithm == "astar":
+        if llm_flag:
+            return LLMAStar(grid, heuristic=h, weight=weight, waypoints=waypoints)
+        if h_stats is not None:
+            return AStar(grid, heuristic=h, weight=weight, h_field=h_field, h_stats=h_stats)
+        if h_field is not None:
+            return AStar(grid, heuristic=h, weight=weight * (1 + 1e-9), h_field=h_field)
+        return AStar(grid, heuristic=h, weight=weight)
+    elif algorithm == "dijkstra":
+        return Dijkstra(grid)
+    elif algorithm == "greedy":
+        return GreedyBestFirst(grid, heuristic=h)
+    elif algorithm == "jps":
+        return JumpPointSearch(grid, heuristic=h)
+    elif algorithm == "hpa":
+        return HPAStar(grid, heuristic=h, cluster_size=max(4, cluster_size), weight=weight if weight > 1 else 1.1)
+    elif algorithm == "bidirectional":
+        return BidirectionalAStar(grid, heuristic=h)
+    elif algorithm == "dstar":
+        return DStarLite(grid, heuristic=h)
+    elif algorithm == "flowfield":
+        return FlowFieldPlanner(grid, entry)
+    elif algorithm == "arastar":
+        return ARAStar(grid, heuristic=h, weight=weight if weight > 1 else 3.0,
+                       time_limit_ms=time_limit_ms, max_expansions=max_expansions, h_field=h_field, h_stats=h_stats)
+    elif algorithm == "llm_astar":
+        return LLMAStar(grid, heuristic=h, weight=weight, waypoints=waypoints)
+    return AStar(grid, heuristic=Heuristic.octile)
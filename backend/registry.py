@@ -0,0 +1,216 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, Tuple
+import os
+import threading
+
+import numpy as np
+
+from .algorithms.dijkstra import distance_field
+from .algorithms.flowfield import FlowField
+from .algorithms.grid import Grid, occupancy_fingerprint
+from .algorithms.landmarks import Landmarks
+
+
+class MapEntry:
+    """One map shared by every session and request: a frozen Grid plus caches computed on demand.
+
+    Component labels live on the shared grid. Per goal it keeps distance fields (exact h for the
+    ``"exact"`` heuristic) and flow fields, at most ``max_fields`` of each, least recently used
+    first out; a goal's flow field takes over its distance field, which it contains. ALT landmark
+    tables are kept per landmark count. All of them count toward the registry's budget.
+    """
+
+    def __init__(self, registry: "MapRegistry", key: str, grid: Grid, max_fields: int):
+        self.registry = registry
+        self.key = key
+        self.grid = grid
+        self.max_fields = max_fields
+        self._fields: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        self._flows: "OrderedDict[Tuple[int, int], FlowField]" = OrderedDict()
+        self._landmarks: Dict[int, Landmarks] = {}
+        self._lock = threading.Lock()
+
+    def nbytes(self) -> int:
+        labels = self.grid._labels
+        with self._lock:
+            cached = (sum(f.nbytes for f in self._fields.values()) + sum(f.nbytes for f in self._flows.values())
+                      + sum(lm.nbytes for lm in self._landmarks.values()))
+        return self.grid.occ.nbytes + self.grid.mask.nbytes + (labels.nbytes if labels is not None else 0) + cached
+
+    def query_grid(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Grid:
+        # read-only view with these endpoints; labels are computed once on the shared grid first
+        self.grid.components()
+        return self.grid.with_endpoints(start, goal)
+
+    def distance_field(self, goal: Tuple[int, int]) -> np.ndarray:
+        goal = tuple(goal)
+        with self._lock:
+            flow = self._flows.get(goal)
+            if flow is not None:
+                return flow.integration
+            field = self._fields.get(goal)
+            if field is not None:
+                self._fields.move_to_end(goal)
+                return field
+        field = distance_field(self.grid, goal)
+        field.flags.writeable = False
+        with self._lock:
+            field = self._fields.setdefault(goal, field)
+            self._fields.move_to_end(goal)
+            while len(self._fields) > self.max_fields:
+                self._fields.popitem(last=False)
+        self.registry._evict(self.key)
+        return field
+
+    def cached_flow_field(self, goal: Tuple[int, int]) -> Optional[FlowField]:
+        goal = tuple(goal)
+        with self._lock:
+            flow = self._flows.get(goal)
+            if flow is not None:
+                self._flows.move_to_end(goal)
+            return flow
+
+    def store_flow_field(self, flow: FlowField) -> FlowField:
+        # returns the cached field, which may be one stored meanwhile by another request
+        with self._lock:
+            flow = self._flows.setdefault(flow.goal, flow)
+            self._flows.move_to_end(flow.goal)
+            self._fields.pop(flow.goal, None)
+            while len(self._flows) > self.max_fields:
+                self._flows.popitem(last=False)
+        self.registry._evict(self.key)
+        return flow
+
+    def flow_field(self, goal: Tuple[int, int]) -> Tuple[FlowField, str]:
+        # (field, "hit" | "build"); a cached distance field to this goal spares the wavefront
+        flow = self.cached_flow_field(goal)
+        if flow is not None:
+            return flow, "hit"
+        with self._lock:
+            dist = self._fields.get(tuple(goal))
+        return self.store_flow_field(FlowField(self.grid, goal, None if dist is None else dist.reshape(-1))), "build"
+
+    def landmarks(self, k: int = 8) -> Tuple[Landmarks, str]:
+        # (ALT tables, "hit" | "build")
+        with self._lock:
+            found = self._landmarks.get(k)
+        if found is not None:
+            return found, "hit"
+        landmarks = Landmarks(self.grid, k)
+        with self._lock:
+            landmarks = self._landmarks.setdefault(k, landmarks)
+        self.registry._evict(self.key)
+        return landmarks, "build"
+
+    def _trim_fields(self) -> bool:
+        # drop the oldest distance field, else the oldest flow field, keeping the newest of each;
+        # False when nothing is left to drop
+        with self._lock:
+            for cache in (self._fields, self._flows):
+                if len(cache) > 1:
+                    cache.popitem(last=False)
+                    return True
+            return False
+
+
+class MapRegistry:
+    """Server-wide maps keyed by content hash (``Grid.fingerprint()``), bounded to ``max_bytes``.
+
+    Least recently used maps are evicted first; a map that alone is over budget sheds its older
+    distance and flow fields instead. The registry takes ownership of the occupancy arrays it is given.
+    Preloaded maps are also found by name (``named``) while their entry is cached, so they are
+    loaded and hashed only once and leave memory together with their entry.
+    """
+
+    def __init__(self, max_bytes: int = 512 << 20, max_fields: int = 16):
+        self.max_bytes = max_bytes
+        self.max_fields = max_fields
+        self._entries: "OrderedDict[str, MapEntry]" = OrderedDict()
+        self._names: Dict[Tuple[str, bool], str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self, occ: np.ndarray, diagonal: bool) -> MapEntry:
+        key = occupancy_fingerprint(occ, diagonal)
+        with self._lock:
+            e = self._entries.get(key)
+            if e is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return e
+        grid = Grid.from_array(occ, (0, 0), (0, 0), diagonal).freeze()
+        # the key is the grid's fingerprint; query grids copy it instead of hashing the map again
+        grid._fingerprint = key
+        with self._lock:
+            e = self._entries.get(key)
+            if e is None:
+                e = self._entries[key] = MapEntry(self, key, grid, self.max_fields)
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._entries.move_to_end(key)
+        self._evict(key)
+        return e
+
+    def named(self, name: str, diagonal: bool, load: Callable[[], np.ndarray]) -> MapEntry:
+        # entry of a preloaded map; load() reads it again only after the entry was evicted
+        with self._lock:
+            e = self._entries.get(self._names.get((name, diagonal), ""))
+            if e is not None:
+                self._entries.move_to_end(e.key)
+                self.hits += 1
+                return e
+        e = self.entry(load(), diagonal)
+        with self._lock:
+            if e.key in self._entries:
+                self._names[(name, diagonal)] = e.key
+        return e
+
+    def _evict(self, keep: str):
+        with self._lock:
+            entries = list(self._entries.values())
+        total = sum(e.nbytes() for e in entries)
+        for e in entries:
+            if total <= self.max_bytes:
+                return
+            if e.key == keep:
+                continue
+            with self._lock:
+                if self._entries.pop(e.key, None) is not None:
+                    total -= e.nbytes()
+                    self._names = {n: k for n, k in self._names.items() if k != e.key}
+        kept = self._entries.get(keep)
+        while kept is not None and total > self.max_bytes:
+            before = kept.nbytes()
+            if not kept._trim_fields():
+                return
+            total -= before - kept.nbytes()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {"maps": len(entries), "bytes": sum(e.nbytes() for e in entries), "hits": self.hits, "misses": self.misses}
+
+    def discard(self, key: str):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._names = {n: k for n, k in self._names.items() if k != key}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._names.clear()
+
+
+_DEFAULT: Optional[MapRegistry] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_registry() -> MapRegistry:
+    # server-wide registry bounded by MAP_CACHE_MB (default 512)
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = MapRegistry(max_bytes=int(float(os.getenv("MAP_CACHE_MB", "512")) * (1 << 20)))
+        return _DEFAULT
@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional, TypeVar
+import asyncio
+import os
+import threading
+
+T = TypeVar("T")
+
+
+class PoolLimitError(Exception):
+    pass
+
+
+class SearchPool:
+    """Bounded thread pool for the CPU-bound work of WebSocket sessions, plus admission limits.
+
+    Every session keeps at most one job in flight (its commands run in order) and the pool starts
+    jobs first-in first-out, so sessions with work take turns: a long run only gets one slice
+    (``slice_ms`` of search) per turn. Searches are pure Python, so the threads do not add
+    throughput; they keep the event loop free to move messages while searches run.
+
+    Sessions are admitted up to ``max_sessions``. Each one reserves the memory its search holds,
+    when it starts and again as the search grows: at most ``session_bytes``, and ``total_bytes``
+    over all sessions together.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_sessions: int = 64, session_bytes: int = 256 << 20,
+                 total_bytes: int = 2 << 30, slice_ms: float = 20.0):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="search")
+        self.max_sessions = max_sessions
+        self.session_bytes = session_bytes
+        self.total_bytes = total_bytes
+        self.slice = slice_ms / 1000
+        self._lock = threading.Lock()
+        self.sessions = 0
+        self.reserved: Dict[int, int] = {}
+        self.queued = 0
+        self.running = 0
+        self.rejected = 0
+        self.coalesced = 0
+
+    def open_session(self) -> bool:
+        with self._lock:
+            if self.sessions >= self.max_sessions:
+                self.rejected += 1
+                return False
+            self.sessions += 1
+            return True
+
+    def close_session(self, session: int):
+        with self._lock:
+            self.sessions -= 1
+            self.reserved.pop(session, None)
+
+    def reserve(self, session: int, nbytes: int):
+        # replaces the session's previous reservation; PoolLimitError when it does not fit
+        with self._lock:
+            if nbytes > self.session_bytes:
+                raise PoolLimitError(f"search needs {nbytes >> 20} MB, over the {self.session_bytes >> 20} MB per session")
+            others = sum(v for k, v in self.reserved.items() if k != session)
+            if others + nbytes > self.total_bytes:
+                raise PoolLimitError("server is at its search memory limit, try again later")
+            self.reserved[session] = nbytes
+
+    def release(self, session: int):
+        with self._lock:
+            self.reserved.pop(session, None)
+
+    def note_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
+
+    def _run(self, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    async def call(self, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self.queued += 1
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._run, fn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"workers": self.workers, "queued": self.queued, "running": self.running,
+                    "sessions_rejected": self.rejected, "steps_coalesced": self.coalesced,
+                    "reserved_bytes": sum(self.reserved.values())}
+
+
+_DEFAULT: Optional[SearchPool] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_pool() -> SearchPool:
+    # server-wide pool: SEARCH_WORKERS threads (default min(4, CPUs)), MAX_SESSIONS (64),
+    # SESSION_MB (256) per session and SESSIONS_MB (2048) in total
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            workers = int(os.getenv("SEARCH_WORKERS", "0")) or None
+            _DEFAULT = SearchPool(workers, int(os.getenv("MAX_SESSIONS", "64")),
+                                  int(float(os.getenv("SESSION_MB", "256")) * (1 << 20)),
+                                  int(float(os.getenv("SESSIONS_MB", "2048")) * (1 << 20)))
+        return _DEFAULT
@@ -0,0 +1,78 @@
+from array import array
+from itertools import chain
+from typing import Any, Dict, List
+import json
+import struct
+import sys
+
+# Binary snapshot frame (opt-in with StartPayload.binary), all little-endian:
+#   uint8 version | uint32 header length | header JSON | zero padding to a 4-byte boundary | sections
+# The header is the message with its bulky lists taken out and an "arrays" list of
+# [dotted path, kind, count] describing the sections in order. Kind "open" is count (x, y)
+# uint16 pairs followed by count (g, h, f) float32 triples; kind "xy" is count (x, y) uint16 pairs.
+# Every section length is a multiple of 4, so each one can be viewed as a typed array in place.
+VERSION = 1
+_OPEN_KEYS = ("open", "open_add", "open_update")
+_XY_KEYS = ("closed", "closed_add", "open_remove", "path")
+_NESTED = ("delta", "backward")
+_HEAD = struct.Struct("<BI")
+
+
+def _pack(msg: Dict[str, Any], prefix: str, arrays: List[list], chunks: List[array]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for k, v in msg.items():
+        if k in _NESTED and isinstance(v, dict):
+            out[k] = _pack(v, f"{prefix}{k}.", arrays, chunks)
+        elif k in _OPEN_KEYS and isinstance(v, list):
+            arrays.append([prefix + k, "open", len(v)])
+            chunks.append(array("H", chain.from_iterable(e[0] for e in v)))
+            chunks.append(array("f", chain.from_iterable(e[1:] for e in v)))
+        elif k in _XY_KEYS and isinstance(v, list):
+            arrays.append([prefix + k, "xy", len(v)])
+            chunks.append(array("H", chain.from_iterable(v)))
+        else:
+            out[k] = v
+    return out
+
+
+def encode_frame(msg: Dict[str, Any]) -> bytes:
+    arrays: List[list] = []
+    chunks: List[array] = []
+    header = _pack(msg, "", arrays, chunks)
+    header["arrays"] = arrays
+    head = json.dumps(header, separators=(",", ":")).encode()
+    parts = [_HEAD.pack(VERSION, len(head)), head, b"\0" * (-(_HEAD.size + len(head)) % 4)]
+    for c in chunks:
+        if sys.byteorder == "big":
+            c.byteswap()
+        parts.append(c.tobytes())
+    return b"".join(parts)
+
+
+def decode_frame(data: bytes) -> Dict[str, Any]:
+    # inverse of encode_frame; entries come back as tuples with float32-rounded g/h/f
+    version, n = _HEAD.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"unsupported frame version {version}")
+    msg = json.loads(data[_HEAD.size:_HEAD.size + n])
+    off = (_HEAD.size + n + 3) & ~3
+    for path, kind, count in msg.pop("arrays"):
+        xy = array("H", data[off:off + 4 * count])
+        off += 4 * count
+        if sys.byteorder == "big":
+            xy.byteswap()
+        coords = list(zip(xy[0::2], xy[1::2]))
+        if kind == "open":
+            vals = array("f", data[off:off + 12 * count])
+            off += 12 * count
+            if sys.byteorder == "big":
+                vals.byteswap()
+            items: list = [(c, vals[3 * i], vals[3 * i + 1], vals[3 * i + 2]) for i, c in enumerate(coords)]
+        else:
+            items = coords
+        *parents, leaf = path.split(".")
+        target = msg
+        for p in parents:
+            target = target[p]
+        target[leaf] = items
+    return msg
@@ -0,0 +1,77 @@
+"""Compare lazy-deletion decrease-key against the previous heapify-on-improve OPEN list.
+
+Run from the repository root: ``python -m benchmarks.bench_open_list``
+"""
+import argparse
+import heapq
+import random
+import time
+
+from backend.algorithms.base import OPEN
+from backend.algorithms.grid import Grid
+from backend.algorithms.astar import AStar, Heuristic
+from backend.algorithms.dijkstra import Dijkstra
+
+
+class _HeapifyOnImprove:
+    # previous behaviour: rewrite the improved entry in place and heapify the whole OPEN list
+    def _push_open(self, i, g, h, f, parent, key=None):
+        if not self._state[i] & OPEN:
+            return super()._push_open(i, g, h, f, parent, key)
+        self._track_open(i)
+        self._g[i], self._h[i], self._f[i], self._parent[i] = g, h, f, parent
+        seq = self._seq_of[i]
+        for k, e in enumerate(self.open):
+            if e[2] == i and e[1] == seq:
+                self.open[k] = (f, seq, i)
+                break
+        heapq.heapify(self.open)
+
+
+class HeapifyDijkstra(_HeapifyOnImprove, Dijkstra):
+    pass
+
+
+class HeapifyAStar(_HeapifyOnImprove, AStar):
+    pass
+
+
+def make_grid(size: int, density: float, seed: int) -> Grid:
+    rng = random.Random(seed)
+    obstacles = {(rng.randrange(size), rng.randrange(size)) for _ in range(int(size * size * density))}
+    obstacles.discard((0, 0))
+    obstacles.discard((size - 1, size - 1))
+    return Grid(size, obstacles, (0, 0), (size - 1, size - 1), True)
+
+
+def timed(factory, grid):
+    algo = factory(grid)
+    t0 = time.perf_counter()
+    res = algo.solve()
+    return time.perf_counter() - t0, res
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 300])
+    ap.add_argument("--density", type=float, default=0.25)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    cases = [
+        ("dijkstra", Dijkstra, HeapifyDijkstra),
+        ("astar-octile", AStar, HeapifyAStar),
+        ("astar-euclidean", lambda g: AStar(g, heuristic=Heuristic.euclidean),
+         lambda g: HeapifyAStar(g, heuristic=Heuristic.euclidean)),
+    ]
+    print(f"{'algorithm':<16}{'size':>6}{'expanded':>10}{'heapify s':>12}{'lazy s':>10}{'speedup':>9}")
+    for size in args.sizes:
+        grid = make_grid(size, args.density, args.seed)
+        for name, new, old in cases:
+            t_old, r_old = timed(old, grid)
+            t_new, r_new = timed(new, grid)
+            assert r_old["cost"] == r_new["cost"] or abs(r_old["cost"] - r_new["cost"]) < 1e-9
+            print(f"{name:<16}{size:>6}{r_new['expanded']:>10}{t_old:>12.3f}{t_new:>10.3f}{t_old / t_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
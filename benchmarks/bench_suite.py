@@ -0,0 +1,199 @@
+"""Benchmark every planner across seeded map kinds, sizes and obstacle densities.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_suite --sizes 64 256 --out bench.json
+    python -m benchmarks.bench_suite --compare old.json new.json
+
+Each run reports setup and solve wall time, expansions per second, tracemalloc peak memory of a
+second (traced) run, and the path-cost gap against an optimal A* reference. LLM-A* uses a stub
+provider that answers with a straight line, so no network is involved.
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.algorithms import hpa
+from backend.algorithms.astar import AStar, Heuristic
+from backend.algorithms.base import mapped_peak, reset_mapped_peak
+from backend.algorithms.grid import Grid
+from backend.algorithms.llm_astar import LLMAStar, LLMWaypointProvider
+from backend.algorithms.llm_cache import WaypointCache
+from backend.planners import make_algorithm
+
+from .maps import KINDS, make_map
+
+ALGORITHMS = ("astar", "dijkstra", "greedy", "llm_astar", "jps", "hpa", "bidirectional", "dstar", "flowfield", "arastar")
+
+
+class StubProvider(LLMWaypointProvider):
+    # goes through barrier compression and the cache like the real provider, minus the HTTP call
+    def __init__(self, points: int = 4):
+        super().__init__(cache=WaypointCache())
+        self.api_key = "stub"
+        self.points = points
+
+    def _fetch(self, start, goal, hbars, vbars) -> List[Tuple[int, int]]:
+        (sx, sy), (gx, gy) = start, goal
+        n = self.points + 1
+        return [(round(sx + (gx - sx) * i / n), round(sy + (gy - sy) * i / n)) for i in range(n + 1)]
+
+
+def build(grid: Grid, algorithm: str, heuristic: str):
+    if algorithm == "llm_astar":
+        return LLMAStar(grid, heuristic=getattr(Heuristic, heuristic), provider=StubProvider())
+    return make_algorithm(grid, algorithm, heuristic)
+
+
+def _cold():
+    # every run starts without cached HPA abstractions and with a collected heap; flow fields and
+    # landmarks are only cached on registry entries, which the suite does not use
+    with hpa._CACHE_LOCK:
+        hpa._CACHE.clear()
+    gc.collect()
+
+
+def run_one(grid: Grid, algorithm: str, heuristic: str, max_expansions: Optional[int], memory: bool) -> Dict[str, Any]:
+    _cold()
+    t0 = time.perf_counter()
+    algo = build(grid, algorithm, heuristic)
+    t1 = time.perf_counter()
+    res = algo.solve(max_expansions)
+    t2 = time.perf_counter()
+    solve_s = t2 - t1
+    rec = {
+        "algorithm": algorithm,
+        "found": res["found"],
+        "cost": res["cost"],
+        "expanded": res["expanded"],
+        "path_len": len(res["path"]),
+        "setup_ms": round((t1 - t0) * 1000, 3),
+        "solve_ms": round(solve_s * 1000, 3),
+        "wall_ms": round((t2 - t0) * 1000, 3),
+        "expansions_per_s": round(res["expanded"] / solve_s) if solve_s > 0 else None,
+    }
+    del algo, res
+    if memory:
+        _cold()
+        tracemalloc.start()
+        reset_mapped_peak()
+        try:
+            build(grid, algorithm, heuristic).solve(max_expansions)
+            # large search arrays live in mmaps that tracemalloc does not see
+            rec["peak_kb"] = round((tracemalloc.get_traced_memory()[1] + mapped_peak()) / 1024, 1)
+        finally:
+            tracemalloc.stop()
+    return rec
+
+
+def run_suite(kinds: List[str], sizes: List[int], seeds: int, densities: List[float], algorithms: List[str],
+              diagonal: bool = True, max_expansions: Optional[int] = None, memory: bool = True, log=print) -> List[Dict[str, Any]]:
+    heuristic = "octile" if diagonal else "manhattan"
+    results = []
+    for kind in kinds:
+        # only the random and rooms generators use the density
+        for density in (densities if kind in ("random", "rooms") else [0.0]):
+            for size in sizes:
+                for seed in range(seeds):
+                    grid = make_map(kind, size, seed, density, diagonal)
+                    ref = AStar(grid, heuristic=getattr(Heuristic, heuristic)).solve()
+                    for algorithm in algorithms:
+                        rec = run_one(grid, algorithm, heuristic, max_expansions, memory)
+                        gap = None
+                        if rec["found"] and ref["found"]:
+                            gap = rec["cost"] / ref["cost"] - 1 if ref["cost"] > 0 else 0.0
+                            gap = 0.0 if abs(gap) < 1e-9 else gap
+                        rec = {"map": kind, "size": size, "density": density, "seed": seed,
+                               "ref_cost": ref["cost"], "gap": gap, **rec}
+                        results.append(rec)
+                        log(format_row(rec))
+    return results
+
+
+HEADER = f"{'map':<7}{'size':>6}{'dens':>6}{'seed':>5} {'algorithm':<14}{'expanded':>10}{'wall ms':>11}{'exp/s':>10}{'peak KB':>10}{'gap %':>8}"
+
+
+def format_row(r: Dict[str, Any]) -> str:
+    gap = f"{r['gap'] * 100:.2f}" if r["gap"] is not None else "-"
+    peak = f"{r['peak_kb']:.0f}" if "peak_kb" in r else "-"
+    eps = f"{r['expansions_per_s']}" if r["expansions_per_s"] is not None else "-"
+    return (f"{r['map']:<7}{r['size']:>6}{r['density']:>6.2f}{r['seed']:>5} {r['algorithm']:<14}"
+            f"{r['expanded']:>10}{r['wall_ms']:>11.1f}{eps:>10}{peak:>10}{gap:>8}")
+
+
+def metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "args": vars(args),
+    }
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    # match runs on (map, size, density, seed, algorithm); returns the number of regressions
+    def load(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {(r["map"], r["size"], r["density"], r["seed"], r["algorithm"]): r for r in data["results"]}, data.get("meta", {})
+
+    old, old_meta = load(old_path)
+    new, new_meta = load(new_path)
+    print(f"old {old_meta.get('commit')}  new {new_meta.get('commit')}")
+    print(f"{'map':<7}{'size':>6}{'dens':>6}{'seed':>5} {'algorithm':<14}{'old ms':>10}{'new ms':>10}{'ratio':>8}{'exp Δ':>9}{'gap Δ':>9}")
+    regressions = 0
+    for k in sorted(old.keys() & new.keys(), key=str):
+        a, b = old[k], new[k]
+        ratio = b["wall_ms"] / a["wall_ms"] if a["wall_ms"] else float("inf")
+        gap_d = (b["gap"] or 0.0) - (a["gap"] or 0.0)
+        flag = ""
+        if ratio > 1 + threshold or gap_d > 1e-9 or a["found"] != b["found"]:
+            regressions += 1
+            flag = "  <-"
+        print(f"{k[0]:<7}{k[1]:>6}{k[2]:>6.2f}{k[3]:>5} {k[4]:<14}{a['wall_ms']:>10.1f}{b['wall_ms']:>10.1f}"
+              f"{ratio:>7.2f}x{b['expanded'] - a['expanded']:>9}{gap_d * 100:>8.2f}%{flag}")
+    print(f"{regressions} regression(s) beyond {threshold * 100:.0f}% wall time or any cost/found change")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--maps", nargs="+", default=list(KINDS), choices=list(KINDS))
+    ap.add_argument("--sizes", type=int, nargs="+", default=[64, 256])
+    ap.add_argument("--densities", type=float, nargs="+", default=[0.25])
+    ap.add_argument("--seeds", type=int, default=1)
+    ap.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    ap.add_argument("--no-diagonal", dest="diagonal", action="store_false")
+    ap.add_argument("--max-expansions", type=int, default=None)
+    ap.add_argument("--no-memory", dest="memory", action="store_false", help="skip the traced run for peak memory")
+    ap.add_argument("--out", default=None, help="write results as JSON")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files instead of running")
+    ap.add_argument("--threshold", type=float, default=0.10, help="wall-time slowdown counted as a regression")
+    args = ap.parse_args()
+    if args.compare:
+        sys.exit(1 if compare(args.compare[0], args.compare[1], args.threshold) else 0)
+    print(HEADER)
+    results = run_suite(args.maps, args.sizes, args.seeds, args.densities, args.algorithms,
+                        args.diagonal, args.max_expansions, args.memory)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(args), "results": results}, f, indent=1)
+        print(f"wrote {len(results)} results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Load test for the WebSocket endpoint: step latency of light sessions next to heavy ones.
+
+Run from the repository root::
+
+    python -m benchmarks.load_ws --light 32 --heavy 4 --seconds 10
+    python -m benchmarks.load_ws --url ws://host:8000/ws
+
+Light clients start a small search and send one ``step`` at a time, timing each reply; heavy
+clients ``run`` Dijkstra on a large map at full speed meanwhile. Without ``--url`` a server is
+started in a child process (SEARCH_WORKERS and the other pool settings pass through the
+environment). Reports p50/p99/max step latency and how many sessions were refused.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect
+
+
+def light_client(url: str, size: int, until: float, out: List[float], errors: List[str]):
+    payload = {"size": size, "obstacles": [], "start": [0, 0], "goal": [size - 1, size - 1], "algorithm": "astar", "delta": True}
+    try:
+        with connect(url, max_size=None) as ws:
+            ws.send(json.dumps({"type": "start", "payload": payload}))
+            first = json.loads(ws.recv(timeout=30))
+            if first["type"] != "ok":
+                errors.append(first.get("message", first["type"]))
+                return
+            ws.recv(timeout=30)
+            while time.perf_counter() < until:
+                t0 = time.perf_counter()
+                ws.send(json.dumps({"type": "step"}))
+                msg = json.loads(ws.recv(timeout=30))
+                out.append(time.perf_counter() - t0)
+                if msg["type"] == "finished":
+                    ws.send(json.dumps({"type": "start", "payload": payload}))
+                    ws.recv(timeout=30)
+                    ws.recv(timeout=30)
+    except (ConnectionClosed, TimeoutError, OSError) as e:
+        errors.append(repr(e))
+
+
+def heavy_client(url: str, size: int, until: float, frames: List[int], errors: List[str]):
+    payload = {"size": size, "obstacles": [], "start": [0, 0], "goal": [size - 1, size - 1], "algorithm": "dijkstra", "delta": True, "binary": True}
+    try:
+        with connect(url, max_size=None) as ws:
+            ws.send(json.dumps({"type": "start", "payload": payload}))
+            first = json.loads(ws.recv(timeout=30))
+            if first["type"] != "ok":
+                errors.append(first.get("message", first["type"]))
+                return
+            ws.recv(timeout=30)
+            ws.send(json.dumps({"type": "run", "fps": 120}))
+            n = 0
+            while time.perf_counter() < until:
+                msg = ws.recv(timeout=30)
+                n += 1
+                if isinstance(msg, str) and json.loads(msg)["type"] == "finished":
+                    break
+            frames.append(n)
+    except (ConnectionClosed, TimeoutError, OSError) as e:
+        errors.append(repr(e))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server() -> (subprocess.Popen, str):
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "backend.app:app", "--host", "127.0.0.1",
+                             "--port", str(port), "--log-level", "warning"], env=os.environ.copy())
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return proc, f"ws://127.0.0.1:{port}/ws"
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    proc = None
+    url = args.url
+    if url is None:
+        proc, url = start_server()
+    try:
+        until = time.perf_counter() + args.seconds
+        latencies: List[float] = []
+        frames: List[int] = []
+        errors: List[str] = []
+        threads = [threading.Thread(target=heavy_client, args=(url, args.heavy_size, until, frames, errors)) for _ in range(args.heavy)]
+        threads += [threading.Thread(target=light_client, args=(url, args.light_size, until, latencies, errors)) for _ in range(args.light)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+    ms = np.array(latencies) * 1000
+    return {
+        "light": args.light, "heavy": args.heavy, "steps": len(latencies),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3) if len(ms) else None,
+        "p99_ms": round(float(np.percentile(ms, 99)), 3) if len(ms) else None,
+        "max_ms": round(float(ms.max()), 3) if len(ms) else None,
+        "heavy_frames": frames, "errors": errors,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default=None, help="existing server, e.g. ws://127.0.0.1:8000/ws")
+    ap.add_argument("--light", type=int, default=32, help="sessions stepping one node at a time")
+    ap.add_argument("--heavy", type=int, default=4, help="sessions running a large search")
+    ap.add_argument("--light-size", type=int, default=64)
+    ap.add_argument("--heavy-size", type=int, default=1024)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    args = ap.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Seeded benchmark maps. Every generator returns a (size, size) uint8 occupancy array, 1 = blocked."""
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from backend.algorithms.grid import Grid
+
+
+def open_map(size: int, rng: np.random.Generator, density: float) -> np.ndarray:
+    return np.zeros((size, size), dtype=np.uint8)
+
+
+def random_map(size: int, rng: np.random.Generator, density: float) -> np.ndarray:
+    return (rng.random((size, size)) < density).astype(np.uint8)
+
+
+def maze_map(size: int, rng: np.random.Generator, density: float) -> np.ndarray:
+    # recursive backtracker on the odd cells: one-cell corridors, every passage reachable
+    occ = np.ones((size, size), dtype=np.uint8)
+    cells = (size - 1) // 2
+    if cells < 1:
+        return np.zeros((size, size), dtype=np.uint8)
+    seen = np.zeros((cells, cells), dtype=bool)
+    moves = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    stack = [(0, 0)]
+    seen[0, 0] = True
+    occ[1, 1] = 0
+    choice = rng.integers(0, 1 << 30, size=cells * cells * 2)
+    k = 0
+    while stack:
+        cx, cy = stack[-1]
+        options = [(cx + dx, cy + dy) for dx, dy in moves
+                   if 0 <= cx + dx < cells and 0 <= cy + dy < cells and not seen[cy + dy, cx + dx]]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = options[choice[k % len(choice)] % len(options)]
+        k += 1
+        seen[ny, nx] = True
+        occ[2 * ny + 1, 2 * nx + 1] = 0
+        occ[cy + ny + 1, cx + nx + 1] = 0
+        stack.append((nx, ny))
+    return occ
+
+
+def rooms_map(size: int, rng: np.random.Generator, density: float) -> np.ndarray:
+    # square rooms about size/8 across, one door per wall segment, `density` clutter inside
+    room = max(4, size // 8)
+    occ = (rng.random((size, size)) < density * 0.25).astype(np.uint8)
+    door = max(1, room // 4)
+    for w in range(room, size, room):
+        occ[w, :] = 1
+        occ[:, w] = 1
+        for lo in range(0, size, room):
+            hi = min(lo + room, size)
+            if hi - lo <= door + 1:
+                continue
+            d = int(rng.integers(lo + 1, hi - door))
+            occ[w, d:d + door] = 0
+            d = int(rng.integers(lo + 1, hi - door))
+            occ[d:d + door, w] = 0
+    return occ
+
+
+KINDS: Dict[str, Callable[[int, np.random.Generator, float], np.ndarray]] = {
+    "open": open_map,
+    "random": random_map,
+    "maze": maze_map,
+    "rooms": rooms_map,
+}
+
+
+def _nearest_free(occ: np.ndarray, x: int, y: int) -> Tuple[int, int]:
+    ys, xs = np.nonzero(occ == 0)
+    i = int(np.argmin((xs - x) ** 2 + (ys - y) ** 2))
+    return int(xs[i]), int(ys[i])
+
+
+def make_map(kind: str, size: int, seed: int, density: float = 0.25, diagonal: bool = True) -> Grid:
+    """Build a seeded map with start and goal on the free cells nearest opposite corners."""
+    occ = KINDS[kind](size, np.random.default_rng([seed, size]), density)
+    if not (occ == 0).any():
+        occ[0, 0] = 0
+    start = _nearest_free(occ, 0, 0)
+    goal = _nearest_free(occ, size - 1, size - 1)
+    return Grid.from_array(occ, start, goal, diagonal)
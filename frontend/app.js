@@ -4,11 +4,13 @@ const sizeInput = document.getElementById('size')
 const algoSel = document.getElementById('algorithm')
 const heurSel = document.getElementById('heuristic')
 const weightInput = document.getElementById('weight')
+const timeLimitInput = document.getElementById('timeLimit')
 const diagInput = document.getElementById('diag')
 const startBtn = document.getElementById('startBtn')
 const stepBtn = document.getElementById('stepBtn')
 const autoBtn = document.getElementById('autoBtn')
 const pauseBtn = document.getElementById('pauseBtn')
+const finishBtn = document.getElementById('finishBtn')
 const resetBtn = document.getElementById('resetBtn')
 const speedInput = document.getElementById('speed')
 const clearObsBtn = document.getElementById('clearObsBtn')
@@ -19,6 +21,10 @@ const historyDiv = document.getElementById('history')
 const clearHistoryBtn = document.getElementById('clearHistoryBtn')
 const expandedSpan = document.getElementById('expanded')
 const elapsedSpan = document.getElementById('elapsed')
+const metricsSpan = document.getElementById('metrics')
+const profileInput = document.getElementById('profile')
+const traceMemInput = document.getElementById('traceMem')
+const profileDiv = document.getElementById('profileOut')
 
 let gridSize = parseInt(sizeInput.value, 10)
 let cell = Math.floor(canvas.width / gridSize)
@@ -26,8 +32,14 @@ let obstacles = new Set()
 let start = [0, 0]
 let goal = [gridSize - 1, gridSize - 1]
 let ws
-let timer = null
+let running = false
 let lastSnapshot = null
+// OPEN/CLOSED mirrored on the client, patched by server deltas
+let openCells = new Map()
+let closedCells = new Map()
+// backward frontier of bidirectional search
+let backOpenCells = new Map()
+let backClosedCells = new Map()
 let started = false
 let isDragging = false
 let dragMode = 'place' // or 'erase'
@@ -63,24 +75,34 @@ function drawGrid() {
   ctx.fillRect(start[0] * cell, start[1] * cell, cell, cell)
   ctx.fillStyle = '#dc2626'
   ctx.fillRect(goal[0] * cell, goal[1] * cell, cell, cell)
-  if (lastSnapshot && lastSnapshot.closed) {
+  if (closedCells.size) {
     ctx.save()
     ctx.globalAlpha = 0.35
-    for (const [cx, cy] of lastSnapshot.closed) {
+    for (const [cx, cy] of closedCells.values()) {
       ctx.fillStyle = '#a78bfa'
       ctx.fillRect(cx * cell, cy * cell, cell, cell)
     }
     ctx.restore()
   }
-  if (lastSnapshot && lastSnapshot.open) {
+  if (openCells.size) {
     ctx.save()
     ctx.globalAlpha = 0.5
-    for (const [[ox, oy]] of lastSnapshot.open) {
+    for (const [[ox, oy]] of openCells.values()) {
       ctx.fillStyle = '#f59e0b'
       ctx.fillRect(ox * cell, oy * cell, cell, cell)
     }
     ctx.restore()
   }
+  if (backClosedCells.size || backOpenCells.size) {
+    ctx.save()
+    ctx.globalAlpha = 0.35
+    ctx.fillStyle = '#38bdf8'
+    for (const [cx, cy] of backClosedCells.values()) ctx.fillRect(cx * cell, cy * cell, cell, cell)
+    ctx.globalAlpha = 0.5
+    ctx.fillStyle = '#fb7185'
+    for (const [[ox, oy]] of backOpenCells.values()) ctx.fillRect(ox * cell, oy * cell, cell, cell)
+    ctx.restore()
+  }
   if (lastSnapshot && lastSnapshot.current) {
     const [cx, cy] = lastSnapshot.current
     ctx.fillStyle = '#06b6d4'
@@ -114,6 +136,7 @@ canvas.addEventListener('mousedown', (e) => {
   dragMode = obstacles.has(k) ? 'erase' : 'place'
   isDragging = true
   if (dragMode === 'place') obstacles.add(k); else obstacles.delete(k)
+  sendObstacleEdit(x, y)
   drawGrid()
 })
 
@@ -122,13 +145,23 @@ canvas.addEventListener('mousemove', (e) => {
   const [x, y] = getGridCoord(e)
   const k = key(x, y)
   if (dragMode === 'place') {
-    if (!obstacles.has(k)) obstacles.add(k)
+    if (obstacles.has(k)) return
+    obstacles.add(k)
   } else {
-    if (obstacles.has(k)) obstacles.delete(k)
+    if (!obstacles.has(k)) return
+    obstacles.delete(k)
   }
+  sendObstacleEdit(x, y)
   drawGrid()
 })
 
+// D* Lite 在已开始的搜索上增量重规划：把编辑发给服务端并继续运行
+function sendObstacleEdit(x, y) {
+  if (!started || algoSel.value !== 'dstar' || !ws || ws.readyState !== 1) return
+  const type = dragMode === 'place' ? 'add_obstacles' : 'remove_obstacles'
+  ws.send(JSON.stringify({ type, cells: [[x, y]] }))
+}
+
 canvas.addEventListener('mouseup', () => { isDragging = false })
 canvas.addEventListener('mouseleave', () => { isDragging = false })
 
@@ -138,26 +171,96 @@ sizeInput.addEventListener('change', () => {
   drawGrid()
 })
 
+function applyFrontier(msg, open, closed) {
+  if (msg.delta) {
+    const d = msg.delta
+    for (const [x, y] of d.open_remove) open.delete(key(x, y))
+    for (const e of d.open_add) open.set(key(e[0][0], e[0][1]), e)
+    for (const e of d.open_update) open.set(key(e[0][0], e[0][1]), e)
+    for (const [x, y] of d.closed_add) closed.set(key(x, y), [x, y])
+    return [open, closed]
+  }
+  if (msg.open) open = new Map(msg.open.map(e => [key(e[0][0], e[0][1]), e]))
+  if (msg.closed) closed = new Map(msg.closed.map(([x, y]) => [key(x, y), [x, y]]))
+  return [open, closed]
+}
+
+function applySnapshot(msg) {
+  [openCells, closedCells] = applyFrontier(msg, openCells, closedCells)
+  if (msg.backward) {
+    [backOpenCells, backClosedCells] = applyFrontier(msg.backward, backOpenCells, backClosedCells)
+  } else if (!msg.delta && msg.open) {
+    backOpenCells = new Map()
+    backClosedCells = new Map()
+  }
+}
+
+// binary snapshot frame, see backend/wire.py: uint8 version, uint32 header length, JSON header,
+// padding to 4 bytes, then uint16 (x, y) pairs and float32 (g, h, f) triples per packed list
+const textDecoder = new TextDecoder()
+function decodeFrame(buf) {
+  const view = new DataView(buf)
+  const len = view.getUint32(1, true)
+  const msg = JSON.parse(textDecoder.decode(new Uint8Array(buf, 5, len)))
+  let off = (5 + len + 3) & ~3
+  for (const [path, kind, n] of msg.arrays) {
+    const xy = new Uint16Array(buf, off, 2 * n)
+    off += 4 * n
+    const items = new Array(n)
+    if (kind === 'open') {
+      const v = new Float32Array(buf, off, 3 * n)
+      off += 12 * n
+      for (let i = 0; i < n; i++) items[i] = [[xy[2 * i], xy[2 * i + 1]], v[3 * i], v[3 * i + 1], v[3 * i + 2]]
+    } else {
+      for (let i = 0; i < n; i++) items[i] = [xy[2 * i], xy[2 * i + 1]]
+    }
+    const parts = path.split('.')
+    let target = msg
+    for (const p of parts.slice(0, -1)) target = target[p]
+    target[parts[parts.length - 1]] = items
+  }
+  delete msg.arrays
+  return msg
+}
+
 function connect(onOpen) {
   const proto = location.protocol === 'https:' ? 'wss' : 'ws'
   ws = new WebSocket(`${proto}://${location.host}/ws`)
+  ws.binaryType = 'arraybuffer'
   ws.onopen = () => { if (typeof onOpen === 'function') onOpen() }
   ws.onmessage = (ev) => {
-    const msg = JSON.parse(ev.data)
+    const msg = typeof ev.data === 'string' ? JSON.parse(ev.data) : decodeFrame(ev.data)
     if (msg.type === 'ok') {
+      // a new run: drop the previous run's path
+      lastSnapshot = null
       if (!started) {
         started = true
         setButtonsForStarted(true)
       }
-      if (ws && ws.readyState === 1) ws.send(JSON.stringify({ type: 'step' }))
+      // unreachable: the server sends the finished message right away
+      if (!msg.unreachable && ws && ws.readyState === 1) ws.send(JSON.stringify({ type: 'step' }))
+      return
+    }
+    if (msg.type === 'obstacles') {
+      if (lastSnapshot) lastSnapshot.path = []
+      if (!running && msg.changed.length) {
+        ws.send(JSON.stringify({ type: 'run', fps: 30 }))
+        running = true
+        setButtonsForStarted(true)
+      }
       return
     }
     if (msg.type === 'snapshot' || msg.type === 'finished') {
+      // ARA*: keep drawing the best solution so far between improvements
+      if (!msg.path && lastSnapshot && lastSnapshot.path) msg.path = lastSnapshot.path
       lastSnapshot = msg
+      applySnapshot(msg)
       expandedSpan.textContent = msg.stats?.expanded ?? 0
+      renderMetrics(msg.stats)
       if (msg.type === 'finished') {
         elapsedSpan.textContent = msg.stats?.elapsed_ms ?? 0
-        if (timer) { clearInterval(timer); timer = null }
+        renderProfile(msg.stats)
+        running = false
         setButtonsForStarted(false)
         const record = {
           time: new Date().toLocaleString(),
@@ -169,12 +272,13 @@ function connect(onOpen) {
           expanded: msg.stats?.expanded ?? 0,
           elapsed_ms: msg.stats?.elapsed_ms ?? 0,
           steps: (msg.path || []).length,
-          cost: msg.stats?.cost ?? 0
+          cost: msg.stats?.cost ?? 0,
+          unreachable: !!msg.stats?.unreachable
         }
         history.unshift(record)
         renderHistory()
       }
-      renderTables(msg)
+      renderTables()
       drawGrid()
     }
   }
@@ -190,28 +294,61 @@ function payload() {
     diagonal: diagInput.checked,
     algorithm: algoSel.value,
     heuristic: heurSel.value,
-    weight: parseFloat(weightInput.value)
+    weight: parseFloat(weightInput.value),
+    time_limit_ms: parseFloat(timeLimitInput.value) > 0 ? parseFloat(timeLimitInput.value) : null,
+    delta: true,
+    binary: true,
+    profile: profileInput.checked,
+    trace_memory: traceMemInput.checked
+  }
+}
+
+function renderMetrics(stats) {
+  if (!metricsSpan || !stats) return
+  const parts = [
+    `生成:${stats.generated ?? 0}`,
+    `重开:${stats.reopened ?? 0}`,
+    `堆操作:${stats.heap_ops ?? 0}`,
+    `OPEN峰值:${stats.peak_open ?? 0}`,
+    `展开/启发/快照/序列化(ms):${stats.expand_ms ?? 0}/${stats.heuristic_ms ?? 0}/${stats.snapshot_ms ?? 0}/${stats.serialize_ms ?? 0}`
+  ]
+  if (stats.bound !== undefined && stats.bound !== null) parts.push(`权重:${stats.weight} 次优界:${stats.bound}`)
+  if (stats.landmarks !== undefined) parts.push(`地标:${stats.landmarks}(${stats.landmark_cache}) 预处理:${stats.landmark_ms}ms 表:${(stats.landmark_bytes / 1048576).toFixed(1)}MB`)
+  if (stats.peak_rss_kb) parts.push(`峰值内存:${(stats.peak_rss_kb / 1024).toFixed(1)}MB`)
+  if (stats.traced_peak_kb !== undefined) parts.push(`tracemalloc峰值:${stats.traced_peak_kb}KB`)
+  metricsSpan.textContent = parts.join(' ')
+}
+
+function renderProfile(stats) {
+  if (!profileDiv) return
+  profileDiv.innerHTML = ''
+  if (stats?.profile_error) profileDiv.textContent = stats.profile_error
+  for (const r of stats?.profile || []) {
+    const row = document.createElement('div')
+    row.className = 'row'
+    row.textContent = `${r.tottime_ms.toFixed(1)}ms / ${r.cumtime_ms.toFixed(1)}ms ×${r.calls} ${r.func}`
+    profileDiv.appendChild(row)
   }
 }
 
-function renderTables(msg) {
+function renderTables() {
   openDiv.innerHTML = ''
   closedDiv.innerHTML = ''
-  if (msg.open) {
-    for (const [[x, y], g, h, f] of msg.open.slice(0, 50)) {
-      const row = document.createElement('div')
-      row.className = 'row'
-      row.textContent = `(${x},${y}) g=${g.toFixed(2)} h=${h.toFixed(2)} f=${f.toFixed(2)}`
-      openDiv.appendChild(row)
-    }
+  let n = 0
+  for (const [[x, y], g, h, f] of openCells.values()) {
+    if (n++ >= 50) break
+    const row = document.createElement('div')
+    row.className = 'row'
+    row.textContent = `(${x},${y}) g=${g.toFixed(2)} h=${h.toFixed(2)} f=${f.toFixed(2)}`
+    openDiv.appendChild(row)
   }
-  if (msg.closed) {
-    for (const [x, y] of msg.closed.slice(0, 50)) {
-      const row = document.createElement('div')
-      row.className = 'row'
-      row.textContent = `(${x},${y})`
-      closedDiv.appendChild(row)
-    }
+  n = 0
+  for (const [x, y] of closedCells.values()) {
+    if (n++ >= 50) break
+    const row = document.createElement('div')
+    row.className = 'row'
+    row.textContent = `(${x},${y})`
+    closedDiv.appendChild(row)
   }
 }
 
@@ -228,14 +365,22 @@ stepBtn.addEventListener('click', () => {
   if (ws && ws.readyState === 1) ws.send(JSON.stringify({ type: 'step' }))
 })
 autoBtn.addEventListener('click', () => {
-  if (timer) return
-  const interval = parseInt(speedInput.value || '50', 10)
-  timer = setInterval(() => {
-    if (ws && ws.readyState === 1) ws.send(JSON.stringify({ type: 'step' }))
-  }, Math.max(10, interval))
+  if (running || !ws || ws.readyState !== 1) return
+  // server pushes one expansion per frame at the slider interval
+  const interval = Math.max(10, parseInt(speedInput.value || '50', 10))
+  ws.send(JSON.stringify({ type: 'run', fps: 1000 / interval, steps_per_frame: 1 }))
+  running = true
+})
+finishBtn.addEventListener('click', () => {
+  if (running || !ws || ws.readyState !== 1) return
+  // expand as fast as possible, coalescing expansions into ~30 frames per second
+  ws.send(JSON.stringify({ type: 'run', fps: 30 }))
+  running = true
 })
 pauseBtn.addEventListener('click', () => {
-  if (timer) { clearInterval(timer); timer = null }
+  if (!running) return
+  if (ws && ws.readyState === 1) ws.send(JSON.stringify({ type: 'pause' }))
+  running = false
 })
 resetBtn.addEventListener('click', () => {
   if (ws && ws.readyState === 1) ws.send(JSON.stringify({ type: 'reset' }))
@@ -243,9 +388,15 @@ resetBtn.addEventListener('click', () => {
   start = [0, 0]
   goal = [gridSize - 1, gridSize - 1]
   lastSnapshot = null
+  openCells = new Map()
+  closedCells = new Map()
+  backOpenCells = new Map()
+  backClosedCells = new Map()
   expandedSpan.textContent = '0'
   elapsedSpan.textContent = '0'
+  if (metricsSpan) metricsSpan.textContent = ''
   started = false
+  running = false
   setButtonsForStarted(false)
   drawGrid()
 })
@@ -272,7 +423,7 @@ function renderHistory() {
     const row = document.createElement('div')
     row.className = 'history-row'
     const left = `${r.time} | 算法:${r.algo} 启发:${r.heuristic} 尺寸:${r.size} 斜走:${r.diagonal ? '✓' : '×'}`
-    const right = `障碍:${r.obstacles} 步数:${r.steps} 成本:${r.cost.toFixed(2)} 耗时:${r.elapsed_ms}ms 展开:${r.expanded}`
+    const right = `障碍:${r.obstacles} 步数:${r.steps} 成本:${r.unreachable ? '不可达' : r.cost.toFixed(2)} 耗时:${r.elapsed_ms}ms 展开:${r.expanded}`
     row.innerHTML = `<span>${left}</span><span>${right}</span>`
     historyDiv.appendChild(row)
   }
@@ -287,6 +438,7 @@ drawGrid()
 function setButtonsForStarted(isStarted) {
   stepBtn.disabled = !isStarted
   autoBtn.disabled = !isStarted
+  finishBtn.disabled = !isStarted
   pauseBtn.disabled = !isStarted
 }
 
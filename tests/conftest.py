@@ -0,0 +1,20 @@
+import threading
+import time
+import pytest
+import uvicorn
+from backend.app import app
+
+
+@pytest.fixture
+def app_port():
+    # the app served by uvicorn on a free local port for the duration of one test
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=0, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        while not server.started:
+            time.sleep(0.01)
+        yield server.servers[0].sockets[0].getsockname()[1]
+    finally:
+        server.should_exit = True
+        thread.join(5)
@@ -0,0 +1,114 @@
+import pytest
+from fastapi import HTTPException
+from backend import app as app_module
+from backend import registry
+from backend.algorithms.arastar import ARAStar
+from backend.algorithms.astar import AStar
+from backend.algorithms.base import merge_snapshots
+from benchmarks.maps import make_map
+
+
+def test_converges_to_optimal_with_valid_bounds():
+    for kind in ('random', 'rooms', 'maze'):
+        g = make_map(kind, 64, seed=5)
+        ref = AStar(g).solve()
+        res = ARAStar(g, weight=3.0).solve()
+        assert res['found'] and abs(res['cost'] - ref['cost']) < 1e-9 and res['stop_reason'] == 'optimal'
+        assert res['bound'] == 1.0 and res['path'][0] == g.start and res['path'][-1] == g.goal
+        sols = res['solutions']
+        assert sols and sols[0]['weight'] == 3.0 and sols[-1]['bound'] == 1.0
+        for a, b in zip(sols, sols[1:]):
+            assert b['cost'] <= a['cost'] and b['bound'] <= a['bound'] and b['expanded'] >= a['expanded']
+        for s in sols:
+            assert s['cost'] <= s['bound'] * ref['cost'] + 1e-9
+        # later iterations reuse earlier work instead of searching from scratch
+        separate = sum(AStar(g, weight=s['weight']).solve()['expanded'] for s in sols)
+        assert res['expanded'] < separate or len(sols) == 1
+
+
+def test_stops_at_budget_with_best_solution_so_far():
+    g = make_map('rooms', 96, seed=1)
+    first = ARAStar(g, weight=3.0).solve()['solutions'][0]
+    res = ARAStar(g, weight=3.0, max_expansions=first['expanded'] + 5).solve()
+    assert res['stop_reason'] == 'budget' and res['found'] and res['cost'] == first['cost']
+    assert res['expanded'] == first['expanded'] + 5
+    res = ARAStar(g, weight=3.0).solve(max_expansions=3)
+    assert res['stop_reason'] == 'budget' and not res['found'] and res['path'] == []
+    res = ARAStar(g, weight=3.0, time_limit_ms=1e-6).solve()
+    assert res['stop_reason'] == 'deadline' and res['expanded'] <= 1
+
+
+def test_solutions_stream_through_runner_and_solve(monkeypatch):
+    monkeypatch.setattr(registry, '_DEFAULT', registry.MapRegistry())
+    g = make_map('random', 48, seed=7)
+    obstacles = [tuple(map(int, xy)) for xy in zip(*g.occ.nonzero()[::-1])]
+    payload = app_module.StartPayload(size=48, obstacles=obstacles, start=g.start, goal=g.goal,
+                                      algorithm='arastar', weight=2.5, delta=True)
+    runner = app_module.Runner()
+    runner.start(payload)
+    updates = []
+    while True:
+        msg = runner.step(1 << 20)
+        updates.append(msg)
+        if msg['type'] == 'finished':
+            break
+    ref = AStar(g).solve()
+    streamed = [m['solution'] for m in updates if 'solution' in m]
+    assert streamed and streamed[0]['weight'] == 2.5 and abs(updates[-1]['stats']['cost'] - ref['cost']) < 1e-9
+    for m in updates[:-1]:
+        # every improvement is sent on its own, as a full snapshot with the new best path
+        assert 'solution' in m and m['resync'] and m['path'][-1] == g.goal and 'delta' not in m
+    res = app_module.solve(payload)
+    assert [s['cost'] for s in res['solutions']] == [s['cost'] for s in streamed]
+    assert abs(res['cost'] - ref['cost']) < 1e-9
+
+
+def test_solve_honours_payload_expansion_budget():
+    payload = app_module.StartPayload(size=40, start=(0, 0), goal=(39, 39), algorithm='astar', heuristic='manhattan', max_expansions=5)
+    res = app_module.solve(payload, None)
+    assert not res['found'] and res['expanded'] == 5
+    assert app_module.solve(payload.model_copy(update={'max_expansions': None}), 7)['expanded'] == 7
+    assert app_module.solve(payload, 5)['expanded'] == 5
+    with pytest.raises(HTTPException) as err:
+        app_module.solve(payload, 9)
+    assert err.value.status_code == 422
+
+
+def test_resync_replaces_pending_delta():
+    delta = {'open_add': [], 'open_update': [], 'open_remove': [], 'closed_add': [(1, 1)]}
+    full = {'open': [], 'closed': [], 'resync': True, 'stats': {}}
+    assert merge_snapshots({'delta': delta, 'stats': {}}, full) is full
+
+
+def test_merged_batches_across_iterations_replay_to_full_state():
+    # batches that cross an iteration boundary merge a resync with the deltas after it
+    g = make_map('random', 48, seed=2)
+    a = ARAStar(g, weight=3.0)
+    a.delta = True
+    init = a.resync()
+    open_cells = {e[0]: e[1:] for e in init['open']}
+    closed_cells = set(init['closed'])
+    crossed = False
+    for _ in range(1000):
+        merged, resyncs = None, 0
+        for _ in range(37):
+            s = a.step()
+            resyncs += bool(s.get('resync'))
+            merged = s if merged is None else merge_snapshots(merged, s)
+            if s.get('finished'):
+                break
+        if merged.get('resync'):
+            crossed = crossed or (resyncs > 0 and not s.get('resync'))
+            open_cells = {e[0]: e[1:] for e in merged['open']}
+            closed_cells = set(merged['closed'])
+        elif 'delta' in merged:
+            d = merged['delta']
+            for xy in d['open_remove']:
+                del open_cells[xy]
+            for e in d['open_add'] + d['open_update']:
+                open_cells[e[0]] = e[1:]
+            closed_cells.update(d['closed_add'])
+        if merged.get('finished'):
+            break
+        assert open_cells == a.open_cells() and closed_cells == a.closed_cells()
+    assert crossed
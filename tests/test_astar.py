@@ -1,4 +1,6 @@
 import math
+import random
+import numpy as np
 from backend.algorithms.grid import Grid
 from backend.algorithms.astar import AStar, Heuristic
 from backend.algorithms.dijkstra import Dijkstra
@@ -23,3 +25,60 @@ def test_astar_equals_dijkstra_on_zero_heuristic():
     assert sa['finished'] and sd['finished']
     assert math.isclose(sa['stats']['cost'], sd['stats']['cost'], rel_tol=1e-6)
 
+
+def test_solve_matches_stepping():
+    obstacles = {(5, y) for y in range(9)}
+    g = Grid(10, obstacles, (0, 0), (9, 0), True)
+    stepped = run_all(AStar(g, heuristic=Heuristic.octile))
+    solved = AStar(g, heuristic=Heuristic.octile).solve()
+    assert solved['found']
+    assert solved['path'] == stepped['path']
+    assert solved['expanded'] == stepped['stats']['expanded']
+    assert math.isclose(solved['cost'], stepped['stats']['cost'], rel_tol=1e-9)
+
+
+def test_solve_reports_unreachable_goal():
+    g = Grid(10, {(8, 9), (9, 8), (8, 8)}, (0, 0), (9, 9), True)
+    res = Dijkstra(g).solve()
+    assert not res['found'] and res['path'] == [] and res['cost'] is None
+    # different components: answered from the labels without expanding anything
+    assert res['expanded'] == 0 and res['unreachable']
+
+
+def test_expansion_order_is_deterministic():
+    rng = random.Random(7)
+    obstacles = {(rng.randrange(30), rng.randrange(30)) for _ in range(200)} - {(0, 0), (29, 29)}
+    g = Grid(30, obstacles, (0, 0), (29, 29), True)
+    orders = []
+    for _ in range(2):
+        a = AStar(g, heuristic=Heuristic.euclidean)
+        order = []
+        while True:
+            snap = a.step()
+            order.append(tuple(snap['current']) if snap.get('current') else None)
+            if snap.get('finished'):
+                break
+        orders.append(order)
+    assert orders[0] == orders[1]
+
+
+def test_vectorized_heuristics_match_scalar():
+    rng = random.Random(0)
+    dx = np.array([rng.randint(-300, 300) for _ in range(500)])
+    dy = np.array([rng.randint(-300, 300) for _ in range(500)])
+    for h in (Heuristic.zero, Heuristic.manhattan, Heuristic.euclidean, Heuristic.octile, Heuristic.chebyshev):
+        batch = Heuristic.batch(h, dx, dy)
+        assert batch.dtype == np.float64
+        assert batch.tolist() == [float(h(int(a), int(b))) for a, b in zip(dx, dy)]
+    field = Heuristic.field(Heuristic.octile, 7, (2, 5))
+    assert field.shape == (7, 7)
+    assert all(field[y, x] == Heuristic.octile(2 - x, 5 - y) for y in range(7) for x in range(7))
+
+
+def test_astar_with_precomputed_h_field_matches_scalar():
+    rng = random.Random(4)
+    obstacles = {(rng.randrange(30), rng.randrange(30)) for _ in range(250)} - {(0, 0), (29, 29)}
+    g = Grid(30, obstacles, (0, 0), (29, 29), True)
+    a = AStar(g, heuristic=Heuristic.octile).solve()
+    b = AStar(g, heuristic=Heuristic.octile, h_field=Heuristic.field(Heuristic.octile, 30, g.goal)).solve()
+    assert (a['found'], a['path'], a['cost'], a['expanded']) == (b['found'], b['path'], b['cost'], b['expanded'])
@@ -0,0 +1,130 @@
+import numpy as np
+from backend.algorithms.grid import Grid
+from backend.algorithms.astar import AStar, Heuristic
+from backend.algorithms.llm_astar import LLMAStar
+from backend.algorithms.base import merge_snapshots
+from backend.algorithms.flowfield import FlowFieldPlanner
+from benchmarks.maps import make_map
+
+
+def replay(algo):
+    algo.delta = True
+    init = algo.resync(algo.grid.start)
+    open_cells = {xy: (g, h, f) for xy, g, h, f in init['open']}
+    closed_cells = set(init['closed'])
+    for _ in range(10000):
+        snap = algo.step()
+        d = snap.get('delta')
+        if d:
+            for xy in d['open_remove']:
+                del open_cells[xy]
+            for xy, g, h, f in d['open_add']:
+                assert xy not in open_cells
+                open_cells[xy] = (g, h, f)
+            for xy, g, h, f in d['open_update']:
+                assert xy in open_cells
+                open_cells[xy] = (g, h, f)
+            # each cell is reported closed once
+            assert len(set(d['closed_add'])) == len(d['closed_add']) and not closed_cells & set(d['closed_add'])
+            closed_cells.update(d['closed_add'])
+        assert open_cells == algo.open_cells()
+        assert closed_cells == algo.closed_cells()
+        if snap.get('finished'):
+            return snap
+    return None
+
+
+def test_delta_snapshots_replay_to_full_state():
+    obstacles = {(4, y) for y in range(8)} | {(7, y) for y in range(2, 10)}
+    g = Grid(10, obstacles, (0, 0), (9, 9), True)
+    snap = replay(AStar(g, heuristic=Heuristic.octile))
+    assert snap is not None and snap['path'][-1] == (9, 9)
+
+
+def test_delta_snapshots_follow_llm_rescoring():
+    g = Grid(12, {(5, y) for y in range(10)}, (0, 0), (11, 0), True)
+    snap = replay(LLMAStar(g, heuristic=Heuristic.octile))
+    assert snap is not None and snap['finished']
+
+
+def test_delta_snapshots_list_reclosed_cells_once():
+    # the flow-field wavefront relaxes a cell again when a later round improves it
+    snap = replay(FlowFieldPlanner(make_map('rooms', 24, 0)))
+    assert snap is not None and snap['finished']
+
+
+def test_resync_is_untruncated():
+    g = Grid(60, set(), (0, 0), (59, 59), True)
+    a = AStar(g, heuristic=Heuristic.zero, weight=0.0)
+    for _ in range(400):
+        a.step()
+    full = a.resync()
+    assert len(full['open']) == a.open_count > 0
+    assert len(full['closed']) == len(a.closed_cells()) == 400
+
+
+def test_merged_deltas_match_single_steps():
+    obstacles = {(5, y) for y in range(1, 12)}
+    g = Grid(12, obstacles, (0, 6), (11, 6), True)
+    a = AStar(g, heuristic=Heuristic.octile)
+    a.delta = True
+    init = a.resync()
+    open_cells = {xy: (gg, h, f) for xy, gg, h, f in init['open']}
+    closed_cells = set(init['closed'])
+    finished = False
+    while not finished:
+        merged = None
+        for _ in range(7):
+            snap = a.step()
+            merged = snap if merged is None else merge_snapshots(merged, snap)
+            if snap.get('finished'):
+                finished = True
+                break
+        d = merged['delta']
+        for xy in d['open_remove']:
+            del open_cells[xy]
+        for xy, gg, h, f in d['open_add'] + d['open_update']:
+            open_cells[xy] = (gg, h, f)
+        closed_cells.update(d['closed_add'])
+        assert open_cells == a.open_cells()
+        assert closed_cells == a.closed_cells()
+
+
+def test_unreachable_goal_finishes_without_expanding():
+    # goal boxed in at the far corner
+    from backend.planners import make_algorithm
+    from backend.app import Runner, StartPayload
+    obstacles = [(10, 11), (11, 10), (10, 10)]
+    for algorithm in ('astar', 'dijkstra', 'greedy', 'jps', 'hpa', 'bidirectional', 'dstar', 'flowfield', 'arastar', 'llm_astar'):
+        g = Grid(12, obstacles, (0, 0), (11, 11), True)
+        res = make_algorithm(g, algorithm, defer_llm=True).solve()
+        assert not res['found'] and res['unreachable'] and res['expanded'] == 0, algorithm
+        snap = make_algorithm(Grid(12, obstacles, (0, 0), (11, 11), True), algorithm, defer_llm=True).step()
+        assert snap['finished'] and snap['stats']['unreachable'] and snap['path'] == [], algorithm
+    runner = Runner()
+    runner.start(StartPayload(size=12, obstacles=obstacles, start=(0, 0), goal=(11, 11), algorithm='llm_astar'))
+    assert runner.unreachable and not runner.llm_pending
+    msg = runner.step()
+    assert msg['type'] == 'finished' and msg['stats']['unreachable'] and msg['stats']['expanded'] == 0
+    # opening the wall makes the goal reachable again for the incremental planner
+    algo = make_algorithm(Grid(12, obstacles, (0, 0), (11, 11), True), 'dstar')
+    assert algo.unreachable()
+    algo.update_obstacles(remove=[(10, 10)])
+    assert algo.solve()['found']
+
+
+def test_array_state_accessors():
+    g = Grid(12, {(5, y) for y in range(10)}, (0, 0), (11, 0), True)
+    a = AStar(g, heuristic=Heuristic.octile)
+    res = a.solve()
+    path = res['path']
+    assert a.g_of(g.goal) == res['cost'] and a.g_of((5, 5)) is None
+    assert all(a.parent_of(v) == u for u, v in zip(path, path[1:])) and a.parent_of(g.start) is None
+    assert a.is_closed(g.start) and not a.is_open(g.start)
+    assert set(a.open_cells()) == {xy for xy in a.open_cells() if a.is_open(xy)}
+    assert len(a.closed_cells()) == res['expanded']
+    # a large map costs nothing up front: state arrays are committed only where the search goes
+    big = Grid.from_array(np.zeros((4096, 4096), dtype=np.uint8), (0, 0), (3, 3), True)
+    big._labels = np.zeros((4096, 4096), dtype=np.int32)
+    res = AStar(big).solve()
+    assert res['found'] and res['expanded'] == 4
@@ -0,0 +1,88 @@
+import json
+import os
+import random
+import urllib.request
+import pytest
+from pydantic import ValidationError
+from backend.app import BatchPayload
+from backend.algorithms.grid import Grid
+from backend.algorithms.astar import AStar, Heuristic
+from backend.batch import BatchPool, plan_batch
+
+
+def random_case(seed, n=24, queries=30):
+    rng = random.Random(seed)
+    obstacles = {(rng.randrange(n), rng.randrange(n)) for _ in range(int(n * n * 0.25))}
+    pairs = [((rng.randrange(n), rng.randrange(n)), (rng.randrange(n), rng.randrange(n))) for _ in range(queries)]
+    return n, obstacles, pairs
+
+
+def test_plan_batch_matches_sequential():
+    n, obstacles, pairs = random_case(1)
+    pairs.append(((0, 0), (n, n)))
+    grid = Grid(n, obstacles, (0, 0), (0, 0), True)
+    results = list(plan_batch(grid, pairs, workers=2, chunk_size=4, include_path=True))
+    assert sorted(r['index'] for r in results) == list(range(len(pairs)))
+    assert len({r['worker'] for r in results if 'worker' in r}) <= 2
+    for r in results:
+        if r['index'] == len(pairs) - 1:
+            assert 'error' in r
+            continue
+        start, goal = pairs[r['index']]
+        ref = AStar(Grid(n, obstacles, start, goal, True), heuristic=Heuristic.octile).solve()
+        assert r['found'] == ref['found'] and r['expanded'] == ref['expanded']
+        assert r['path'] == ref['path'] and r['path_len'] == len(ref['path'])
+        if ref['found']:
+            assert abs(r['cost'] - ref['cost']) < 1e-9
+
+
+def test_plan_batch_releases_shared_memory_on_early_close():
+    n, obstacles, pairs = random_case(2, queries=40)
+    before = set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+    gen = plan_batch(Grid(n, obstacles, (0, 0), (0, 0), True), pairs, workers=1, chunk_size=1)
+    assert 'index' in next(gen)
+    gen.close()
+    if os.path.isdir('/dev/shm'):
+        assert set(os.listdir('/dev/shm')) <= before
+
+
+def test_batch_pool_is_shared_across_requests():
+    pool = BatchPool(2)
+    try:
+        pids = set()
+        # more maps than a worker keeps attached
+        for seed in range(4):
+            n, obstacles, pairs = random_case(seed, queries=6)
+            results = list(plan_batch(Grid(n, obstacles, (0, 0), (0, 0), True), pairs, workers=8, chunk_size=2, pool=pool))
+            assert sorted(r['index'] for r in results) == list(range(len(pairs)))
+            for r in results:
+                start, goal = pairs[r['index']]
+                assert r['expanded'] == AStar(Grid(n, obstacles, start, goal, True)).solve()['expanded']
+            pids |= {r['worker'] for r in results}
+        assert 1 <= len(pids) <= 2
+    finally:
+        pool.close()
+
+
+def test_batch_payload_caps_workers():
+    with pytest.raises(ValidationError):
+        BatchPayload(size=4, queries=[], workers=(os.cpu_count() or 1) + 1)
+    with pytest.raises(ValidationError):
+        BatchPayload(size=4, queries=[], workers=0)
+    assert BatchPayload(size=4, queries=[], workers=1).workers == 1
+
+
+def test_batch_endpoint_streams_ndjson(app_port):
+    n, obstacles, pairs = random_case(3, queries=8)
+    body = json.dumps({'size': n, 'obstacles': sorted(obstacles), 'queries': pairs, 'algorithm': 'jps', 'workers': 1}).encode()
+    req = urllib.request.Request(f'http://127.0.0.1:{app_port}/batch', data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        assert resp.headers['Content-Type'].startswith('application/x-ndjson')
+        lines = [json.loads(line) for line in resp.read().decode().splitlines() if line]
+    assert sorted(r['index'] for r in lines) == list(range(len(pairs)))
+    for r in lines:
+        start, goal = pairs[r['index']]
+        ref = AStar(Grid(n, obstacles, start, goal, True), heuristic=Heuristic.octile).solve()
+        assert r['found'] == ref['found'] and 'path' not in r
+        if ref['found']:
+            assert abs(r['cost'] - ref['cost']) < 1e-6
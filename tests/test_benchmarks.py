@@ -0,0 +1,44 @@
+import numpy as np
+from backend.algorithms.astar import AStar
+from backend.algorithms.dijkstra import Dijkstra
+from benchmarks.maps import KINDS, make_map
+from benchmarks.bench_suite import ALGORITHMS, run_one, run_suite
+from backend.metrics import RunProfiler
+
+
+def test_maps_are_seeded_and_solvable():
+    for kind in KINDS:
+        a = make_map(kind, 33, seed=3)
+        b = make_map(kind, 33, seed=3)
+        assert np.array_equal(a.occ, b.occ) and a.start == b.start and a.goal == b.goal
+        assert a.is_free(*a.start) and a.is_free(*a.goal)
+    maze = make_map('maze', 41, seed=0)
+    assert Dijkstra(maze).solve()['found']
+    assert not np.array_equal(make_map('random', 33, seed=1).occ, make_map('random', 33, seed=2).occ)
+
+
+def test_suite_reports_all_planners():
+    rows = run_suite(['open', 'rooms'], [32], 1, [0.2], list(ALGORITHMS), memory=True, log=lambda _: None)
+    assert len(rows) == 2 * len(ALGORITHMS)
+    for r in rows:
+        assert r['found'] and r['expanded'] > 0 and r['peak_kb'] > 0 and r['wall_ms'] >= r['solve_ms']
+        if r['algorithm'] in ('astar', 'dijkstra', 'jps', 'bidirectional', 'dstar', 'flowfield', 'arastar'):
+            assert r['gap'] == 0.0
+        else:
+            assert r['gap'] >= 0.0
+
+
+def test_peak_memory_is_continuous_across_the_mmap_threshold():
+    # search arrays of 725 x 725 and up are mmap-backed; their peak must not drop below a smaller map's
+    peaks, traced = [], []
+    for size in (724, 725, 1024):
+        g = make_map('open', size, seed=0)
+        peaks.append(run_one(g, 'astar', 'octile', 2000, True)['peak_kb'])
+        profiler = RunProfiler(trace_memory=True)
+        try:
+            AStar(g).solve(2000)
+            traced.append(profiler.report()['traced_peak_kb'])
+        finally:
+            profiler.close()
+    for p in (peaks, traced):
+        assert p[1] > 0.95 * p[0] and p[2] > 1.5 * p[1]
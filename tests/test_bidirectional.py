@@ -0,0 +1,76 @@
+import math
+import random
+from backend.algorithms.grid import Grid
+from backend.algorithms.astar import AStar, Heuristic
+from backend.algorithms.dijkstra import Dijkstra
+from backend.algorithms.bidirectional import BidirectionalAStar
+from backend.algorithms.base import merge_snapshots
+
+
+def run_all(algo):
+    last = None
+    for _ in range(100000):
+        snap = algo.step()
+        last = snap
+        if snap.get('finished'):
+            return snap
+    return last
+
+
+def test_bidirectional_cost_matches_dijkstra():
+    for seed in range(80):
+        rng = random.Random(seed)
+        n = rng.randint(3, 25)
+        diagonal = seed % 4 != 0
+        obstacles = {(rng.randrange(n), rng.randrange(n)) for _ in range(int(n * n * 0.3))}
+        start, goal = (rng.randrange(n), rng.randrange(n)), (rng.randrange(n), rng.randrange(n))
+        g = Grid(n, obstacles - {start, goal}, start, goal, diagonal)
+        ref = Dijkstra(g).solve()
+        h = Heuristic.octile if diagonal else Heuristic.manhattan
+        snap = run_all(BidirectionalAStar(g, heuristic=h))
+        res = BidirectionalAStar(g, heuristic=h).solve()
+        assert res['found'] == ref['found']
+        if ref['found']:
+            assert math.isclose(res['cost'], ref['cost'], rel_tol=1e-9)
+            assert math.isclose(snap['stats']['cost'], ref['cost'], rel_tol=1e-9)
+            path = res['path']
+            assert path[0] == start and path[-1] == goal
+            assert math.isclose(sum(g.move_cost(a, b) for a, b in zip(path, path[1:])), res['cost'], rel_tol=1e-9, abs_tol=1e-12)
+            assert all(g.is_free(*p) for p in path[1:])
+        else:
+            assert snap['path'] == []
+
+
+def test_bidirectional_expands_less_on_open_map():
+    g = Grid(300, set(), (5, 150), (290, 140), True)
+    a = AStar(g, heuristic=Heuristic.octile).solve()
+    b = BidirectionalAStar(g).solve()
+    assert math.isclose(a['cost'], b['cost'])
+    assert b['expanded'] < a['expanded'] // 2
+    assert 0 < b['expanded_backward'] < b['expanded']
+
+
+def test_backward_frontier_deltas_replay_to_full_state():
+    obstacles = {(5, y) for y in range(1, 12)}
+    g = Grid(12, obstacles, (0, 6), (11, 6), True)
+    b = BidirectionalAStar(g)
+    b.delta = True
+    init = b.resync()['backward']
+    open_cells = {xy for xy, _, _, _ in init['open']}
+    closed_cells = set(init['closed'])
+    finished = False
+    while not finished:
+        merged = None
+        for _ in range(5):
+            snap = b.step()
+            merged = snap if merged is None else merge_snapshots(merged, snap)
+            finished = bool(snap.get('finished'))
+            if finished:
+                break
+        d = merged['backward']['delta']
+        open_cells -= set(d['open_remove'])
+        open_cells |= {xy for xy, _, _, _ in d['open_add']}
+        closed_cells.update(d['closed_add'])
+        assert open_cells == set(b.back.open_cells())
+        assert closed_cells == b.back.closed_cells()
+    assert merged['path'][0] == (0, 6) and merged['path'][-1] == (11, 6)
@@ -0,0 +1,59 @@
+import math
+import random
+from backend.algorithms.grid import Grid
+from backend.algorithms.dijkstra import Dijkstra
+from backend.algorithms.dstar_lite import DStarLite
+
+
+def run_all(algo):
+    last = None
+    for _ in range(100000):
+        snap = algo.step()
+        last = snap
+        if snap.get('finished'):
+            return snap
+    return last
+
+
+def test_dstar_lite_replans_to_optimal_cost_after_edits():
+    for seed in range(40):
+        rng = random.Random(seed)
+        n = rng.randint(6, 18)
+        diagonal = seed % 3 != 0
+        start, goal = (0, 0), (n - 1, n - 1)
+        obstacles = {(rng.randrange(n), rng.randrange(n)) for _ in range(int(n * n * 0.25))} - {start, goal}
+        g = Grid(n, obstacles, start, goal, diagonal)
+        d = DStarLite(g)
+        for _ in range(4):
+            snap = run_all(d)
+            ref = Dijkstra(Grid.from_array(g.occ.copy(), start, goal, diagonal)).solve()
+            assert snap['finished']
+            if ref['found']:
+                assert math.isclose(snap['stats']['cost'], ref['cost'], rel_tol=1e-9)
+                path = snap['path']
+                assert path[0] == start and path[-1] == goal
+                assert all(g.is_free(*p) for p in path[1:])
+            else:
+                assert snap['path'] == []
+            cells = [(rng.randrange(n), rng.randrange(n)) for _ in range(3)]
+            if rng.random() < 0.6:
+                d.update_obstacles(add=[c for c in cells if c not in (start, goal)])
+            else:
+                d.update_obstacles(remove=sorted(g.obstacles)[:3])
+
+
+def test_dstar_lite_repair_is_local():
+    rng = random.Random(3)
+    n = 60
+    start, goal = (0, 0), (n - 1, n - 1)
+    obstacles = {(rng.randrange(n), rng.randrange(n)) for _ in range(n * n // 4)} - {start, goal}
+    g = Grid(n, obstacles, start, goal, True)
+    d = DStarLite(g)
+    first = d.solve()
+    assert first['found'] and first['replans'] == 0
+    d.update_obstacles(add=[first['path'][10]])
+    second = d.solve()
+    ref = Dijkstra(Grid.from_array(g.occ.copy(), start, goal, True)).solve()
+    assert second['replans'] == 1
+    assert math.isclose(second['cost'], ref['cost'], rel_tol=1e-9)
+    assert 0 < second['replan_expanded'] < first['expanded'] // 4
@@ -0,0 +1,110 @@
+import numpy as np
+from backend import app as app_module
+from backend import registry
+from backend.algorithms.flowfield import FlowField, FlowFieldPlanner
+from backend.algorithms.grid import Grid
+from backend.algorithms.astar import AStar
+from backend.algorithms.dijkstra import distance_field
+from benchmarks.maps import make_map
+
+
+def _check_path(g, path, cost):
+    assert path[-1] == g.goal
+    total = 0.0
+    for a, b in zip(path, path[1:]):
+        assert b in g.neighbors(*a)
+        total += g.move_cost(a, b)
+    assert abs(total - cost) < 1e-9
+
+
+def test_field_matches_dijkstra_and_astar():
+    for kind in ('random', 'rooms', 'maze'):
+        for diagonal in (True, False):
+            g = make_map(kind, 41, seed=4)
+            g = Grid.from_array(g.occ, g.start, g.goal, diagonal)
+            field = FlowField(g, g.goal)
+            ref = distance_field(g, g.goal)
+            free = g.occ == 0
+            assert np.allclose(field.integration[free], ref[free], rtol=0, atol=1e-9)
+            for start in [g.start, (0, 0), (20, 3), (40, 40)]:
+                res = AStar(g.with_endpoints(start, g.goal)).solve()
+                path, cost = field.walk(start)
+                if not res['found']:
+                    assert path == [] and cost is None
+                    continue
+                assert abs(cost - res['cost']) < 1e-9
+                _check_path(g, path, cost)
+
+
+def test_blocked_start_steps_off_and_walls_stop_agents():
+    g = Grid(10, [(4, y) for y in range(10)] + [(7, 7)], (0, 0), (9, 9), True)
+    field = FlowField(g, g.goal)
+    path, cost = field.walk((7, 7))
+    assert path[0] == (7, 7) and path[1] == (8, 8) and abs(cost - 2 * 2 ** 0.5) < 1e-9
+    assert field.walk((0, 0)) == ([], None) and field.walk((-1, 0)) == ([], None)
+    assert field.walk((9, 9)) == ([(9, 9)], 0.0)
+    assert not field.directions.flags.writeable
+
+
+def test_planner_steps_caches_and_rebuilds_after_edits():
+    reg = registry.MapRegistry()
+    g = make_map('rooms', 32, seed=2)
+    entry = reg.entry(g.occ.copy(), g.diagonal)
+    stepper = FlowFieldPlanner(g, entry)
+    stepper.delta = True
+    snap = stepper.step()
+    assert not snap.get('finished') and snap['current'] == g.goal and snap['delta']['closed_add'] == [g.goal]
+    while not snap.get('finished'):
+        snap = stepper.step()
+    ref = AStar(g).solve()
+    assert abs(snap['stats']['cost'] - ref['cost']) < 1e-9 and snap['path'][0] == g.start
+    assert snap['stats']['flow_field'] == 'build' and snap['stats']['expanded'] >= snap['stats']['reached']
+    # the stepped field is cached: another start on the same map is answered without a wavefront
+    other = FlowFieldPlanner(entry.query_grid((1, 1), g.goal), entry).solve()
+    assert other['flow_field'] == 'hit' and other['expanded'] == 0
+    assert abs(other['cost'] - AStar(g.with_endpoints((1, 1), g.goal)).solve()['cost']) < 1e-9
+    # the field counts toward the registry budget and doubles as the exact distance field
+    assert reg.stats()['bytes'] >= entry.grid.occ.nbytes + stepper.field.nbytes
+    assert entry.distance_field(g.goal) is stepper.field.integration
+    edited = g.copy()
+    edited.set_obstacles([snap['path'][len(snap['path']) // 2]], True)
+    edited_entry = reg.entry(edited.occ.copy(), edited.diagonal)
+    res = FlowFieldPlanner(edited, edited_entry).solve()
+    assert res['flow_field'] == 'build' and res['expanded'] > 0
+    assert abs(res['cost'] - AStar(edited).solve()['cost']) < 1e-9
+    assert edited_entry.flow_field(edited.goal)[1] == 'hit'
+
+
+def test_map_entry_sheds_flow_fields_under_its_budget():
+    g = make_map('random', 32, seed=1)
+    reg = registry.MapRegistry(max_bytes=1 << 30, max_fields=2)
+    entry = reg.entry(g.occ.copy(), g.diagonal)
+    exact = entry.distance_field(g.goal)
+    field, cache = entry.flow_field(g.goal)
+    # the cached distance field is taken over rather than recomputed and counted twice
+    assert cache == 'build' and np.shares_memory(field.integration, exact) and not entry._fields
+    free = [(x, y) for x, y in [(0, 0), (31, 0), (0, 31), (15, 15)] if g.is_free(x, y)]
+    for goal in free:
+        entry.flow_field(goal)
+    assert len(entry._flows) == 2
+    reg.max_bytes = entry.grid.occ.nbytes + entry.grid.mask.nbytes
+    reg._evict(entry.key)
+    assert len(entry._flows) == 1 and reg.stats()['maps'] == 1
+
+
+def test_flowfield_endpoint(monkeypatch):
+    monkeypatch.setattr(registry, '_DEFAULT', registry.MapRegistry())
+    wall = [(10, y) for y in range(1, 20)]
+    starts = [(0, 0), (5, 19), (15, 3), (10, 5)]
+    payload = app_module.FlowPayload(size=20, obstacles=wall, goal=(19, 19), starts=starts)
+    out = app_module.flow_field(payload)
+    assert out['stats']['flow_field'] == 'build' and [r['index'] for r in out['results']] == [0, 1, 2, 3]
+    for r, start in zip(out['results'], starts):
+        ref = AStar(Grid(20, wall, start, (19, 19))).solve()
+        assert r['found'] == ref['found']
+        if ref['found']:
+            assert abs(r['cost'] - ref['cost']) < 1e-9 and r['path'][0] == start and r['path_len'] == len(r['path'])
+    assert app_module.flow_field(payload)['stats']['flow_field'] == 'hit'
+    assert registry.default_registry().stats()['bytes'] > 20 * 20 * 8
+    payload.include_path = False
+    assert 'path' not in app_module.flow_field(payload)['results'][0]
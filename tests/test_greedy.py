@@ -0,0 +1,11 @@
+from backend.algorithms.grid import Grid
+from backend.algorithms.greedy import GreedyBestFirst
+
+
+def test_greedy_keeps_one_open_entry_per_cell():
+    g = Grid(40, {(20, y) for y in range(39)}, (0, 0), (39, 0), True)
+    algo = GreedyBestFirst(g)
+    res = algo.solve()
+    assert res['found'] and res['path'][0] == (0, 0) and res['path'][-1] == (39, 0)
+    # every cell is expanded at most once
+    assert res['expanded'] == len(algo.closed_cells())
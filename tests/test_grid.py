@@ -0,0 +1,141 @@
+import random
+from collections import deque
+import numpy as np
+import pytest
+from backend.algorithms.grid import Grid, SQRT2, label_components
+
+
+def naive_neighbors(size, obstacles, x, y, diagonal):
+    dirs4 = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    dirs8 = dirs4 + [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+    res = []
+    for dx, dy in (dirs8 if diagonal else dirs4):
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < size and 0 <= ny < size and (nx, ny) not in obstacles:
+            res.append((nx, ny))
+    return res
+
+
+def test_neighbor_tables_match_set_semantics():
+    rng = random.Random(3)
+    size = 17
+    obstacles = {(rng.randrange(size), rng.randrange(size)) for _ in range(90)}
+    for diagonal in (True, False):
+        g = Grid(size, obstacles, (0, 0), (size - 1, size - 1), diagonal)
+        assert g.obstacles == obstacles
+        for y in range(size):
+            for x in range(size):
+                expected = naive_neighbors(size, obstacles, x, y, diagonal)
+                assert g.neighbors(x, y) == expected
+                assert [(nx, ny) for nx, ny, _ in g.neighbors_cost(x, y)] == expected
+                i = g.index(x, y)
+                assert [g.coord(i + off) for off, _ in g.neighbor_offsets(i)] == expected
+                for nx, ny, c in g.neighbors_cost(x, y):
+                    assert c == (SQRT2 if nx != x and ny != y else 1.0)
+
+
+def test_from_array_matches_obstacle_list():
+    occ = np.zeros((8, 8), dtype=np.uint8)
+    occ[3, 1:7] = 1
+    g = Grid.from_array(occ, (0, 0), (7, 7))
+    h = Grid(8, {(x, 3) for x in range(1, 7)}, (0, 0), (7, 7))
+    assert g.obstacles == h.obstacles
+    assert not g.is_free(2, 3) and g.is_free(0, 3) and not g.is_free(-1, 0)
+
+
+def test_set_obstacles_patches_neighbor_masks():
+    rng = random.Random(5)
+    size = 12
+    obstacles = {(rng.randrange(size), rng.randrange(size)) for _ in range(30)}
+    for diagonal in (True, False):
+        g = Grid(size, obstacles, (0, 0), (11, 11), diagonal)
+        fp = g.fingerprint()
+        added = g.set_obstacles([(3, 3), (0, 5), (11, 0)], True)
+        removed = g.set_obstacles(list(obstacles)[:10], False)
+        assert removed and g.fingerprint() != fp
+        expected = (obstacles | set(added)) - set(removed)
+        fresh = Grid(size, expected, (0, 0), (11, 11), diagonal)
+        assert g.obstacles == expected
+        assert (g.mask == fresh.mask).all()
+        assert g.fingerprint() == fresh.fingerprint()
+
+
+def flood_labels(grid):
+    labels = -np.ones((grid.size, grid.size), dtype=np.int64)
+    for y in range(grid.size):
+        for x in range(grid.size):
+            if grid.occ[y, x] or labels[y, x] >= 0:
+                continue
+            root = y * grid.size + x
+            labels[y, x] = root
+            q = deque([(x, y)])
+            while q:
+                cx, cy = q.popleft()
+                for nx, ny in grid.neighbors(cx, cy):
+                    if labels[ny, nx] < 0:
+                        labels[ny, nx] = root
+                        q.append((nx, ny))
+    return labels
+
+
+def test_component_labels_match_flood_fill():
+    for seed in range(40):
+        rng = np.random.default_rng(seed)
+        n = int(rng.integers(1, 40))
+        occ = (rng.random((n, n)) < rng.uniform(0.2, 0.6)).astype(np.uint8)
+        for diagonal in (True, False):
+            g = Grid.from_array(occ, (0, 0), (n - 1, n - 1), diagonal)
+            assert np.array_equal(label_components(occ, diagonal), flood_labels(g))
+
+
+def test_reachable_and_blocked_start():
+    g = Grid(6, [(2, y) for y in range(6)] + [(0, 0)], (0, 0), (5, 5), True)
+    assert not g.reachable((1, 1), (5, 5)) and g.reachable((0, 0), (1, 3))
+    assert not g.reachable((1, 1), (2, 2)) and g.reachable((3, 3), (3, 3))
+    g.set_obstacles([(2, 4)], False)
+    assert g.reachable((1, 1), (5, 5))
+
+
+def test_copy_and_freeze():
+    g = Grid(8, [(3, 3)], (0, 0), (7, 7), True)
+    g.components()
+    frozen = g.copy().freeze()
+    with pytest.raises(ValueError):
+        frozen.set_obstacles([(1, 1)])
+    c = frozen.copy()
+    c.set_obstacles([(4, 4)])
+    assert c.occ[4, 4] and not frozen.occ[4, 4] and not g.occ[4, 4]
+    assert frozen.neighbors(3, 4) == g.neighbors(3, 4) != c.neighbors(3, 4)
+    q = frozen.with_endpoints((1, 1), (6, 6))
+    assert q.occ is frozen.occ and q.start == (1, 1) and frozen.start == (0, 0)
+
+
+def same_partition(a, b):
+    # equal up to renaming, and every label is the index of a cell of its own component
+    if not np.array_equal(a < 0, b < 0):
+        return False
+    free = a >= 0
+    pairs = set(zip(a[free].tolist(), b[free].tolist()))
+    roots = a[free]
+    return len(pairs) == len(set(roots.tolist())) == len(set(b[free].tolist())) and (a.ravel()[roots] == roots).all()
+
+
+def test_labels_patched_on_edits():
+    for seed in range(60):
+        rng = random.Random(seed)
+        n = rng.randint(2, 14)
+        occ = (np.random.default_rng(seed).random((n, n)) < rng.uniform(0.1, 0.6)).astype(np.uint8)
+        for diagonal in (True, False):
+            g = Grid.from_array(occ.copy(), (0, 0), (n - 1, n - 1), diagonal)
+            g.components()
+            for _ in range(20):
+                cells = [(rng.randrange(n), rng.randrange(n)) for _ in range(rng.randint(1, 4))]
+                g.set_obstacles(cells, rng.random() < 0.5)
+                assert g._labels is not None
+                assert same_partition(g._labels, label_components(g.occ, diagonal))
+    # closing a wall across a big map splits two large halves (relabel fallback)
+    g = Grid(100, [(50, y) for y in range(99)], (0, 0), (99, 99), False)
+    assert g.reachable((0, 0), (99, 99))
+    g.set_obstacles([(50, 99)])
+    assert not g.reachable((0, 0), (99, 99))
+    assert same_partition(g._labels, label_components(g.occ, False))
@@ -0,0 +1,99 @@
+import math
+import random
+import threading
+import numpy as np
+from backend.algorithms.grid import Grid
+from backend.algorithms.astar import AStar, Heuristic
+from backend.algorithms.dijkstra import Dijkstra
+from backend.algorithms import hpa
+
+
+def random_grid(seed):
+    rng = random.Random(seed)
+    n = rng.randint(6, 40)
+    obstacles = {(rng.randrange(n), rng.randrange(n)) for _ in range(int(n * n * rng.choice([0.1, 0.25, 0.4])))}
+    start, goal = (rng.randrange(n), rng.randrange(n)), (rng.randrange(n), rng.randrange(n))
+    return Grid(n, obstacles - {start, goal}, start, goal, rng.random() < 0.7)
+
+
+def test_hpa_finds_valid_paths_whenever_astar_does():
+    for seed in range(40):
+        g = random_grid(seed)
+        a = AStar(g, heuristic=Heuristic.octile).solve()
+        h = hpa.HPAStar(g, cluster_size=random.Random(seed).choice([4, 8])).solve()
+        assert a['found'] == h['found']
+        if h['found']:
+            path = h['path']
+            assert path[0] == g.start and path[-1] == g.goal
+            assert all(q in g.neighbors(*p) for p, q in zip(path, path[1:]))
+            cost = sum(g.move_cost(p, q) for p, q in zip(path, path[1:]))
+            assert math.isclose(cost, h['cost'], rel_tol=1e-9, abs_tol=1e-9)
+            assert h['cost'] >= a['cost'] - 1e-9
+
+
+def test_hpa_steps_off_a_blocked_start():
+    # the start may be an obstacle (as in Grid): its free neighbours can lie in other clusters
+    for seed in range(300):
+        rng = random.Random(seed)
+        obstacles = {(rng.randrange(13), rng.randrange(13)) for _ in range(int(13 * 13 * 0.45))}
+        g = Grid(13, (obstacles | {(7, 6)}) - {(1, 11)}, (7, 6), (1, 11), True)
+        ref = Dijkstra(g).solve()
+        for cs in (4, 8):
+            h = hpa.HPAStar(g, cluster_size=cs).solve()
+            assert h['found'] == ref['found']
+            if h['found']:
+                path = h['path']
+                assert path[0] == g.start and path[-1] == g.goal
+                assert all(q in g.neighbors(*p) for p, q in zip(path, path[1:]))
+                assert math.isclose(sum(g.move_cost(p, q) for p, q in zip(path, path[1:])), h['cost'], abs_tol=1e-9)
+                assert h['cost'] >= ref['cost'] - 1e-9
+
+
+def test_abstraction_is_cached_and_updated_incrementally():
+    hpa._CACHE.clear()
+    rng = np.random.default_rng(1)
+    occ = (rng.random((48, 48)) < 0.2).astype(np.uint8)
+    occ[0, 0] = occ[47, 47] = 0
+    first = hpa.HPAStar(Grid.from_array(occ, (0, 0), (47, 47)), cluster_size=8)
+    again = hpa.HPAStar(Grid.from_array(occ, (0, 0), (47, 47)), cluster_size=8)
+    assert (first.cache, again.cache) == ("build", "hit")
+    edited = occ.copy()
+    edited[10:14, 20] = 1
+    edited[30, 5:9] = 0
+    updated = hpa.HPAStar(Grid.from_array(edited, (0, 0), (47, 47)), cluster_size=8)
+    assert updated.cache == "update"
+    fresh = hpa.Abstraction(edited, True, 8)
+    assert updated.abstraction.adj == fresh.adj
+    assert first.abstraction.adj != fresh.adj
+
+
+def test_abstraction_builds_once_outside_the_cache_lock(monkeypatch):
+    hpa._CACHE.clear()
+    cached = Grid(16, {(3, 3)}, (0, 0), (15, 15), True)
+    hpa.get_abstraction(cached, 4)
+    fresh = Grid(16, {(5, 9), (9, 5)}, (0, 0), (15, 15), True)
+    entered, release, builds = threading.Event(), threading.Event(), []
+    derive = hpa._derive
+
+    def slow(grid, cluster_size, base):
+        builds.append(grid)
+        entered.set()
+        release.wait(10)
+        return derive(grid, cluster_size, None)
+
+    monkeypatch.setattr(hpa, "_derive", slow)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(hpa.get_abstraction(fresh, 4))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    assert entered.wait(10)
+    # other maps are served while the build runs
+    assert hpa.get_abstraction(cached, 4)[1] == "hit"
+    release.set()
+    for t in threads:
+        t.join(10)
+    assert len(builds) == 1
+    hows = sorted(how for _, how in results)
+    assert hows[0] == "build" and set(hows[1:]) <= {"shared", "hit"} and len(hows) == 4
+    assert len({id(ab) for ab, _ in results}) == 1
+    assert hpa.get_abstraction(fresh, 4)[1] == "hit" and not hpa._FLIGHTS
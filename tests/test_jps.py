@@ -0,0 +1,41 @@
+import math
+import random
+from backend.algorithms.grid import Grid
+from backend.algorithms.astar import AStar, Heuristic
+from backend.algorithms.jps import JumpPointSearch
+
+
+def run_all(algo):
+    last = None
+    for _ in range(10000):
+        snap = algo.step()
+        last = snap
+        if snap.get('finished'):
+            return snap
+    return last
+
+
+def test_jps_cost_matches_octile_astar_on_random_maps():
+    for seed in range(60):
+        rng = random.Random(seed)
+        n = rng.randint(6, 25)
+        obstacles = {(rng.randrange(n), rng.randrange(n)) for _ in range(int(n * n * 0.3))}
+        start, goal = (rng.randrange(n), rng.randrange(n)), (rng.randrange(n), rng.randrange(n))
+        g = Grid(n, obstacles - {start, goal}, start, goal, True)
+        a = AStar(g, heuristic=Heuristic.octile).solve()
+        j = JumpPointSearch(g).solve()
+        assert a['found'] == j['found']
+        if a['found']:
+            assert math.isclose(a['cost'], j['cost'], rel_tol=1e-9)
+            path = j['path']
+            assert path[0] == start and path[-1] == goal
+            assert all(max(abs(p[0] - q[0]), abs(p[1] - q[1])) == 1 for p, q in zip(path, path[1:]))
+
+
+def test_jps_stepping_expands_fewer_nodes_on_open_grid():
+    g = Grid(40, set(), (0, 0), (39, 20), True)
+    sa = run_all(AStar(g, heuristic=Heuristic.octile))
+    sj = run_all(JumpPointSearch(g))
+    assert sj['finished'] and math.isclose(sa['stats']['cost'], sj['stats']['cost'], rel_tol=1e-9)
+    assert sj['stats']['expanded'] < sa['stats']['expanded']
+    assert len(sj['path']) == len(sa['path'])
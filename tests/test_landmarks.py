@@ -0,0 +1,65 @@
+import numpy as np
+from backend import registry
+from backend.algorithms import landmarks
+from backend.algorithms.astar import AStar, Heuristic
+from backend.algorithms.dijkstra import distance_field
+from backend.algorithms.grid import Grid, occupancy
+from backend.planners import make_algorithm
+from benchmarks.maps import make_map
+
+
+def test_alt_field_is_admissible_and_consistent():
+    for kind, diagonal in (('rooms', True), ('maze', True), ('random', False)):
+        g = make_map(kind, 48, seed=3, diagonal=diagonal)
+        lm = landmarks.Landmarks(g, k=6)
+        assert lm.k == 6 and lm.table.dtype == np.float32 and lm.nbytes == 6 * 48 * 48 * 4
+        for goal in [g.goal, lm.cells[0]]:
+            alt = lm.heuristic(goal)
+            h = np.array([alt[i] for i in range(48 * 48)]).reshape(48, 48)
+            exact = distance_field(g, goal)
+            ok = np.isfinite(exact)
+            assert np.all(h[ok] <= exact[ok] + 1e-9)
+            base = Heuristic.field(Heuristic.octile if diagonal else Heuristic.manhattan, 48, goal)
+            assert np.all(h >= base)
+            # h(u) <= c(u, v) + h(v) for every move between free cells, up to float32 rounding
+            for y, x in np.argwhere(g.occ == 0)[::7]:
+                for off, cost in g._offsets_by_mask[g._mask[y * 48 + x]]:
+                    vy, vx = divmod(y * 48 + x + off, 48)
+                    assert h[y, x] <= cost + h[vy, vx] + 1e-5
+
+
+def test_alt_astar_is_optimal_with_fewer_expansions():
+    g = make_map('maze', 96, seed=1)
+    reg = registry.MapRegistry()
+    entry = reg.entry(g.occ.copy(), g.diagonal)
+    free = np.argwhere(g.occ == 0)
+    rng = np.random.default_rng(0)
+    total_ref = total_alt = 0
+    for n in range(6):
+        (sy, sx), (ty, tx) = free[rng.integers(len(free), size=2)]
+        q = g.with_endpoints((int(sx), int(sy)), (int(tx), int(ty)))
+        ref = AStar(q).solve()
+        res = make_algorithm(entry.query_grid(q.start, q.goal), 'astar', 'alt', entry=entry).solve()
+        assert res['found'] == ref['found'] and abs(res['cost'] - ref['cost']) < 1e-9
+        assert res['landmark_cache'] == ('build' if n == 0 else 'hit') and res['landmarks'] == 8
+        total_ref += ref['expanded']
+        total_alt += res['expanded']
+    assert total_alt * 2 < total_ref
+    # the tables live on the map's registry entry and count toward its budget
+    assert reg.stats()['bytes'] >= 8 * 96 * 96 * 4
+    ara = make_algorithm(entry.query_grid(g.start, g.goal), 'arastar', 'alt', entry=entry).solve()
+    assert ara['landmark_cache'] == 'hit' and abs(ara['cost'] - AStar(g).solve()['cost']) < 1e-9
+
+
+def test_alt_falls_back_outside_the_landmark_component():
+    # a walled-off pocket in the corner: landmarks land in the big component only
+    wall = [(x, 10) for x in range(11)] + [(10, y) for y in range(10)]
+    g = Grid.from_array(occupancy(40, wall), (2, 2), (7, 8))
+    lm = landmarks.Landmarks(g, k=4)
+    assert all(x > 10 or y > 10 for x, y in lm.cells)
+    alt = lm.heuristic(g.goal)
+    h = np.array([alt[i] for i in range(40 * 40)]).reshape(40, 40)
+    assert np.array_equal(h[:10, :10], Heuristic.field(Heuristic.octile, 40, g.goal)[:10, :10])
+    res = make_algorithm(g, 'astar', 'alt').solve()
+    assert res['landmark_cache'] == 'build'
+    assert res['found'] and abs(res['cost'] - AStar(g).solve()['cost']) < 1e-9
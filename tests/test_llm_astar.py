@@ -22,3 +22,24 @@ def test_llm_astar_works_without_api_key():
     sl = run_all(l)
     assert sa['finished'] and sl['finished']
     assert math.isclose(sa['stats']['cost'], sl['stats']['cost'], rel_tol=1e-6)
+
+
+def test_set_waypoints_rescores_open_set():
+    g = Grid(30, {(10, y) for y in range(25)}, (0, 0), (29, 0), True)
+    l = LLMAStar(g, heuristic=Heuristic.octile, waypoints=[g.start, g.goal])
+    for _ in range(60):
+        l.step()
+    l.set_waypoints([g.start, (10, 27), g.goal])
+    assert l.s_target == (10, 27)
+    cells = l.open_cells()
+    for (x, y), (g_, h, f) in cells.items():
+        assert h == l._heuristic_two(x, y)
+        assert f == g_ + l.weight * h
+    live = l._live_entries()
+    assert len(live) == len(l.open) == len(cells) == l.open_count
+    best = min(f for _, _, f in cells.values())
+    top = l._pop_open()
+    assert l._f[top] == best
+    l._push_open(top, l._g[top], l._h[top], l._f[top], l._parent[top])
+    snap = run_all(l)
+    assert snap['finished'] and snap['path'][-1] == g.goal
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from websockets.sync.client import connect
+from backend.algorithms.grid import Grid
+from backend.algorithms import llm_astar
+from backend.algorithms.llm_astar import LLMWaypointProvider
+from backend.algorithms.llm_cache import WaypointCache, default_cache
+
+
+class SlowLLM:
+    # stand-in for the chat endpoint with artificial latency
+    def __init__(self, delay):
+        fake = self
+        self.delay = delay
+        self.calls = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                fake.calls += 1
+                time.sleep(fake.delay)
+                body = json.dumps({'choices': [{'message': {'content': 'Generated Path: [[0, 0], [8, 1], [9, 9]]'}}]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_async_provider_keeps_loop_responsive(monkeypatch):
+    fake = SlowLLM(0.3)
+    monkeypatch.setenv('LLM_BASE_URL', fake.url)
+    monkeypatch.setenv('LLM_API_KEY', 'test')
+
+    async def main():
+        p = LLMWaypointProvider(cache=WaypointCache())
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        t = asyncio.create_task(ticker())
+        first = await p.aget_waypoints(Grid(10, set(), (0, 0), (9, 9), True))
+        second = await p.aget_waypoints(Grid(10, {(5, 5)}, (0, 0), (9, 9), True))
+        t.cancel()
+        return first, second, ticks
+
+    try:
+        first, second, ticks = asyncio.run(main())
+        assert first == second == [(0, 0), (8, 1), (9, 9)]
+        assert ticks >= 30
+        assert fake.calls == 2
+    finally:
+        fake.close()
+
+
+def test_async_provider_cancellation(monkeypatch):
+    fake = SlowLLM(2.0)
+    monkeypatch.setenv('LLM_BASE_URL', fake.url)
+    monkeypatch.setenv('LLM_API_KEY', 'test')
+    cache = WaypointCache()
+    # one LLM thread: it must be free again right after the cancel, not after the 2 s reply
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(llm_astar, '_EXECUTOR', executor)
+
+    async def main():
+        p = LLMWaypointProvider(cache=cache)
+        task = asyncio.create_task(p.aget_waypoints(Grid(10, set(), (0, 0), (9, 9), True)))
+        await asyncio.sleep(0.2)
+        t0 = time.perf_counter()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0)
+        return time.perf_counter() - t0, task.cancelled(), len(cache._async_flights)
+
+    try:
+        elapsed, cancelled, flights = asyncio.run(main())
+        assert cancelled and elapsed < 0.5 and flights == 0
+        assert not cache._mem
+        assert executor.submit(lambda: 1).result(timeout=0.5) == 1
+    finally:
+        executor.shutdown()
+        fake.close()
+
+
+def test_provider_applies_connect_timeout(monkeypatch):
+    # a listener whose backlog is full never completes the handshake
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(0)
+    pending = socket.create_connection(server.getsockname())
+    monkeypatch.setenv('LLM_BASE_URL', f'http://127.0.0.1:{server.getsockname()[1]}')
+    monkeypatch.setenv('LLM_API_KEY', 'test')
+    monkeypatch.setenv('LLM_CONNECT_TIMEOUT', '0.2')
+    monkeypatch.setenv('LLM_READ_TIMEOUT', '30')
+    try:
+        t0 = time.perf_counter()
+        assert LLMWaypointProvider(cache=WaypointCache())._ask('prompt') == ''
+        assert time.perf_counter() - t0 < 2
+    finally:
+        pending.close()
+        server.close()
+
+
+def test_async_provider_times_out(monkeypatch):
+    fake = SlowLLM(2.0)
+    monkeypatch.setenv('LLM_BASE_URL', fake.url)
+    monkeypatch.setenv('LLM_API_KEY', 'test')
+    monkeypatch.setenv('LLM_CONNECT_TIMEOUT', '0.1')
+    monkeypatch.setenv('LLM_READ_TIMEOUT', '0.2')
+    try:
+        t0 = time.perf_counter()
+        pts = asyncio.run(LLMWaypointProvider(cache=WaypointCache()).aget_waypoints(Grid(10, set(), (0, 0), (9, 9), True)))
+        assert pts == [(0, 0), (9, 9)] and time.perf_counter() - t0 < 1.5
+    finally:
+        fake.close()
+
+
+def test_ws_expands_before_waypoints_arrive(monkeypatch, app_port):
+    fake = SlowLLM(0.5)
+    monkeypatch.setenv('LLM_BASE_URL', fake.url)
+    monkeypatch.setenv('LLM_API_KEY', 'test')
+    default_cache().clear()
+    try:
+        with connect(f'ws://127.0.0.1:{app_port}/ws') as ws:
+            def send(msg):
+                ws.send(json.dumps(msg))
+
+            def recv():
+                return json.loads(ws.recv(timeout=5))
+
+            t0 = time.perf_counter()
+            send({'type': 'start', 'payload': {'size': 10, 'obstacles': [[4, 4]], 'start': [0, 0], 'goal': [9, 9], 'algorithm': 'llm_astar'}})
+            assert recv()['type'] == 'ok'
+            assert recv()['type'] == 'snapshot'
+            send({'type': 'step'})
+            assert recv()['type'] == 'snapshot'
+            assert time.perf_counter() - t0 < 0.4
+            msg = recv()
+            assert msg['type'] == 'llm_waypoints'
+            assert msg['targets'] == [[0, 0], [8, 1], [9, 9]] and msg['llm_cache'] == 'miss'
+            send({'type': 'step_n', 'n': 1000})
+            assert recv()['type'] == 'finished'
+    finally:
+        fake.close()
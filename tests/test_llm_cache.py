@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from backend.algorithms.grid import Grid
+from backend.algorithms.llm_astar import LLMAStar, LLMWaypointProvider
+from backend.algorithms.llm_cache import WaypointCache
+
+
+class FakeLLM:
+    # local chat-completions endpoint that counts requests and answers slowly
+    def __init__(self, delay=0.2):
+        fake = self
+        self.calls = 0
+        self.delay = delay
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                fake.calls += 1
+                time.sleep(fake.delay)
+                body = json.dumps({'choices': [{'message': {'content': 'Generated Path: [[0, 0], [5, 2], [9, 9]]'}}]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_provider(monkeypatch, fake, cache):
+    monkeypatch.setenv('LLM_BASE_URL', fake.url)
+    monkeypatch.setenv('LLM_API_KEY', 'test')
+    return LLMWaypointProvider(cache=cache)
+
+
+def test_cache_hits_and_single_flight(monkeypatch):
+    fake = FakeLLM()
+    try:
+        cache = WaypointCache()
+        g = Grid(10, {(3, y) for y in range(7)}, (0, 0), (9, 9), True)
+        results = []
+
+        def worker():
+            p = make_provider(monkeypatch, fake, cache)
+            results.append((p.get_waypoints(g), p.last_cache))
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert fake.calls == 1
+        assert sorted(src for _, src in results) == ['miss'] + ['shared'] * 5
+        assert all(w == [(0, 0), (5, 2), (9, 9)] for w, _ in results)
+
+        a = LLMAStar(g, provider=make_provider(monkeypatch, fake, cache))
+        assert a.solve()['llm_cache'] == 'memory' and fake.calls == 1
+        other = Grid(10, {(4, y) for y in range(7)}, (0, 0), (9, 9), True)
+        make_provider(monkeypatch, fake, cache).get_waypoints(other)
+        assert fake.calls == 2
+    finally:
+        fake.close()
+
+
+def test_cache_ttl_and_disk_tier(monkeypatch, tmp_path):
+    fake = FakeLLM(delay=0)
+    now = [1000.0]
+    try:
+        g = Grid(10, set(), (0, 0), (9, 9), True)
+        cache = WaypointCache(ttl=60, directory=str(tmp_path), clock=lambda: now[0])
+        p = make_provider(monkeypatch, fake, cache)
+        p.get_waypoints(g)
+        assert p.last_cache == 'miss' and fake.calls == 1
+        # a fresh process-level cache finds the entry on disk
+        fresh = WaypointCache(ttl=60, directory=str(tmp_path), clock=lambda: now[0])
+        p = make_provider(monkeypatch, fake, fresh)
+        p.get_waypoints(g)
+        assert p.last_cache == 'disk' and fake.calls == 1
+        p.get_waypoints(g)
+        assert p.last_cache == 'memory'
+        now[0] += 61
+        p.get_waypoints(g)
+        assert p.last_cache == 'miss' and fake.calls == 2
+    finally:
+        fake.close()
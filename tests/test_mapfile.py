@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from backend import app as app_module
+from backend import maps, registry
+from backend.algorithms.mapfile import load_movingai_map, load_scenarios, load_pbm, save_pbm, load_map
+from backend.algorithms.grid import Grid
+from backend.algorithms.dijkstra import Dijkstra
+
+
+MAP = 'type octile\r\nheight 3\r\nwidth 5\r\nmap\r\n.@.T.\r\nG...W\r\nS.O..\r\n'
+SCEN = 'version 1\n0\tm.map\t5\t3\t0\t0\t4\t2\t4.82842712\n1\tm.map\t5\t3\t2\t0\t0\t2\t2.82842712\n'
+
+
+def test_movingai_map_and_scenarios(tmp_path):
+    (tmp_path / 'm.map').write_bytes(MAP.encode())
+    (tmp_path / 'm.map.scen').write_text(SCEN)
+    occ = load_movingai_map(str(tmp_path / 'm.map'))
+    expected = np.array([
+        [0, 1, 0, 1, 0],
+        [0, 0, 0, 0, 1],
+        [0, 0, 1, 0, 0],
+        [1, 1, 1, 1, 1],
+        [1, 1, 1, 1, 1],
+    ], dtype=np.uint8)
+    assert occ.dtype == np.uint8 and np.array_equal(occ, expected)
+    scen = load_scenarios(str(tmp_path / 'm.map.scen'))
+    assert [(s.start, s.goal) for s in scen] == [((0, 0), (4, 2)), ((2, 0), (0, 2))]
+    assert scen[0].width == 5 and scen[0].height == 3 and abs(scen[0].optimal - 4.82842712) < 1e-9
+
+
+def test_pbm_roundtrip(tmp_path):
+    rng = np.random.default_rng(0)
+    occ = (rng.random((13, 11)) < 0.3).astype(np.uint8)
+    save_pbm(str(tmp_path / 'a.pbm'), occ)
+    back = load_pbm(str(tmp_path / 'a.pbm'))
+    assert back.shape == (13, 13) and np.array_equal(back[:, :11], occ) and back[:, 11:].all()
+    # comments in the header are allowed
+    data = (tmp_path / 'a.pbm').read_bytes().replace(b'P4\n', b'P4\n# made by hand\n', 1)
+    (tmp_path / 'b.pbm').write_bytes(data)
+    assert np.array_equal(load_map(str(tmp_path / 'b.pbm')), back)
+    with pytest.raises(ValueError):
+        load_map(str(tmp_path / 'a.txt'))
+
+
+def test_map_store_and_endpoints(tmp_path, monkeypatch):
+    occ = np.zeros((20, 20), dtype=np.uint8)
+    occ[10, :19] = 1
+    save_pbm(str(tmp_path / 'wall.pbm'), occ)
+    (tmp_path / 'm.map').write_bytes(MAP.encode())
+    (tmp_path / 'm.map.scen').write_text(SCEN)
+    monkeypatch.setattr(maps, '_DEFAULT', maps.MapStore(str(tmp_path)))
+    monkeypatch.setattr(registry, '_DEFAULT', registry.MapRegistry())
+    store = maps.default_store()
+    assert store.ids() == ['m', 'wall']
+    assert not store.get('wall').flags.writeable and np.array_equal(store.get('wall'), occ)
+    with pytest.raises(KeyError):
+        store.get('../wall')
+    assert app_module.map_info('m') == {'id': 'm', 'size': 5, 'obstacles': 14, 'scenarios': 2}
+    assert app_module.map_scenarios('m', limit=1)['scenarios'][0]['goal'] == (4, 2)
+
+    payload = app_module.StartPayload(map_id='wall', start=(0, 0), goal=(0, 19), obstacles=[(19, 5)])
+    res = app_module.solve(payload)
+    ref_grid = Grid.from_array(occ.copy(), (0, 0), (0, 19))
+    ref_grid.set_obstacles([(19, 5)], True)
+    ref = Dijkstra(ref_grid).solve()
+    assert res['found'] and abs(res['cost'] - ref['cost']) < 1e-9
+    assert not store.get('wall')[5, 19]
+    with pytest.raises(HTTPException):
+        app_module.solve(app_module.StartPayload(map_id='nope', start=(0, 0), goal=(1, 1)))
+    # the registry holds the loaded map: later payloads naming it neither load nor hash it again
+    named = app_module.StartPayload(map_id='wall', start=(0, 0), goal=(0, 19))
+    entry = app_module.map_entry(named)
+    monkeypatch.setattr(store, 'get', None)
+    assert app_module.map_entry(named) is entry
+
+
+def test_payloads_need_a_map():
+    for cls, extra in ((app_module.StartPayload, {'start': (0, 0), 'goal': (1, 1)}),
+                       (app_module.BatchPayload, {'queries': []}),
+                       (app_module.FlowPayload, {'goal': (1, 1), 'starts': []})):
+        with pytest.raises(ValidationError):
+            cls(**extra)
+        with pytest.raises(ValidationError):
+            cls(size=-3, **extra)
+        assert cls(size=4, **extra).size == 4 and cls(map_id='m', **extra).map_id == 'm'
+
+
+def test_named_maps_leave_with_their_registry_entry():
+    loads = []
+
+    def load(n):
+        loads.append(n)
+        return np.zeros((n, n), dtype=np.uint8)
+
+    reg = registry.MapRegistry(max_bytes=3 * 2 * 32 * 32)
+    a = reg.named('a', True, lambda: load(32))
+    assert reg.named('a', True, lambda: load(32)) is a and loads == [32]
+    reg.named('b', True, lambda: load(33))
+    reg.named('c', True, lambda: load(34))
+    assert a.key not in reg._entries and ('a', True) not in reg._names
+    assert reg.named('a', True, lambda: load(32)) is not a and loads == [32, 33, 34, 32]
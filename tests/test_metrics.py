@@ -0,0 +1,70 @@
+import numpy as np
+from backend import app as app_module
+from backend.algorithms.grid import Grid
+from backend.algorithms.astar import AStar, Heuristic
+from backend.algorithms.bidirectional import BidirectionalAStar
+from backend.metrics import SearchMetrics
+
+
+def maze_grid():
+    rng = np.random.default_rng(4)
+    occ = (rng.random((40, 40)) < 0.25).astype(np.uint8)
+    occ[0, 0] = occ[39, 39] = 0
+    return Grid.from_array(occ, (0, 0), (39, 39), True)
+
+
+def test_counters_and_time_split():
+    algo = AStar(maze_grid(), weight=1.5)
+    algo.time_heuristics()
+    algo.time_heuristics()
+    assert algo.hf.__wrapped__ is Heuristic.octile
+    while not algo.step().get('finished'):
+        pass
+    st = algo.stats()
+    assert st['generated'] + st['reopened'] == algo.heap_pushes
+    assert st['heap_ops'] == algo.heap_pushes + algo.heap_pops and algo.heap_pops >= st['expanded']
+    assert 0 < st['peak_open'] <= st['generated']
+    assert st['heuristic_ms'] > 0 and st['expand_ms'] > 0 and st['snapshot_ms'] > 0
+    # timed heuristics still take the vectorized path
+    assert np.array_equal(Heuristic.batch(algo.hf, [3, -4], [1, 2]), Heuristic.batch(Heuristic.octile, [3, -4], [1, 2]))
+    res = AStar(maze_grid(), weight=1.5).solve()
+    assert res['expanded'] == st['expanded'] and res['heap_ops'] == st['heap_ops'] and res['heuristic_ms'] == 0
+    bi = BidirectionalAStar(maze_grid())
+    res = bi.solve()
+    assert res['generated'] == bi.generated + bi.back.generated
+
+
+def test_runner_profile_and_metrics(monkeypatch):
+    metrics = SearchMetrics()
+    monkeypatch.setattr(app_module, 'default_metrics', lambda: metrics)
+    runner = app_module.Runner()
+    runner.start(app_module.StartPayload(size=20, obstacles=[(5, y) for y in range(15)], start=(0, 0), goal=(19, 19),
+                                         profile=True, trace_memory=True))
+    msg = runner.step(10)
+    assert msg['type'] == 'snapshot' and msg['stats']['generated'] > 0
+    msg = runner.step(10000)
+    st = msg['stats']
+    assert msg['type'] == 'finished' and st['elapsed_ms'] <= st['wall_ms'] + 1
+    assert st['profile'] and all('func' in r for r in st['profile']) and st['traced_peak_kb'] >= 0
+    runner.close()
+    # the run is counted once even though it was reported on finish and again on close
+    assert metrics.runs[('ws', 'astar')] == 1 and metrics.counters[('expanded', 'astar')] == st['expanded']
+
+    app_module.solve(app_module.StartPayload(size=12, obstacles=[], start=(0, 0), goal=(11, 11), algorithm='jps'))
+    text = metrics.render({'pathfinder_map_cache_maps': 1})
+    assert 'pathfinder_runs_total{mode="solve",algorithm="jps"} 1' in text
+    assert '# TYPE pathfinder_expanded_total counter' in text and 'pathfinder_map_cache_maps 1' in text
+    body = app_module.metrics().body.decode()
+    assert 'pathfinder_sessions' in body and 'pathfinder_map_cache_bytes' in body
+
+
+def test_metric_labels_are_escaped_and_bounded(monkeypatch):
+    metrics = SearchMetrics()
+    monkeypatch.setattr(app_module, 'default_metrics', lambda: metrics)
+    evil = 'a"} 1\nevil_metric 999\n#'
+    res = app_module.solve(app_module.StartPayload(size=8, start=(0, 0), goal=(7, 7), algorithm=evil))
+    assert res['found'] and metrics.runs == {('solve', 'astar'): 1}
+    metrics.record_run('solve', 'x\\"\ny', {})
+    text = metrics.render()
+    assert 'algorithm="x\\\\\\"\\ny"' in text
+    assert all(not line or line.startswith(('#', 'pathfinder_')) for line in text.split('\n'))
@@ -0,0 +1,76 @@
+import time
+import numpy as np
+from backend import app as app_module
+from backend import registry
+from backend.algorithms.grid import Grid, occupancy
+from backend.algorithms.astar import AStar
+from backend.algorithms.dijkstra import Dijkstra, distance_field
+from backend.planners import make_algorithm
+from benchmarks.maps import make_map
+
+
+def test_distance_field_is_exact():
+    for kind in ('random', 'rooms'):
+        g = make_map(kind, 40, seed=1)
+        field = distance_field(g, g.goal)
+        for start in [(0, 0), (5, 30), (33, 2), g.start]:
+            if g.occ[start[1], start[0]]:
+                continue
+            ref = Dijkstra(g.with_endpoints(start, g.goal)).solve()
+            assert (ref['found'] and abs(field[start[1], start[0]] - ref['cost']) < 1e-9) or (not ref['found'] and np.isinf(field[start[1], start[0]]))
+
+
+def test_exact_heuristic_expands_only_the_path():
+    g = make_map('random', 64, seed=2)
+    field = distance_field(g, g.goal)
+    ref = AStar(g).solve()
+    res = make_algorithm(g, 'astar', 'exact', h_field=field).solve()
+    assert abs(res['cost'] - ref['cost']) < 1e-9 and res['expanded'] == len(res['path'])
+
+
+def test_registry_shares_and_evicts():
+    reg = registry.MapRegistry(max_bytes=3 * 2 * 32 * 32 + 100, max_fields=2)
+    a = reg.entry(occupancy(32, [(1, 1)]), True)
+    assert reg.entry(occupancy(32, [(1, 1)]), True) is a and reg.hits == 1
+    assert reg.entry(occupancy(32, [(1, 1)]), False) is not a
+    assert a.grid.frozen and a.query_grid((0, 0), (5, 5)).occ is a.grid.occ
+    reg.entry(occupancy(32, [(2, 2)]), True)
+    reg.entry(occupancy(32, [(3, 3)]), True)
+    assert reg.stats()['maps'] <= 3 and reg.entry(occupancy(32, [(1, 1)]), True) is not a
+    big = registry.MapRegistry(max_bytes=1 << 30, max_fields=2)
+    e = big.entry(occupancy(16, []), True)
+    f1 = e.distance_field((15, 15))
+    assert e.distance_field((15, 15)) is f1
+    e.distance_field((0, 15))
+    e.distance_field((15, 0))
+    assert len(e._fields) == 2 and (15, 15) not in e._fields
+
+
+def test_solve_uses_registry(monkeypatch):
+    monkeypatch.setattr(registry, '_DEFAULT', registry.MapRegistry())
+    wall = [(10, y) for y in range(40)]
+    payload = app_module.StartPayload(size=40, obstacles=wall, start=(0, 0), goal=(39, 39))
+    res = app_module.solve(payload)
+    assert res['unreachable'] and res['expanded'] == 0 and not res['found']
+    payload = app_module.StartPayload(size=40, obstacles=wall[:-1], start=(0, 0), goal=(39, 39), heuristic='exact')
+    res = app_module.solve(payload)
+    ref = Dijkstra(Grid(40, wall[:-1], (0, 0), (39, 39))).solve()
+    assert abs(res['cost'] - ref['cost']) < 1e-9 and res['expanded'] == len(res['path'])
+    t0 = time.perf_counter()
+    again = app_module.solve(payload)
+    assert again['cost'] == res['cost'] and time.perf_counter() - t0 < 0.5
+    assert registry.default_registry().stats()['maps'] == 2
+
+
+def test_exact_heuristic_survives_obstacle_edits(monkeypatch):
+    monkeypatch.setattr(registry, '_DEFAULT', registry.MapRegistry())
+    runner = app_module.Runner()
+    runner.start(app_module.StartPayload(size=30, start=(0, 0), goal=(29, 29), heuristic='exact'))
+    wall = [(15, y) for y in range(29)]
+    res = runner.edit_obstacles(wall, [])
+    assert res['restarted']
+    msg = runner.step(100000)
+    ref = Dijkstra(Grid(30, wall, (0, 0), (29, 29))).solve()
+    assert msg['type'] == 'finished' and abs(msg['stats']['cost'] - ref['cost']) < 1e-9
+    assert msg['stats']['expanded'] == len(msg['path'])
+    runner.close()
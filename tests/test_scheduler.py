@@ -0,0 +1,128 @@
+import json
+import time
+import pytest
+from fastapi import HTTPException
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect
+import backend.app as app_module
+from backend import registry
+from backend.scheduler import PoolLimitError, SearchPool
+
+
+START = {'type': 'start', 'payload': {'size': 200, 'obstacles': [], 'start': [0, 0], 'goal': [199, 199], 'algorithm': 'dijkstra'}}
+
+
+def test_pool_limits():
+    pool = SearchPool(workers=1, max_sessions=2, session_bytes=100, total_bytes=150)
+    assert pool.open_session() and pool.open_session()
+    assert not pool.open_session()
+    assert pool.stats()['sessions_rejected'] == 1
+    with pytest.raises(PoolLimitError):
+        pool.reserve(1, 101)
+    pool.reserve(1, 100)
+    pool.reserve(1, 80)  # replaces the first reservation
+    with pytest.raises(PoolLimitError):
+        pool.reserve(2, 80)
+    pool.reserve(2, 70)
+    assert pool.stats()['reserved_bytes'] == 150
+    pool.close_session(1)
+    pool.reserve(2, 100)
+    assert pool.stats()['reserved_bytes'] == 100
+
+
+def test_ws_coalesces_steps_while_busy(monkeypatch, app_port):
+    pool = SearchPool(workers=1)
+    monkeypatch.setattr(app_module, 'default_pool', lambda: pool)
+    with connect(f'ws://127.0.0.1:{app_port}/ws') as ws:
+        ws.send(json.dumps(START))
+        assert json.loads(ws.recv(timeout=5))['type'] == 'ok'
+        assert json.loads(ws.recv(timeout=5))['type'] == 'snapshot'
+        # keep the only worker busy so the steps pile up in the session's queue
+        pool.executor.submit(time.sleep, 0.3)
+        for _ in range(50):
+            ws.send(json.dumps({'type': 'step'}))
+        replies = []
+        while sum(r['steps'] for r in replies) < 50:
+            replies.append(json.loads(ws.recv(timeout=5)))
+        assert all(r['type'] == 'snapshot' for r in replies)
+        assert len(replies) < 50
+        assert pool.stats()['steps_coalesced'] == 50 - len(replies)
+        ws.send(json.dumps({'type': 'pause'}))
+        assert json.loads(ws.recv(timeout=5))['type'] == 'paused'
+
+
+def test_ws_session_and_memory_limits(monkeypatch, app_port):
+    pool = SearchPool(workers=1, max_sessions=1, session_bytes=1 << 20)
+    monkeypatch.setattr(app_module, 'default_pool', lambda: pool)
+    with connect(f'ws://127.0.0.1:{app_port}/ws') as ws:
+        # 200 x 200 cells need more than 1 MB of search state
+        ws.send(json.dumps(START))
+        msg = json.loads(ws.recv(timeout=5))
+        assert msg['type'] == 'error' and 'MB' in msg['message']
+        small = {'type': 'start', 'payload': {**START['payload'], 'size': 50, 'goal': [49, 49]}}
+        ws.send(json.dumps(small))
+        assert json.loads(ws.recv(timeout=5))['type'] == 'ok'
+        assert pool.stats()['reserved_bytes'] > 0
+        with connect(f'ws://127.0.0.1:{app_port}/ws') as other:
+            assert json.loads(other.recv(timeout=5))['type'] == 'error'
+            with pytest.raises(ConnectionClosed) as closed:
+                other.recv(timeout=5)
+            assert closed.value.rcvd.code == 1013
+    deadline = time.perf_counter() + 5
+    while pool.sessions and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    assert pool.sessions == 0 and pool.stats()['reserved_bytes'] == 0
+
+
+def test_ws_rejects_invalid_start_and_stays_open(monkeypatch, app_port):
+    pool = SearchPool(workers=1)
+    monkeypatch.setattr(app_module, 'default_pool', lambda: pool)
+    with connect(f'ws://127.0.0.1:{app_port}/ws') as ws:
+        ws.send(json.dumps({'type': 'start', 'payload': {'start': [0, 0], 'goal': [1, 1]}}))
+        msg = json.loads(ws.recv(timeout=5))
+        assert msg['type'] == 'error' and 'size' in msg['message']
+        small = {'type': 'start', 'payload': {**START['payload'], 'size': 20, 'goal': [19, 19]}}
+        ws.send(json.dumps(small))
+        assert json.loads(ws.recv(timeout=5))['type'] == 'ok'
+
+
+def test_out_of_bounds_endpoints_are_rejected(monkeypatch, app_port):
+    bad = {**START['payload'], 'size': 20, 'start': [0, 20], 'goal': [19, 19]}
+    with pytest.raises(HTTPException) as err:
+        app_module.solve(app_module.StartPayload(**bad))
+    assert err.value.status_code == 422
+    pool = SearchPool(workers=1)
+    monkeypatch.setattr(app_module, 'default_pool', lambda: pool)
+    with connect(f'ws://127.0.0.1:{app_port}/ws') as ws:
+        for payload in (bad, {**bad, 'start': [0, 0], 'goal': [-1, 5]}):
+            ws.send(json.dumps({'type': 'start', 'payload': payload}))
+            msg = json.loads(ws.recv(timeout=5))
+            assert msg == {'type': 'error', 'message': 'start or goal out of bounds'}
+        ws.send(json.dumps({'type': 'start', 'payload': {**bad, 'start': [0, 0]}}))
+        assert json.loads(ws.recv(timeout=5))['type'] == 'ok'
+
+
+def test_reservation_follows_the_state_a_search_touches(monkeypatch, app_port):
+    monkeypatch.setattr(registry, '_DEFAULT', registry.MapRegistry())
+    runner = app_module.Runner()
+    runner.start(app_module.StartPayload(size=4096, start=(0, 0), goal=(4095, 4095)))
+    # the grid copy and a few pages of state, far below the 4096 x 4096 worst case
+    assert runner.footprint() < 128 << 20
+    SearchPool(workers=1).reserve(1, runner.footprint())
+    runner.close()
+
+    pool = SearchPool(workers=1, session_bytes=8 << 20)
+    monkeypatch.setattr(app_module, 'default_pool', lambda: pool)
+    with connect(f'ws://127.0.0.1:{app_port}/ws', max_size=None) as ws:
+        big = {'size': 1024, 'obstacles': [], 'start': [0, 0], 'goal': [1023, 1023], 'algorithm': 'dijkstra', 'delta': True}
+        ws.send(json.dumps({'type': 'start', 'payload': big}))
+        assert json.loads(ws.recv(timeout=30))['type'] == 'ok'
+        ws.recv(timeout=30)
+        assert 0 < pool.stats()['reserved_bytes'] < 8 << 20
+        ws.send(json.dumps({'type': 'step_n', 'n': 1 << 20}))
+        msg = json.loads(ws.recv(timeout=60))
+        # the search outgrew the session limit part way and was stopped
+        assert msg['type'] == 'error' and 'MB' in msg['message']
+        assert pool.stats()['reserved_bytes'] == 0
+        ws.send(json.dumps(START | {'payload': {**START['payload'], 'size': 20, 'goal': [19, 19]}}))
+        assert json.loads(ws.recv(timeout=5))['type'] == 'ok'
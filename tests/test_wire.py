@@ -0,0 +1,54 @@
+import json
+from websockets.sync.client import connect
+from backend.algorithms.grid import Grid
+from backend.algorithms.astar import AStar, Heuristic
+from backend.algorithms.bidirectional import BidirectionalAStar
+from backend.wire import encode_frame, decode_frame
+
+
+def close_entries(a, b):
+    assert len(a) == len(b)
+    for (xy, g, h, f), (xy2, g2, h2, f2) in zip(a, b):
+        assert tuple(xy) == tuple(xy2)
+        assert abs(g - g2) < 1e-3 and abs(h - h2) < 1e-3 and abs(f - f2) < 1e-3
+
+
+def test_frame_roundtrip_full_and_delta():
+    g = Grid(40, {(10, y) for y in range(30)}, (0, 0), (39, 39), True)
+    algo = AStar(g, heuristic=Heuristic.octile)
+    for _ in range(60):
+        snap = algo.step()
+    msg = {'type': 'snapshot', **snap}
+    out = decode_frame(encode_frame(msg))
+    close_entries(out['open'], msg['open'])
+    assert out['closed'] == [tuple(c) for c in msg['closed']] and out['stats'] == msg['stats']
+    assert tuple(out['current']) == tuple(msg['current'])
+
+    algo = BidirectionalAStar(g, heuristic=Heuristic.octile)
+    algo.delta = True
+    for _ in range(40):
+        snap = algo.step()
+    msg = {'type': 'snapshot', **snap}
+    out = decode_frame(encode_frame(msg))
+    for side in (msg, msg['backward']):
+        got = out if side is msg else out['backward']
+        for k in ('open_add', 'open_update'):
+            close_entries(got['delta'][k], side['delta'][k])
+        for k in ('open_remove', 'closed_add'):
+            assert got['delta'][k] == [tuple(c) for c in side['delta'][k]]
+
+
+def test_ws_sends_binary_frames_when_negotiated(app_port):
+    with connect(f'ws://127.0.0.1:{app_port}/ws') as ws:
+        payload = {'size': 12, 'obstacles': [[5, 5]], 'start': [0, 0], 'goal': [11, 11], 'delta': True, 'binary': True}
+        ws.send(json.dumps({'type': 'start', 'payload': payload}))
+        assert json.loads(ws.recv(timeout=5))['type'] == 'ok'
+        first = ws.recv(timeout=5)
+        assert isinstance(first, bytes) and decode_frame(first)['resync']
+        ws.send(json.dumps({'type': 'step_n', 'n': 1000}))
+        done = ws.recv(timeout=5)
+        assert isinstance(done, bytes)
+        msg = decode_frame(done)
+        assert msg['type'] == 'finished' and msg['path'][0] == (0, 0) and msg['path'][-1] == (11, 11)
+        ws.send(json.dumps({'type': 'pause'}))
+        assert json.loads(ws.recv(timeout=5))['type'] == 'paused'